@@ -0,0 +1,146 @@
+"""
+Batch evaluation of saved calculator scenarios.
+
+Reads every scenario file (``*.json``) in a directory, computes all output tables with the same formulas as
+the Streamlit pages (see `calculator.evaluate`) across a pool of worker processes, and writes one combined CSV
+per output table, with a "Submission" column identifying the scenario file.
+
+A scenario file is a JSON object with the calculator inputs, as kept in the app's session state::
+
+    {
+        "personnel_rows": [{"Role": "Engineer", "Hourly Rate": 65.0}, ...],
+        "infrastructure_costs": [{"Cost Category": "Storage", "Business as Usual ($)": 100.0,
+                                  "Proposed Tool ($)": 50.0}, ...],
+        "project_steps": {
+            "BAU": {"Reporting": [{"Step": "...", "Notes": "", "Duration": 2.0,
+                                   "Roles": {"Engineer": 50.0}}, ...], ...},
+            "Proposed Tool": {...},
+            "Staffing plan B": {...}
+        },
+        "scenario_bases": {"Staffing plan B": "BAU"},
+        "schedules": {"Proposed Tool": {"enabled": true, "stages": {"Reporting": ["Data Modeling & Analysis"]},
+                                        "steps": {"<step id>": ["<step id>", ...]}}},
+        "roi_parameters": {"discovery_rate": 10.0, "total_students": 5000, ...},
+        "fixed_costs": {"BAU": 0, "Proposed Tool": 250000}
+    }
+
+Missing Social ROI parameters take the defaults of the Social ROI Parameters page; "fixed_costs" is optional.
+Scenarios other than "BAU" and "Proposed Tool" are optional; they appear in the scenario ranking and are based
+on the Proposed Tool unless listed in "scenario_bases" (see `calculator.get_scenario_base`). "schedules" is
+optional; the Social ROI time of a scenario with a schedule is its critical path (see `calculator.compute_schedule`).
+
+Usage::
+
+    python batch.py INPUT_DIR OUTPUT_DIR [--workers N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import pandas as pd
+
+from calculator import DEFAULT_ROI_PARAMETERS, evaluate
+
+
+def load_scenario(path):
+    """
+    Load the calculator inputs of one scenario file.
+
+    Args:
+        path (str or Path): Path of the JSON scenario file.
+
+    Returns:
+        dict: Keyword arguments for `calculator.evaluate`.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    roi_parameters = {**DEFAULT_ROI_PARAMETERS, **data.get("roi_parameters", {})}
+    if "computed_improvement" not in data.get("roi_parameters", {}):
+        roi_parameters["computed_improvement"] = roi_parameters["learning_sd"] * roi_parameters["econ_per_sd"]
+
+    return {
+        "personnel_rows": data.get("personnel_rows", []),
+        "project_steps": data.get("project_steps", {}),
+        "infrastructure_costs": data.get("infrastructure_costs", []),
+        "roi_parameters": roi_parameters,
+        "fixed_costs": data.get("fixed_costs"),
+        "scenario_bases": data.get("scenario_bases"),
+        "schedules": data.get("schedules")
+    }
+
+
+def evaluate_file(path):
+    """
+    Compute all output tables of one scenario file. Runs in a worker process.
+
+    Args:
+        path (Path): Path of the JSON scenario file.
+
+    Returns:
+        tuple: ``(submission name, output tables or None, error message or None)``.
+    """
+    try:
+        return path.stem, evaluate(**load_scenario(path)), None
+    except Exception as e:
+        return path.stem, None, f"{type(e).__name__}: {e}"
+
+
+def run_batch(input_dir, output_dir, workers=None):
+    """
+    Evaluate every scenario file in `input_dir` and write the combined output tables to `output_dir`.
+
+    Args:
+        input_dir (str or Path): Directory containing the ``*.json`` scenario files.
+        output_dir (str or Path): Directory the ``<table name>.csv`` files are written to.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        dict: Error message keyed by submission name, for every scenario that could not be evaluated.
+    """
+    paths = sorted(Path(input_dir).glob("*.json"))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tables = {}
+    errors = {}
+    workers = workers or os.cpu_count() or 1
+    with Pool(processes=workers) as pool:
+        for name, outputs, error in pool.imap(evaluate_file, paths, chunksize=max(1, len(paths) // (workers * 4))):
+            if error:
+                errors[name] = error
+                continue
+            for table_name, df in outputs.items():
+                tables.setdefault(table_name, []).append(df.assign(Submission=name))
+
+    # --- Write one combined table per output ---
+    for table_name, frames in tables.items():
+        combined = pd.concat(frames, ignore_index=True)
+        combined = combined[["Submission"] + [c for c in combined.columns if c != "Submission"]]
+        combined.to_csv(output_dir / f"{table_name}.csv", index=False)
+
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a directory of saved calculator scenarios.")
+    parser.add_argument("input_dir", help="Directory containing the *.json scenario files")
+    parser.add_argument("output_dir", help="Directory the combined output tables (CSV) are written to")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPUs)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    errors = run_batch(args.input_dir, args.output_dir, args.workers)
+    for name, error in errors.items():
+        print(f"⚠️ {name}: {error}", file=sys.stderr)
+    print(f"✅ Evaluated {len(list(Path(args.input_dir).glob('*.json'))) - len(errors)} scenario(s) "
+          f"in {time.perf_counter() - start:.2f}s; results written to {args.output_dir}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Benchmarks of the calculation hot paths.
+
+Generates synthetic calculator inputs of increasing size and times every output computation of the
+Project-Stage, Personnel and Social ROI pages (including `calculator.compute_projection` and the per-stage
+maximum duration of `calculator.compute_stage_duration_summary`). Each input size is varied on its own, from
+a base case of ``BASE_SIZE``:
+
+- steps per stage (number of activity steps),
+- roles (number of personnel roles, i.e. rows per step),
+- projection horizon (years of the Social ROI projection, monthly resolution).
+
+Every run is appended to a results CSV (one row per benchmark and size), so timings can be followed across
+changes. Before appending, each timing is compared with the latest earlier run in the same file; a
+benchmark that became more than ``--max-slowdown`` times slower is reported as a regression and the script
+exits with status 1. It also exits with status 1 if a session does not survive a save/load round trip (see
+`check_session_round_trips`).
+
+Usage::
+
+    python benchmarks.py [--results benchmark_results.csv] [--quick] [--repeat N] [--max-slowdown X]
+"""
+import argparse
+import platform
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calculator import (
+    DEFAULT_ROI_PARAMETERS, PROJECT_STAGES, ActivityTable, build_infrastructure_table, build_rate_index,
+    compare_scenarios, compute_cost_cube, compute_personnel_summaries, compute_projection, compute_roi_projection,
+    compute_roi_table, compute_stage_cost_summary, compute_stage_duration_summary, compute_stage_time_summary,
+    evaluate
+)
+from session_io import export_session, load_session
+
+# --- Base input size, and the values each size is varied over ---
+BASE_SIZE = {"steps_per_stage": 10, "roles": 5, "horizon_years": 50}
+SIZES = {
+    "steps_per_stage": [5, 10, 40, 160],
+    "roles": [2, 5, 20, 50],
+    "horizon_years": [50, 200, 1000]
+}
+QUICK_SIZES = {
+    "steps_per_stage": [5, 10, 40],
+    "roles": [2, 5, 20],
+    "horizon_years": [50, 200]
+}
+
+# --- Columns identifying a benchmark in the results file ---
+RESULT_KEYS = ["Benchmark", "Steps per stage", "Roles", "Horizon (years)"]
+
+
+def make_inputs(steps_per_stage, roles, seed=0):
+    """
+    Generate synthetic calculator inputs.
+
+    Both scenarios have `steps_per_stage` steps in every project stage. Each step involves a random subset
+    of the roles (the others are 0% active), and the Proposed Tool's durations are shorter on average.
+
+    Args:
+        steps_per_stage (int): Number of steps in every project stage.
+        roles (int): Number of personnel roles.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dict: Keyword arguments for `calculator.evaluate`, with the project steps as `ActivityTable` objects.
+    """
+    rng = np.random.default_rng(seed)
+    role_names = [f"Role {k + 1}" for k in range(roles)]
+    personnel_rows = [{"Role": role, "Hourly Rate": float(rng.uniform(30, 150))} for role in role_names]
+
+    n = steps_per_stage * len(PROJECT_STAGES)
+    stages = list(np.repeat(PROJECT_STAGES, steps_per_stage))
+    project_steps = {}
+    for scenario, speedup in [("BAU", 1.0), ("Proposed Tool", 0.6)]:
+        active = rng.uniform(5, 100, size=(n, roles)).round()
+        active[rng.random((n, roles)) < 0.5] = 0  # About half the roles are not involved in a step
+        project_steps[scenario] = ActivityTable.from_arrays(
+            role_names, stages,
+            steps=[f"Step {k + 1}" for k in range(n)],
+            notes=[""] * n,
+            duration=(rng.uniform(0.5, 8, size=n) * speedup).round(1),
+            active=active
+        )
+
+    infrastructure_costs = [
+        {"Cost Category": "Storage", "Business as Usual ($)": 1200.0, "Proposed Tool ($)": 800.0},
+        {"Cost Category": "Compute", "Business as Usual ($)": 3000.0, "Proposed Tool ($)": 1500.0}
+    ]
+    roi_parameters = {**DEFAULT_ROI_PARAMETERS, "total_students": 5000, "orgs_proposed": 10, "orgs_bau": 5}
+    return {
+        "personnel_rows": personnel_rows,
+        "project_steps": project_steps,
+        "infrastructure_costs": infrastructure_costs,
+        "roi_parameters": roi_parameters
+    }
+
+
+def build_benchmarks(inputs, horizon_years):
+    """
+    Build the benchmarked computations for one set of inputs.
+
+    The activities tables, rate index and infrastructure table are prepared once (as the app caches them), so
+    each benchmark times only its own computation.
+
+    Args:
+        inputs (dict): As returned by `make_inputs`.
+        horizon_years (int): Horizon of the Social ROI projection benchmarks.
+
+    Returns:
+        dict: Callable without arguments, keyed by benchmark name.
+    """
+    frames = {name: table.to_frame() for name, table in inputs["project_steps"].items()}
+    df_bau, df_tool = frames["BAU"], frames["Proposed Tool"]
+    rate_index = build_rate_index(inputs["personnel_rows"])
+    df_infra = build_infrastructure_table(inputs["infrastructure_costs"])
+    roi_params = inputs["roi_parameters"]
+    roi_df = compute_roi_table(df_bau, df_tool, rate_index, df_infra, roi_params)
+    time_months, cost_per_study, impact_per_study = roi_df.iloc[1][["Time (months)", "Cost ($)",
+                                                                    "Impact per study ($)"]]
+
+    return {
+        "activity_frame": lambda: inputs["project_steps"]["BAU"].copy().to_frame(),
+        "cost_cube": lambda: compute_cost_cube(frames, rate_index),
+        "stage_time_summary": lambda: compute_stage_time_summary(df_bau, df_tool),
+        "stage_duration_summary": lambda: compute_stage_duration_summary(df_bau, df_tool),
+        "stage_cost_summary": lambda: compute_stage_cost_summary(df_bau, df_tool, rate_index, df_infra),
+        "personnel_summaries": lambda: compute_personnel_summaries(df_bau, df_tool, rate_index),
+        "roi_table": lambda: compute_roi_table(df_bau, df_tool, rate_index, df_infra, roi_params),
+        "projection": lambda: compute_projection(
+            "Proposed Tool", time_months, cost_per_study, impact_per_study, 0, roi_params["orgs_proposed"],
+            roi_params["concurrent_studies"], horizon_years, periods_per_year=12
+        ),
+        "roi_projection": lambda: compute_roi_projection(
+            roi_df, roi_params, 0, 0, horizon_years, periods_per_year=12
+        ),
+        "compare_scenarios": lambda: compare_scenarios(frames, rate_index, df_infra, roi_params),
+        "evaluate": lambda: evaluate(**inputs)
+    }
+
+
+def check_session_round_trips():
+    """
+    Check that sessions are loaded back unchanged from both forms of session file.
+
+    Covers a fresh session (activities tables without roles, as before the activity pages are first opened),
+    steps without roles (no personnel entered) and the synthetic inputs of the base case.
+
+    Returns:
+        list of str: One description per session and form that did not round-trip; empty if all did.
+    """
+    inputs = make_inputs(BASE_SIZE["steps_per_stage"], BASE_SIZE["roles"])
+    sessions = {
+        "fresh session": {"project_steps": {"BAU": ActivityTable(), "Proposed Tool": ActivityTable()}},
+        "steps without roles": {"project_steps": {
+            "BAU": ActivityTable.from_steps({PROJECT_STAGES[0]: [{"Step": "Step 1", "Duration": 2.0, "Roles": {}}]}),
+            "Proposed Tool": ActivityTable()
+        }},
+        "synthetic inputs": {key: inputs[key] for key in ["personnel_rows", "infrastructure_costs",
+                                                          "roi_parameters", "project_steps"]}
+    }
+
+    failures = []
+    for name, state in sessions.items():
+        for binary in (False, True):
+            form = "Parquet" if binary else "JSON"
+            try:
+                loaded = load_session(export_session(state, binary))
+            except ValueError as e:
+                failures.append(f"{name} ({form}): {e}")
+                continue
+            for section, table in state["project_steps"].items():
+                if not loaded["project_steps"][section].to_frame().equals(table.to_frame()):
+                    failures.append(f"{name} ({form}): the {section} activities changed")
+    return failures
+
+
+def time_benchmark(func, repeat=5, min_time=0.2):
+    """
+    Time a computation.
+
+    The number of calls per measurement is increased until a measurement takes at least `min_time` seconds
+    (as `timeit` does), then `repeat` measurements are taken.
+
+    Args:
+        func (callable): The computation.
+        repeat (int): Number of measurements.
+        min_time (float): Minimum duration of a measurement in seconds.
+
+    Returns:
+        dict: Calls per measurement ("Number") and the best and median time per call in milliseconds.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time and number < 10 ** 6:
+        number *= 10 if number < 10 else 2
+    times = np.array(timer.repeat(repeat, number)) / number * 1000
+    return {"Number": number, "Best (ms)": times.min(), "Median (ms)": np.median(times)}
+
+
+def run_benchmarks(sizes=SIZES, repeat=5, min_time=0.2, only=None, progress=None):
+    """
+    Run every benchmark over `sizes`.
+
+    Args:
+        sizes (dict): Values of each input size (see ``SIZES``); the other sizes stay at ``BASE_SIZE``.
+        repeat (int): Number of measurements per benchmark.
+        min_time (float): Minimum duration of a measurement in seconds.
+        only (list of str, optional): Names of the benchmarks to run. All by default.
+        progress (callable, optional): Called with each result row as it is measured.
+
+    Returns:
+        pd.DataFrame: One row per benchmark and size, with the columns in ``RESULT_KEYS``, "Rows" (activity
+        rows per scenario), "Number", "Best (ms)" and "Median (ms)".
+    """
+    # --- Input sizes: the base case, then each size varied on its own ---
+    cases = [dict(BASE_SIZE)]
+    for size, values in sizes.items():
+        cases += [{**BASE_SIZE, size: value} for value in values if value != BASE_SIZE[size]]
+
+    rows = []
+    for case in cases:
+        inputs = make_inputs(case["steps_per_stage"], case["roles"])
+        benchmarks = build_benchmarks(inputs, case["horizon_years"])
+        for name, func in benchmarks.items():
+            if only and name not in only:
+                continue
+            # Only the projection benchmarks depend on the horizon
+            if case["horizon_years"] != BASE_SIZE["horizon_years"] and "projection" not in name:
+                continue
+            row = {
+                "Benchmark": name,
+                "Steps per stage": case["steps_per_stage"],
+                "Roles": case["roles"],
+                "Horizon (years)": case["horizon_years"],
+                "Rows": len(inputs["project_steps"]["BAU"]) * case["roles"],
+                **time_benchmark(func, repeat, min_time)
+            }
+            rows.append(row)
+            if progress:
+                progress(row)
+    return pd.DataFrame(rows)
+
+
+def find_regressions(results, previous, max_slowdown=1.5):
+    """
+    Compare timings with an earlier run.
+
+    Args:
+        results (pd.DataFrame): As returned by `run_benchmarks`.
+        previous (pd.DataFrame): Results of the earlier run, in the same form.
+        max_slowdown (float): Ratio of the best times above which a benchmark counts as a regression.
+
+    Returns:
+        pd.DataFrame: The benchmarks of both runs with their "Slowdown" (new best / earlier best), for the
+        benchmarks whose slowdown exceeds `max_slowdown`.
+    """
+    merged = results.merge(previous[RESULT_KEYS + ["Best (ms)"]], on=RESULT_KEYS, suffixes=("", " (previous)"))
+    merged["Slowdown"] = merged["Best (ms)"] / merged["Best (ms) (previous)"]
+    return merged.loc[merged["Slowdown"] > max_slowdown, RESULT_KEYS + ["Best (ms) (previous)", "Best (ms)",
+                                                                      "Slowdown"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculator's output computations.")
+    parser.add_argument("--results", default="benchmark_results.csv",
+                        help="CSV file the results are appended to (default: benchmark_results.csv)")
+    parser.add_argument("--quick", action="store_true", help="Smaller input sizes, for a fast check")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per benchmark (default: 5)")
+    parser.add_argument("--only", nargs="+", default=None, help="Names of the benchmarks to run")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Slowdown vs. the previous run reported as a regression (default: 1.5)")
+    args = parser.parse_args(argv)
+
+    def progress(row):
+        print(f"{row['Benchmark']:<24} steps/stage={row['Steps per stage']:<4} roles={row['Roles']:<3} "
+              f"horizon={row['Horizon (years)']:<5} {row['Best (ms)']:10.3f} ms")
+
+    start = time.perf_counter()
+    round_trip_failures = check_session_round_trips()
+    for failure in round_trip_failures:
+        print(f"⚠️ Session round trip failed: {failure}", file=sys.stderr)
+
+    results = run_benchmarks(QUICK_SIZES if args.quick else SIZES, args.repeat, only=args.only,
+                             progress=progress)
+    results.insert(0, "Run", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    results.insert(1, "Python", platform.python_version())
+    results.insert(2, "pandas", pd.__version__)
+
+    # --- Compare with the latest earlier run, then append this run ---
+    path = Path(args.results)
+    regressions = pd.DataFrame()
+    if path.exists():
+        history = pd.read_csv(path)
+        previous = history[history["Run"] == history["Run"].iloc[-1]]
+        regressions = find_regressions(results, previous, args.max_slowdown)
+    results.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+    for _, row in regressions.iterrows():
+        print(f"⚠️ {row['Benchmark']} (steps/stage={row['Steps per stage']}, roles={row['Roles']}, "
+              f"horizon={row['Horizon (years)']}): {row['Best (ms) (previous)']:.3f} ms → {row['Best (ms)']:.3f} ms "
+              f"({row['Slowdown']:.1f}× slower)", file=sys.stderr)
+    print(f"✅ Ran {len(results)} benchmark(s) in {time.perf_counter() - start:.1f}s; results appended to {path}")
+    return 1 if len(regressions) or round_trip_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1441 @@
+"""
+Calculation engine for the Efficiency Gains Calculator and Social ROI Dashboard.
+
+Everything in this module is free of Streamlit so that the same formulas used by the output pages can be
+imported and run outside of the browser (e.g. batch jobs or portfolio evaluations). The Streamlit pages in
+``streamlit_app.py`` only collect inputs and render the tables returned from here.
+"""
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# --- Project stages ---
+PROJECT_STAGES = [
+    "Data Agreements & Research Approvals",
+    "Data Collection & Access or Transfer",
+    "Study Design & Infrastructure Setup",
+    "Study Implementation & Monitoring",
+    "Data Modeling & Analysis",
+    "Reporting"
+]
+
+# --- Unit conversions ---
+HOURS_PER_WEEK = 40
+WEEKS_PER_MONTH = 4.345
+
+# --- Default Social ROI projection horizon (years) ---
+PROJECTION_YEARS = 50
+
+# --- Default Social ROI parameters (as prefilled on the Social ROI Parameters page) ---
+DEFAULT_ROI_PARAMETERS = {
+    "learning_definition": "Standardized math scores in middle school",
+    "learning_sd": 0.12,
+    "econ_definition": "Income at age 30",
+    "econ_per_sd": 2400.0,
+    "computed_improvement": 0.12 * 2400.0,
+    "discovery_rate": 10.0,
+    "total_students": 1,
+    "total_investment": 0,
+    "orgs_proposed": 1,
+    "orgs_bau": 1,
+    "concurrent_studies": 1
+}
+
+# --- Activity table columns ---
+ACTIVITY_COLUMNS = ["Stage", "Step", "Notes", "Total Duration (weeks)", "Role", "Active Time Spent (%)"]
+
+
+# =========================================================
+#  PROJECT ACTIVITIES STORAGE
+# =========================================================
+# --- Default steps prefilled for each stage (Step description, Notes) ---
+DEFAULT_STEPS = {
+    "Data Agreements & Research Approvals": [
+        ("Drafting agreements, review, executing DSAs and DUAs", ""),
+        ("Researchers to complete IRB requirements", ""),
+        ("Consenting Participants",
+         ("e.g. Obtaining consent from users / students using the curriculum "
+          "platform through ToS, pop-up or checkbox, or another form of notification"))
+    ],
+    "Data Collection & Access or Transfer": [
+        ("Data Collection, Documentation, Anonymization (Data setup)",
+         ("e.g. Collecting individual observations, querying, verification, "
+          "troubleshooting, anonymization, and documentation")),
+        ("Secure data access / transfer to researchers",
+         ("e.g. District may share data via secure file storage. Requires account setup, "
+          "permissions, VPN configuration, and validation."))
+    ],
+    "Study Design & Infrastructure Setup": [
+        ("Data Prep and Exploration",
+         ("e.g. Review, clean, merge, validate datasets; run power calculations, "
+          "determine randomization strategy.")),
+        ("Data preparation to implement the study",
+         ("e.g. Prepare content or implement feature changes for A/B testing: "
+          "update database, UI, variants.")),
+        ("Infrastructure setup for experiment execution",
+         ("e.g. Setup database, pipelines, dashboards, integrate content, QA, "
+          "documentation, training."))
+    ],
+    "Study Implementation & Monitoring": [
+        ("Run the study", "e.g. Run pilot study, scale, monitor, and share periodic data.")
+    ],
+    "Data Modeling & Analysis": [
+        ("Analysis & QA",
+         ("e.g. Verify experiment, run statistical/ML analyses, interpret findings, "
+          "produce descriptives/graphs."))
+    ],
+    "Reporting": [
+        ("Report writing & communications",
+         "e.g. Setup dashboards, publish reports, disseminate findings, propose next steps.")
+    ]
+}
+
+
+class ActivityTable:
+    """
+    Columnar storage of the steps of one project activity section.
+
+    Step metadata (id, stage, description, notes) is kept in lists, and the numeric inputs in NumPy arrays:
+    one duration per step and a steps × roles matrix of % active time. Steps are kept grouped by stage, in
+    stage order, so the long-format activities table can be built directly from the arrays. Optional
+    uncertainty ranges are stored alongside (NaN where no range was given).
+
+    The long-format table is cached and maintained incrementally: editing a step patches only that step's rows,
+    and ``revision`` is incremented whenever the table changes, so that downstream outputs know when to
+    recompute (see `output_cache.fingerprint`). Tables made with `share` share their lists and arrays until
+    the first edit (copy-on-write).
+
+    Args:
+        roles (list of str): Roles, i.e. the columns of the active time matrix.
+        stages (list of str): Project stages, in display order.
+    """
+    __slots__ = ("roles", "stage_order", "ids", "stages", "steps", "notes", "duration", "active",
+                 "duration_range", "active_range", "initialized_stages", "revision", "_uid", "_frame", "_shared")
+
+    def __init__(self, roles=(), stages=PROJECT_STAGES):
+        self.roles = list(dict.fromkeys(roles))
+        self.stage_order = list(stages)
+        self.ids = []
+        self.stages = []
+        self.steps = []
+        self.notes = []
+        self.duration = np.zeros(0)
+        self.active = np.zeros((0, len(self.roles)))
+        self.duration_range = np.full((0, 2), np.nan)
+        self.active_range = np.full((0, len(self.roles), 2), np.nan)
+        self.initialized_stages = set()  # Stages whose default steps have been prefilled
+        self.revision = 0  # Incremented whenever the long-format activities table changes
+        self._uid = uuid.uuid4().hex  # Distinguishes the revisions of different tables
+        self._frame = None  # Cached long-format activities table
+        self._shared = False  # Whether the lists and arrays are shared with another table (see `share`)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- Construction and conversion ---
+    @classmethod
+    def from_steps(cls, section_steps, roles=None, stages=PROJECT_STAGES):
+        """
+        Build a table from nested step dicts (``{stage: [{"Step", "Notes", "Duration", "Roles"}, ...]}``).
+
+        Args:
+            section_steps (dict): Mapping of stage name to a list of step dicts. Steps may also carry an "id"
+                and the optional "Duration Range" and "Roles Range" keys.
+            roles (list of str, optional): Role columns. Defaults to every role found in the steps.
+            stages (list of str): Stages to include, in display order.
+
+        Returns:
+            ActivityTable: The columnar table.
+        """
+        if roles is None:
+            roles = [r for stage in stages for step in section_steps.get(stage, []) for r in step["Roles"]]
+        table = cls(roles, stages)
+        for stage in stages:
+            if stage not in section_steps:
+                continue
+            table.initialized_stages.add(stage)
+            for step in section_steps[stage]:
+                table.append(
+                    stage, step.get("Step", ""), step.get("Notes", ""), step.get("Duration", 0.0),
+                    [step["Roles"].get(r, 0.0) for r in table.roles], step_id=step.get("id"),
+                    duration_range=step.get("Duration Range"),
+                    # One (lowest, highest) pair per role, also when there are no roles
+                    active_range=np.array(
+                        [step.get("Roles Range", {}).get(r, (np.nan, np.nan)) for r in table.roles], dtype=float
+                    ).reshape(len(table.roles), 2)
+                )
+        return table
+
+    @classmethod
+    def from_arrays(cls, roles, stages, steps, notes, duration, active, step_ids=None, duration_range=None,
+                    active_range=None, initialized_stages=None, stage_order=PROJECT_STAGES):
+        """
+        Build a table directly from its columns, e.g. when loading a saved session.
+
+        Args:
+            roles (list of str): Role columns.
+            stages (list of str): Project stage of each step.
+            steps (list of str): Step descriptions.
+            notes (list of str): Notes.
+            duration (array-like): Total duration in weeks of each step.
+            active (array-like): % active time, steps × roles.
+            step_ids (list of str, optional): Id of each step. New UUIDs are assigned by default.
+            duration_range (array-like, optional): Lowest and highest duration per step (NaN for no range).
+            active_range (array-like, optional): Lowest and highest % active time, steps × roles × 2.
+            initialized_stages (iterable of str, optional): Stages whose default steps have been prefilled.
+                Defaults to the stages of the given steps.
+            stage_order (list of str): Project stages, in display order.
+
+        Returns:
+            ActivityTable: The columnar table.
+        """
+        table = cls(roles, stage_order)
+        n, r = len(steps), len(table.roles)
+        order = sorted(range(n), key=lambda k: table._stage_position(stages[k]))  # Group steps by stage
+        step_ids = step_ids if step_ids is not None else [str(uuid.uuid4()) for _ in range(n)]
+
+        table.ids = [step_ids[k] for k in order]
+        table.stages = [stages[k] for k in order]
+        table.steps = [steps[k] for k in order]
+        table.notes = [notes[k] for k in order]
+        table.duration = np.asarray(duration, dtype=float).reshape(n)[order]
+        table.active = np.asarray(active, dtype=float).reshape(n, r)[order]
+        if duration_range is not None:
+            table.duration_range = np.asarray(duration_range, dtype=float).reshape(n, 2)[order]
+        else:
+            table.duration_range = np.full((n, 2), np.nan)
+        if active_range is not None:
+            table.active_range = np.asarray(active_range, dtype=float).reshape(n, r, 2)[order]
+        else:
+            table.active_range = np.full((n, r, 2), np.nan)
+        table.initialized_stages = set(initialized_stages if initialized_stages is not None else stages)
+        return table
+
+    def to_steps(self):
+        """
+        Convert the table back to nested step dicts, as accepted by `from_steps`.
+
+        Returns:
+            dict: Mapping of stage name to a list of step dicts.
+        """
+        section_steps = {stage: [] for stage in self.stage_order if stage in self.initialized_stages}
+        for i, stage in enumerate(self.stages):
+            step = {
+                "id": self.ids[i],
+                "Step": self.steps[i],
+                "Notes": self.notes[i],
+                "Duration": float(self.duration[i]),
+                "Roles": dict(zip(self.roles, self.active[i].tolist()))
+            }
+            if self.has_range(i):
+                step["Duration Range"] = self.duration_range[i].tolist()
+                step["Roles Range"] = {
+                    r: v.tolist() for r, v in zip(self.roles, self.active_range[i]) if not np.isnan(v[0])
+                }
+            section_steps.setdefault(stage, []).append(step)
+        return section_steps
+
+    def copy(self):
+        """
+        Copy the table. Every step of the copy receives a **new UUID**.
+
+        Returns:
+            ActivityTable: The copy.
+        """
+        table = ActivityTable(self.roles, self.stage_order)
+        table.ids = [str(uuid.uuid4()) for _ in self.ids]
+        table.stages = list(self.stages)
+        table.steps = list(self.steps)
+        table.notes = list(self.notes)
+        table.duration = self.duration.copy()
+        table.active = self.active.copy()
+        table.duration_range = self.duration_range.copy()
+        table.active_range = self.active_range.copy()
+        table.initialized_stages = set(self.initialized_stages)
+        return table
+
+    def share(self):
+        """
+        Copy the table without copying its steps, e.g. to start a session from a default table built once per
+        process (see `defaults.new_activity_table`).
+
+        The copy shares the step lists and arrays of this table; whichever of the two tables is edited first
+        takes its own copy of them (copy-on-write). Every step of the copy receives a **new UUID**, as with
+        `copy`.
+
+        Returns:
+            ActivityTable: The copy.
+        """
+        table = ActivityTable(self.roles, self.stage_order)
+        table.ids = [str(uuid.uuid4()) for _ in self.ids]
+        table.stages, table.steps, table.notes = self.stages, self.steps, self.notes
+        table.duration, table.active = self.duration, self.active
+        table.duration_range, table.active_range = self.duration_range, self.active_range
+        table.initialized_stages = set(self.initialized_stages)
+        table._shared = self._shared = True
+        return table
+
+    # --- Row access and editing ---
+    def stage_rows(self, stage):
+        """Row indices of the steps of `stage`, in order."""
+        return [i for i, s in enumerate(self.stages) if s == stage]
+
+    def append(self, stage, step="", notes="", duration=0.0, active=None, step_id=None, duration_range=None,
+               active_range=None):
+        """
+        Add a step at the end of `stage`.
+
+        Args:
+            stage (str): Project stage of the step.
+            step (str): Step description.
+            notes (str): Notes.
+            duration (float): Total duration in weeks.
+            active (list of float, optional): % active time per role (in the order of `roles`). Defaults to 0.
+            step_id (str, optional): Unique id of the step. A new UUID is assigned by default.
+            duration_range (list of float, optional): Lowest and highest duration in weeks.
+            active_range (list, optional): Lowest and highest % active time per role.
+
+        Returns:
+            str: The id of the new step.
+        """
+        self._own()
+        order = self._stage_position(stage)
+        pos = sum(1 for s in self.stages if self._stage_position(s) <= order)
+        step_id = step_id or str(uuid.uuid4())
+
+        self.ids.insert(pos, step_id)
+        self.stages.insert(pos, stage)
+        self.steps.insert(pos, step)
+        self.notes.insert(pos, notes)
+        self.duration = np.insert(self.duration, pos, duration)
+        self.active = np.insert(
+            self.active, pos, np.zeros(len(self.roles)) if active is None else active, axis=0
+        )
+        self.duration_range = np.insert(
+            self.duration_range, pos, (np.nan, np.nan) if duration_range is None else duration_range, axis=0
+        )
+        self.active_range = np.insert(
+            self.active_range, pos,
+            np.full((len(self.roles), 2), np.nan) if active_range is None else active_range, axis=0
+        )
+        self._invalidate()
+        return step_id
+
+    def delete(self, step_id):
+        """Remove the step with id `step_id`."""
+        self._own()
+        i = self.ids.index(step_id)
+        for values in (self.ids, self.stages, self.steps, self.notes):
+            del values[i]
+        self.duration = np.delete(self.duration, i)
+        self.active = np.delete(self.active, i, axis=0)
+        self.duration_range = np.delete(self.duration_range, i, axis=0)
+        self.active_range = np.delete(self.active_range, i, axis=0)
+        self._invalidate()
+
+    def update(self, i, step, notes, duration, active):
+        """
+        Update the inputs of row `i`. If a value changed, only the rows of this step are patched in the cached
+        activities table.
+
+        Args:
+            i (int): Row index.
+            step (str): Step description.
+            notes (str): Notes.
+            duration (float): Total duration in weeks.
+            active (list of float): % active time per role (in the order of `roles`).
+        """
+        if (step != self.steps[i] or notes != self.notes[i] or duration != self.duration[i]
+                or not np.array_equal(active, self.active[i])):
+            self._own()
+            self.steps[i] = step
+            self.notes[i] = notes
+            self.duration[i] = duration
+            self.active[i] = active
+            self.revision += 1
+            if self._frame is not None:
+                self._patch_frame(i)
+
+    def replace_stage(self, stage, steps, notes, duration, active, step_ids=None):
+        """
+        Replace all steps of `stage` in one operation, e.g. after a bulk edit of the stage.
+
+        Steps are matched on their id: kept steps retain their uncertainty range, steps without a (known) id
+        are added with a new UUID and steps that are no longer listed are removed.
+
+        Args:
+            stage (str): Project stage.
+            steps (list of str): Step descriptions.
+            notes (list of str): Notes.
+            duration (list of float): Total duration in weeks of each step.
+            active (array-like): % active time, steps × roles (in the order of `roles`).
+            step_ids (list, optional): Id of each step; None or NaN for new steps.
+        """
+        self._own()
+        rows = self.stage_rows(stage)
+        start = rows[0] if rows else sum(
+            1 for s in self.stages if self._stage_position(s) <= self._stage_position(stage)
+        )
+        end = start + len(rows)  # The steps of a stage are contiguous
+
+        n = len(steps)
+        known = {self.ids[i]: i for i in rows}
+        step_ids = [
+            step_id if isinstance(step_id, str) and step_id in known else str(uuid.uuid4())
+            for step_id in (step_ids if step_ids is not None else [None] * n)
+        ]
+        kept = [known.get(step_id) for step_id in step_ids]
+        duration_range = np.full((n, 2), np.nan)
+        active_range = np.full((n, len(self.roles), 2), np.nan)
+        for k, i in enumerate(kept):
+            if i is not None:
+                duration_range[k], active_range[k] = self.duration_range[i], self.active_range[i]
+
+        self.ids[start:end] = step_ids
+        self.stages[start:end] = [stage] * n
+        self.steps[start:end] = list(steps)
+        self.notes[start:end] = list(notes)
+        self.duration = np.concatenate([self.duration[:start], np.asarray(duration, dtype=float),
+                                        self.duration[end:]])
+        self.active = np.concatenate([self.active[:start],
+                                      np.asarray(active, dtype=float).reshape(n, len(self.roles)),
+                                      self.active[end:]])
+        self.duration_range = np.concatenate([self.duration_range[:start], duration_range,
+                                              self.duration_range[end:]])
+        self.active_range = np.concatenate([self.active_range[:start], active_range, self.active_range[end:]])
+        self.initialized_stages.add(stage)
+        self._invalidate()
+
+    def has_range(self, i):
+        """Whether row `i` has an uncertainty range."""
+        return not np.isnan(self.duration_range[i, 0])
+
+    def set_range(self, i, duration_range, active_range):
+        """Set the uncertainty range of row `i` (lowest/highest duration and % active time per role)."""
+        duration_range = np.asarray(duration_range, dtype=float)
+        active_range = np.asarray(active_range, dtype=float)
+        if (np.array_equal(self.duration_range[i], duration_range, equal_nan=True)
+                and np.array_equal(self.active_range[i], active_range, equal_nan=True)):
+            return  # Unchanged (the pages set the range on every rerun): shared arrays stay shared
+        self._own()
+        self.duration_range[i] = duration_range
+        self.active_range[i] = active_range
+
+    def clear_range(self, i):
+        """Remove the uncertainty range of row `i`."""
+        if np.isnan(self.duration_range[i]).all() and np.isnan(self.active_range[i]).all():
+            return  # No range (the pages clear it on every rerun): shared arrays stay shared
+        self._own()
+        self.duration_range[i] = np.nan
+        self.active_range[i] = np.nan
+
+    def set_roles(self, roles):
+        """
+        Align the role columns with `roles`, keeping the values of existing roles (new roles start at 0).
+
+        Args:
+            roles (list of str): Roles, e.g. from the Personnel Costs page.
+        """
+        roles = list(dict.fromkeys(roles))
+        if roles == self.roles:
+            return
+        old = {r: j for j, r in enumerate(self.roles)}
+        active = np.zeros((len(self), len(roles)))
+        active_range = np.full((len(self), len(roles), 2), np.nan)
+        for j, r in enumerate(roles):
+            if r in old:
+                active[:, j] = self.active[:, old[r]]
+                active_range[:, j] = self.active_range[:, old[r]]
+        self.roles, self.active, self.active_range = roles, active, active_range
+        self._invalidate()
+
+    def _own(self):
+        """Take a private copy of the step lists and arrays before editing them, if they are shared."""
+        if self._shared:
+            self.stages, self.steps, self.notes = list(self.stages), list(self.steps), list(self.notes)
+            self.duration, self.active = self.duration.copy(), self.active.copy()
+            self.duration_range, self.active_range = self.duration_range.copy(), self.active_range.copy()
+            self._shared = False
+
+    def _stage_position(self, stage):
+        """Display position of `stage` (unknown stages go last)."""
+        return self.stage_order.index(stage) if stage in self.stage_order else len(self.stage_order)
+
+    # --- Long-format table ---
+    def _invalidate(self):
+        """Discard the cached activities table after a change of its rows or columns."""
+        self.revision += 1
+        self._frame = None
+
+    def release_frame(self):
+        """Drop the cached activities table (e.g. once it is spilled to disk); `to_frame` rebuilds it when needed."""
+        self._frame = None
+
+    def _patch_frame(self, i):
+        """Write the inputs of row `i` into its block of rows in the cached activities table."""
+        frame = self._frame
+        rows = slice(i * len(self.roles), (i + 1) * len(self.roles))
+        frame.iloc[rows, frame.columns.get_loc("Step")] = self.steps[i]
+        frame.iloc[rows, frame.columns.get_loc("Notes")] = self.notes[i]
+        frame.iloc[rows, frame.columns.get_loc("Total Duration (weeks)")] = self.duration[i]
+        frame.iloc[rows, frame.columns.get_loc("Active Time Spent (%)")] = self.active[i]
+        frame.attrs["revision"] = (self._uid, self.revision)
+
+    def to_frame(self):
+        """
+        Long-format activities table with one row per step and role (cached and patched in place on edits).
+
+        Returns:
+            pd.DataFrame: A dataframe with the columns in ``ACTIVITY_COLUMNS``. Its ``attrs["revision"]``
+            identifies the table and its revision.
+        """
+        if self._frame is None:
+            n, r = self.active.shape
+            self._frame = pd.DataFrame({
+                "Stage": np.repeat(np.array(self.stages, dtype=object), r),
+                "Step": np.repeat(np.array(self.steps, dtype=object), r),
+                "Notes": np.repeat(np.array(self.notes, dtype=object), r),
+                "Total Duration (weeks)": np.repeat(self.duration, r),
+                "Role": np.tile(np.array(self.roles, dtype=object), n),
+                "Active Time Spent (%)": self.active.ravel()
+            })
+            self._frame.attrs["revision"] = (self._uid, self.revision)
+        return self._frame
+
+
+def as_activity_table(section_steps):
+    """Return `section_steps` as an `ActivityTable`, converting nested step dicts if needed."""
+    if isinstance(section_steps, ActivityTable):
+        return section_steps
+    return ActivityTable.from_steps(section_steps or {})
+
+
+# =========================================================
+#  INPUT TABLES
+# =========================================================
+def build_personnel_table(personnel_rows):
+    """
+    Build the personnel costs table shown on the Personnel Costs page.
+
+    Args:
+        personnel_rows (list of dict): Personnel rows with "id", "Role", "Hourly Rate" and "Notes" keys.
+
+    Returns:
+        pd.DataFrame: The personnel rows without the internal "id" column.
+    """
+    return pd.DataFrame(personnel_rows).drop(columns="id", errors="ignore")
+
+
+def build_infrastructure_table(infrastructure_costs):
+    """
+    Build the infrastructure costs table, including a trailing "Total" row.
+
+    Args:
+        infrastructure_costs (list of dict): Cost rows with "id", "Cost Category", "Business as Usual ($)",
+            "Proposed Tool ($)" and "Notes" keys.
+
+    Returns:
+        pd.DataFrame: The cost rows (without "id") followed by a "Total" row.
+    """
+    df_infra = pd.DataFrame(infrastructure_costs).drop(columns="id", errors="ignore")
+
+    # --- Add a Total row ---
+    total_row = pd.DataFrame({
+        "Cost Category": ["Total"],
+        "Business as Usual ($)": [df_infra["Business as Usual ($)"].sum()],
+        "Proposed Tool ($)": [df_infra["Proposed Tool ($)"].sum()]
+    })
+
+    return pd.concat([df_infra, total_row], ignore_index=True)
+
+
+def get_infrastructure_total(df_infra, column):
+    """
+    Retrieve the value of the "Total" row of the infrastructure costs table.
+
+    Args:
+        df_infra (pd.DataFrame): Infrastructure table as returned by `build_infrastructure_table`.
+        column (str): Either "Business as Usual ($)" or "Proposed Tool ($)".
+
+    Returns:
+        float: The total infrastructure cost, or 0 if the table is empty.
+    """
+    if df_infra is None or df_infra.empty:
+        return 0
+    return df_infra.loc[df_infra["Cost Category"] == "Total", column].values[0]
+
+
+def build_rate_index(personnel_rows):
+    """
+    Build the role → hourly rate index shared by all cost calculations.
+
+    Args:
+        personnel_rows (list of dict): Personnel rows with "Role" and "Hourly Rate" keys.
+
+    Returns:
+        dict: Hourly rate keyed by role. If a role is listed more than once, its first hourly rate is used.
+    """
+    rate_index = {}
+    for p in personnel_rows:
+        rate_index.setdefault(p["Role"], p["Hourly Rate"])
+    return rate_index
+
+
+def get_rate_index_key(personnel_rows):
+    """
+    Fingerprint of the personnel inputs a rate index depends on, used to detect when it must be rebuilt.
+
+    Args:
+        personnel_rows (list of dict): Personnel rows with "Role" and "Hourly Rate" keys.
+
+    Returns:
+        tuple: The (role, hourly rate) pairs in order.
+    """
+    return tuple((p["Role"], p["Hourly Rate"]) for p in personnel_rows)
+
+
+def compute_cost_cube(frames, rate_index):
+    """
+    Compute active person-hours and personnel cost per scenario, stage and role in a single pass.
+
+    Every person-hours and personnel cost figure of the output pages (per stage, per role, their totals and the
+    cost of a study on the Social ROI page) is a slice of this cube, so the activities tables are priced once
+    per input change.
+
+    Args:
+        frames (dict): Activities table keyed by scenario name, with "Stage", "Role", "Total Duration (weeks)"
+            and "Active Time Spent (%)" columns.
+        rate_index (dict): Hourly rate keyed by role, as returned by `build_rate_index`.
+
+    Returns:
+        pd.DataFrame: "Person-Hours" and "Cost ($)" indexed by ("Scenario", "Stage", "Role"), with one row per
+        combination present in the activities tables, sorted by index so it can be sliced without copies. Roles
+        without an hourly rate cost 0. Pages order stages and roles themselves, not by the order of the cube.
+    """
+    names = [name for name, df in frames.items() if df is not None and not df.empty]
+    if not names:
+        return pd.DataFrame(
+            {"Person-Hours": [], "Cost ($)": []},
+            index=pd.MultiIndex.from_arrays([[], [], []], names=["Scenario", "Stage", "Role"])
+        )
+
+    stacked = pd.concat(
+        [frames[name][["Stage", "Role", "Total Duration (weeks)", "Active Time Spent (%)"]] for name in names],
+        keys=names, names=["Scenario", None]
+    ).reset_index(level="Scenario")
+    duration = pd.to_numeric(stacked["Total Duration (weeks)"], errors="coerce").fillna(0)
+    active = pd.to_numeric(stacked["Active Time Spent (%)"], errors="coerce").fillna(0)
+
+    # Hours per row: duration × active % × 40 hours/week; cost per row: hours × hourly rate
+    hours = duration * (active / 100) * HOURS_PER_WEEK
+    return pd.DataFrame({
+        "Scenario": stacked["Scenario"],
+        "Stage": stacked["Stage"],
+        "Role": stacked["Role"],
+        "Person-Hours": hours,
+        "Cost ($)": hours * stacked["Role"].map(rate_index).fillna(0).astype(float)
+    }).groupby(["Scenario", "Stage", "Role"]).sum()
+
+
+def slice_cost_cube(cube, scenario, level, column):
+    """
+    Total one figure of a scenario in the cost cube per stage or per role.
+
+    Args:
+        cube (pd.DataFrame): As returned by `compute_cost_cube`.
+        scenario (str): Scenario name.
+        level (str): "Stage" or "Role".
+        column (str): "Person-Hours" or "Cost ($)".
+
+    Returns:
+        pd.Series: Totals indexed by `level`, empty if the scenario has no activities.
+    """
+    if scenario not in cube.index.get_level_values("Scenario"):
+        return pd.Series(dtype=float)
+    return cube.xs(scenario, level="Scenario")[column].groupby(level=level, sort=False).sum()
+
+
+# =========================================================
+#  PROJECT-STAGE EFFICIENCY GAINS
+# =========================================================
+def compute_stage_time_summary(df_bau, df_tool, stages=PROJECT_STAGES, cube=None):
+    """
+    Compute active person-hours per project stage for both scenarios.
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+        stages (list of str): Project stages, in display order.
+        cube (pd.DataFrame, optional): Cost cube of both scenarios (see `compute_cost_cube`). Computed from the
+            activities tables if not given.
+
+    Returns:
+        pd.DataFrame: One row per stage plus a "Total" row, with BAU hours, Proposed Tool hours and time saved.
+    """
+    if cube is None:
+        cube = compute_cost_cube({"BAU": df_bau, "Proposed Tool": df_tool}, {})
+
+    # --- Person-hours per stage for each scenario (stages without steps take 0 hours) ---
+    time_summary = pd.DataFrame({"Stage": stages})
+    for scenario, column in [("BAU", "Business as Usual (hrs)"), ("Proposed Tool", "Proposed Tool (hrs)")]:
+        hours = slice_cost_cube(cube, scenario, "Stage", "Person-Hours")
+        time_summary[column] = hours.reindex(stages, fill_value=0).values.astype(float)
+
+    # --- Compute Time Saved vs BAU ---
+    time_summary["Time Saved vs BAU (hrs)"] = (
+            time_summary["Business as Usual (hrs)"] - time_summary["Proposed Tool (hrs)"]
+    )
+
+    # --- Add Total row ---
+    total_time_row = pd.DataFrame([{
+        "Stage": "Total",
+        "Business as Usual (hrs)": time_summary["Business as Usual (hrs)"].sum(),
+        "Proposed Tool (hrs)": time_summary["Proposed Tool (hrs)"].sum(),
+        "Time Saved vs BAU (hrs)": time_summary["Time Saved vs BAU (hrs)"].sum()
+    }])
+
+    # Append total row to the summary
+    return pd.concat([time_summary, total_time_row], ignore_index=True)
+
+
+def compute_stage_duration_summary(df_bau, df_tool, stages=PROJECT_STAGES):
+    """
+    Compute the total duration per project stage (in weeks), ignoring personnel allocation.
+
+    The duration of a stage is the sum of the durations of its steps (the longest duration among the rows of each
+    step). Computed with one group-by per scenario.
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+        stages (list of str): Project stages, in display order.
+
+    Returns:
+        pd.DataFrame: One row per stage plus a "Total" row, with BAU duration, Proposed Tool duration and
+        time saved.
+    """
+    total_time_summary = pd.DataFrame({"Stage": stages})  # Initialize summary with project stages
+
+    # Duration of each scenario: the longest duration of each unique step within a stage, summed per stage
+    for scenario, df_scenario in zip(["BAU", "Proposed Tool"], [df_bau, df_tool]):
+        if df_scenario.empty or "Step" not in df_scenario.columns:
+            durations = pd.Series(0.0, index=stages)
+        else:
+            durations = (
+                df_scenario.groupby(["Stage", "Step"], sort=False)["Total Duration (weeks)"].max()
+                .groupby(level="Stage", sort=False).sum()
+                .reindex(stages, fill_value=0)
+            )
+
+        # Add scenario duration column to the summary dataframe (stages without steps take 0 weeks)
+        total_time_summary[f"{scenario} Duration (weeks)"] = durations.values
+
+    # --- Compute time saved (positive = time saved) ---
+    total_time_summary["Time Saved vs BAU (weeks)"] = (
+            total_time_summary["BAU Duration (weeks)"] - total_time_summary["Proposed Tool Duration (weeks)"]
+    )
+
+    # --- Add Total row ---
+    total_time_row = pd.DataFrame([{
+        "Stage": "Total",
+        "BAU Duration (weeks)": total_time_summary["BAU Duration (weeks)"].sum(),
+        "Proposed Tool Duration (weeks)": total_time_summary["Proposed Tool Duration (weeks)"].sum(),
+        "Time Saved vs BAU (weeks)": total_time_summary["Time Saved vs BAU (weeks)"].sum()
+    }])
+
+    # Append total row to the summary
+    return pd.concat([total_time_summary, total_time_row], ignore_index=True)
+
+
+def compute_stage_cost_summary(df_bau, df_tool, rate_index, df_infra, stages=PROJECT_STAGES, cube=None):
+    """
+    Compute personnel cost per project stage plus infrastructure cost for both scenarios.
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+        rate_index (dict): Hourly rate keyed by role, as returned by `build_rate_index`.
+        df_infra (pd.DataFrame): Infrastructure table as returned by `build_infrastructure_table`.
+        stages (list of str): Project stages, in display order.
+        cube (pd.DataFrame, optional): Cost cube of both scenarios (see `compute_cost_cube`). Computed from the
+            activities tables if not given.
+
+    Returns:
+        pd.DataFrame: One row per stage, an "Infrastructure" row (if infrastructure costs exist) and a
+        "Total" row, with BAU cost, Proposed Tool cost and cost saved.
+    """
+    if cube is None:
+        cube = compute_cost_cube({"BAU": df_bau, "Proposed Tool": df_tool}, rate_index)
+    cost_summary = pd.DataFrame({"Stage": stages})
+
+    # --- Personnel cost per stage for each scenario (BAU and Proposed Tool) ---
+    for scenario in ["BAU", "Proposed Tool"]:
+        stage_costs = slice_cost_cube(cube, scenario, "Stage", "Cost ($)")
+
+        # Add the scenario cost column to the summary dataframe (stages without steps cost 0)
+        cost_summary[f"{scenario} Cost ($)"] = stage_costs.reindex(stages, fill_value=0).values.astype(float)
+
+    # --- Add Infrastructure row ---
+    if df_infra is not None and not df_infra.empty:
+        infra_row = {
+            "Stage": "Infrastructure",
+            "BAU Cost ($)": get_infrastructure_total(df_infra, "Business as Usual ($)"),
+            "Proposed Tool Cost ($)": get_infrastructure_total(df_infra, "Proposed Tool ($)")
+        }
+        cost_summary = pd.concat([cost_summary, pd.DataFrame([infra_row])], ignore_index=True)
+
+    # --- Compute Cost Saved ---
+    cost_summary["Cost Saved vs BAU ($)"] = cost_summary["BAU Cost ($)"] - cost_summary["Proposed Tool Cost ($)"]
+
+    # --- Add Total row ---
+    total_row = pd.DataFrame([{
+        "Stage": "Total",
+        "BAU Cost ($)": cost_summary["BAU Cost ($)"].sum(),
+        "Proposed Tool Cost ($)": cost_summary["Proposed Tool Cost ($)"].sum(),
+        "Cost Saved vs BAU ($)": cost_summary["Cost Saved vs BAU ($)"].sum()
+    }])
+    return pd.concat([cost_summary, total_row], ignore_index=True)
+
+
+# =========================================================
+#  PERSONNEL EFFICIENCY GAINS
+# =========================================================
+def compute_personnel_summaries(df_bau, df_tool, rate_index, cube=None):
+    """
+    Compute active person-hours and personnel cost per role for both scenarios.
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+        rate_index (dict): Hourly rate keyed by role, as returned by `build_rate_index`.
+        cube (pd.DataFrame, optional): Cost cube of both scenarios (see `compute_cost_cube`). Computed from the
+            activities tables if not given.
+
+    Returns:
+        tuple of pd.DataFrame: ``(time_summary, cost_summary)``, each with one row per role plus a "Total" row.
+    """
+    if cube is None:
+        cube = compute_cost_cube({"BAU": df_bau, "Proposed Tool": df_tool}, rate_index)
+
+    # --- Get unique roles across all scenarios ---
+    roles = sorted(cube.index.unique(level="Role"))
+
+    # --- Person-Hours Table ---
+    time_summary = pd.DataFrame({"Role": roles})
+
+    # Total active hours per role for each scenario (roles not involved in a scenario take 0 hours)
+    for scenario_name in ["BAU", "Proposed Tool"]:
+        hours = slice_cost_cube(cube, scenario_name, "Role", "Person-Hours")
+        time_summary[f"{scenario_name} (hrs)"] = hours.reindex(roles, fill_value=0).values.astype(float)
+
+    # Compute time saved (positive = hours saved)
+    time_summary["Time Saved vs BAU (hrs)"] = (
+            time_summary["BAU (hrs)"] - time_summary["Proposed Tool (hrs)"]
+    )
+
+    # Add Total row
+    total_time_row = pd.DataFrame([{
+        "Role": "Total",
+        "BAU (hrs)": time_summary["BAU (hrs)"].sum(),
+        "Proposed Tool (hrs)": time_summary["Proposed Tool (hrs)"].sum(),
+        "Time Saved vs BAU (hrs)": time_summary["Time Saved vs BAU (hrs)"].sum()
+    }])
+    time_summary = pd.concat([time_summary, total_time_row], ignore_index=True)
+
+    # --- Cost Table ---
+    cost_summary = pd.DataFrame({"Role": roles})
+
+    # Total cost per role for each scenario
+    for scenario_name in ["BAU", "Proposed Tool"]:
+        costs = slice_cost_cube(cube, scenario_name, "Role", "Cost ($)")
+        cost_summary[f"{scenario_name} Cost ($)"] = costs.reindex(roles, fill_value=0).values.astype(float)
+
+    # Compute cost saved (positive = cost saved)
+    cost_summary["Cost Saved vs BAU ($)"] = (
+            cost_summary["BAU Cost ($)"] - cost_summary["Proposed Tool Cost ($)"]
+    )
+
+    # Add Total row for costs
+    total_cost_row = pd.DataFrame([{
+        "Role": "Total",
+        "BAU Cost ($)": cost_summary["BAU Cost ($)"].sum(),
+        "Proposed Tool Cost ($)": cost_summary["Proposed Tool Cost ($)"].sum(),
+        "Cost Saved vs BAU ($)": cost_summary["Cost Saved vs BAU ($)"].sum()
+    }])
+    cost_summary = pd.concat([cost_summary, total_cost_row], ignore_index=True)
+
+    return time_summary, cost_summary
+
+
+# =========================================================
+#  CRITICAL-PATH SCHEDULING
+# =========================================================
+# A schedule lists the dependencies of the stages and steps of one scenario (JSON-serializable, as stored in
+# ``st.session_state.schedules``):
+#
+#     {"enabled": True,
+#      "stages": {"Reporting": ["Data Modeling & Analysis"], ...},  # Stages each stage starts after
+#      "steps": {"<step id>": ["<step id>", ...], ...}}             # Steps each step starts after
+#
+# Stages that are not listed start after the previous stage (the first stage starts at week 0), and steps that
+# are not listed start when their stage starts. A stage finishes when all of its steps have finished. Without
+# any dependencies, the project duration is the sum of the longest step of each stage, as on the Social ROI page.
+def compute_schedule(table, schedule=None):
+    """
+    Schedule the steps of one scenario and find its critical path (the longest path through the dependencies).
+
+    The dependencies form a directed acyclic graph of stage start/finish events and steps. Every event is
+    scheduled once in topological order, and latest times are computed in reverse order, so the time taken
+    grows linearly with the number of steps and dependencies.
+
+    Args:
+        table (ActivityTable or dict): Project steps of the scenario.
+        schedule (dict, optional): Dependencies of the stages and steps (see above). Dependencies on unknown
+            stages or steps (e.g. deleted steps) are ignored.
+
+    Returns:
+        dict:
+            - "steps": One row per step with its "Start (week)", "Finish (week)", "Slack (weeks)" (how long
+              the step can be delayed without delaying the project) and "Critical" (no slack).
+            - "stages": One row per stage with its start, finish, slack and "Critical".
+            - "duration_weeks": Duration of the project (the length of the critical path).
+
+    Raises:
+        ValueError: If the dependencies contain a cycle.
+    """
+    table = as_activity_table(table)
+    schedule = schedule or {}
+    stage_dependencies = schedule.get("stages", {})
+    step_dependencies = schedule.get("steps", {})
+
+    # --- Events: one node per step, then a start and a finish node per stage ---
+    stages = list(dict.fromkeys(table.stage_order + table.stages))
+    stage_index = {stage: k for k, stage in enumerate(stages)}
+    step_index = {step_id: i for i, step_id in enumerate(table.ids)}
+    n = len(table)
+    size = n + 2 * len(stages)
+    duration = table.duration.tolist() + [0.0] * (2 * len(stages))
+    successors = [[] for _ in range(size)]
+
+    for k, stage in enumerate(stages):
+        start, finish = n + 2 * k, n + 2 * k + 1
+        predecessors = stage_dependencies.get(stage, stages[k - 1:k])  # Default: after the previous stage
+        for predecessor in predecessors:
+            if predecessor in stage_index and predecessor != stage:
+                successors[n + 2 * stage_index[predecessor] + 1].append(start)
+        successors[start].append(finish)
+
+    for i, stage in enumerate(table.stages):
+        start, finish = n + 2 * stage_index[stage], n + 2 * stage_index[stage] + 1
+        successors[start].append(i)
+        successors[i].append(finish)
+        for predecessor in step_dependencies.get(table.ids[i], []):
+            j = step_index.get(predecessor)
+            if j is not None and j != i:
+                successors[j].append(i)
+
+    # --- Forward pass: earliest start of every event, in topological order (Kahn's algorithm) ---
+    remaining = [0] * size  # Number of unscheduled predecessors
+    for v in range(size):
+        for w in successors[v]:
+            remaining[w] += 1
+    order = [v for v in range(size) if remaining[v] == 0]
+    earliest_start = [0.0] * size
+    for v in order:  # `order` grows as events become ready
+        earliest_finish = earliest_start[v] + duration[v]
+        for w in successors[v]:
+            earliest_start[w] = max(earliest_start[w], earliest_finish)
+            remaining[w] -= 1
+            if remaining[w] == 0:
+                order.append(w)
+
+    if len(order) < size:
+        # Every unscheduled event waits for an unscheduled predecessor: walk back through them to find a cycle
+        predecessors = [[] for _ in range(size)]
+        for v in range(size):
+            for w in successors[v]:
+                predecessors[w].append(v)
+        path, v = [], next(v for v in range(size) if remaining[v] > 0)
+        while v not in path:
+            path.append(v)
+            v = next(u for u in predecessors[v] if remaining[u] > 0)
+        cycle = path[path.index(v):][::-1]
+        names = dict.fromkeys(  # Steps are only named where the cycle runs through a step dependency
+            f"step '{table.steps[v] or '(unnamed)'}'" if v < n else f"stage '{stages[(v - n) // 2]}'"
+            for k, v in enumerate(cycle)
+            if v >= n or cycle[k - 1] < n or cycle[(k + 1) % len(cycle)] < n
+        )
+        raise ValueError(f"The dependencies contain a cycle: {' → '.join(names)}")
+
+    # --- Backward pass: latest finish of every event that does not delay the project ---
+    project_duration = max((earliest_start[v] + duration[v] for v in range(size)), default=0.0)
+    latest_finish = [project_duration] * size
+    for v in reversed(order):
+        for w in successors[v]:
+            latest_finish[v] = min(latest_finish[v], latest_finish[w] - duration[w])
+
+    earliest_start = np.array(earliest_start)
+    earliest_finish = earliest_start + np.array(duration)
+    slack = np.maximum(np.array(latest_finish) - earliest_finish, 0)
+    critical = slack <= 1e-9 * max(project_duration, 1)
+
+    stage_finish = np.arange(len(stages)) * 2 + n + 1
+    return {
+        "steps": pd.DataFrame({
+            "id": table.ids,
+            "Stage": table.stages,
+            "Step": table.steps,
+            "Duration (weeks)": table.duration,
+            "Start (week)": earliest_start[:n],
+            "Finish (week)": earliest_finish[:n],
+            "Slack (weeks)": slack[:n],
+            "Critical": critical[:n]
+        }),
+        "stages": pd.DataFrame({
+            "Stage": stages,
+            "Start (week)": earliest_start[stage_finish - 1],
+            "Finish (week)": earliest_finish[stage_finish],
+            "Slack (weeks)": slack[stage_finish],
+            "Critical": critical[stage_finish]
+        }),
+        "duration_weeks": float(project_duration)
+    }
+
+
+def compute_scheduled_durations(project_steps, schedules):
+    """
+    Compute the project duration of every scenario with an enabled schedule.
+
+    Args:
+        project_steps (dict): Project steps keyed by scenario name (`ActivityTable` objects or step dicts).
+        schedules (dict): Schedule keyed by scenario name (see `compute_schedule`). Schedules with
+            ``"enabled": False`` are skipped.
+
+    Returns:
+        dict: Duration in weeks (the critical path) keyed by scenario name, for `compute_roi_table` and
+        `compare_scenarios`.
+    """
+    return {
+        name: compute_schedule(project_steps[name], schedule)["duration_weeks"]
+        for name, schedule in (schedules or {}).items()
+        if name in project_steps and schedule and schedule.get("enabled", True)
+    }
+
+
+# =========================================================
+#  SOCIAL ROI
+# =========================================================
+def compute_roi_table(df_bau, df_tool, rate_index, df_infra, roi_params, durations_weeks=None, cube=None):
+    """
+    Compute time, cost and impact of a single research study for both scenarios.
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+        rate_index (dict): Hourly rate keyed by role, as returned by `build_rate_index`.
+        df_infra (pd.DataFrame): Infrastructure table as returned by `build_infrastructure_table`.
+        roi_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        durations_weeks (dict, optional): Project duration in weeks keyed by "BAU" and/or "Proposed Tool",
+            e.g. the critical path of a schedule (see `compute_scheduled_durations`). Scenarios that are not
+            listed take the sum of the longest step of each stage.
+        cube (pd.DataFrame, optional): Cost cube of both scenarios (see `compute_cost_cube`). Computed from the
+            activities tables if not given.
+
+    Returns:
+        pd.DataFrame: One row per scenario with "Time (months)", "Cost ($)" and "Impact per study ($)".
+    """
+    scenarios = {"BAU": df_bau, "Proposed_Tool": df_tool}
+
+    # --- Retrieve total project durations in weeks ---
+    scheduled_weeks = durations_weeks or {}
+    durations_weeks = {}
+    for scenario, df_scenario in scenarios.items():
+        total_weeks = 0
+        name = scenario.replace("_", " ")  # Scenario name, as in ``st.session_state.project_steps``
+        if name in scheduled_weeks:
+            # Critical path of the scenario's schedule
+            total_weeks = scheduled_weeks[name]
+        elif not df_scenario.empty:
+            # Sum the maximum duration per stage
+            total_weeks = df_scenario.groupby("Stage")["Total Duration (weeks)"].max().sum()
+        durations_weeks[scenario] = total_weeks
+
+    # Convert weeks to months (approx 4.345 weeks/month)
+    durations_months = {k: v / WEEKS_PER_MONTH for k, v in durations_weeks.items()}
+
+    # --- Retrieve total costs (personnel + infrastructure) ---
+    if cube is None:
+        cube = compute_cost_cube({"BAU": df_bau, "Proposed Tool": df_tool}, rate_index)
+    total_costs = {}
+    for scenario in scenarios:
+        # Infrastructure cost
+        infra_cost = get_infrastructure_total(
+            df_infra, "Business as Usual ($)" if scenario == "BAU" else "Proposed Tool ($)"
+        )
+
+        # Personnel cost
+        personnel_cost = slice_cost_cube(cube, scenario.replace("_", " "), "Stage", "Cost ($)").sum()
+
+        total_costs[scenario] = infra_cost + personnel_cost
+
+    # --- Compute Impact per Study ---
+    per_student_improvement = roi_params.get("computed_improvement", 0)
+    discovery_rate = roi_params.get("discovery_rate", 0) / 100
+    total_students = roi_params.get("total_students", 0)
+
+    impact_per_study = {
+        scenario: per_student_improvement * discovery_rate * total_students
+        for scenario in scenarios
+    }
+
+    # --- Build ROI DataFrame ---
+    return pd.DataFrame({
+        "Scenario": ["BAU", "Proposed Tool"],
+        "Time (months)": [round(durations_months["BAU"], 1), round(durations_months["Proposed_Tool"], 1)],
+        "Cost ($)": [round(total_costs["BAU"], 2), round(total_costs["Proposed_Tool"], 2)],
+        "Impact per study ($)": [round(impact_per_study["BAU"], 2), round(impact_per_study["Proposed_Tool"], 2)]
+    })
+
+
+def get_scenario_value(roi_df, scenario, col):
+    """
+    Retrieve a specific value from the ROI dataframe for a given scenario.
+
+    Args:
+        roi_df (pd.DataFrame): ROI table as returned by `compute_roi_table`.
+        scenario (str): The name of the scenario to look up in the "Scenario" column of `roi_df`.
+        col (str): The name of the column from which to retrieve the value.
+
+    Returns:
+        The value from the specified column for the matching scenario.
+        Returns 0 if the scenario or column is not found, or if any error occurs.
+    """
+    try:
+        return roi_df.loc[roi_df["Scenario"] == scenario, col].values[0]
+    except:
+        return 0
+
+
+def compute_projection(
+        scenario_name,
+        time_months,
+        cost_per_study,
+        impact_per_study,
+        fixed_cost,
+        num_orgs,
+        num_concurrent_projects=1,
+        horizon_years=PROJECTION_YEARS,
+        periods_per_year=1,
+        studies_per_org=None
+):
+    """
+    Computes a projection of costs, impact, and ROI for a research scenario (50 years by default).
+
+    All periods are computed at once as NumPy arrays.
+
+    Args:
+    - scenario_name (str): Name of the scenario (e.g., "Business as Usual", "Proposed Tool").
+    - time_months (float): Duration of a single study in months.
+    - cost_per_study (float): Variable cost per study.
+    - impact_per_study (float): Impact (in $) per study.
+    - fixed_cost (float): Fixed 1-time setup cost for the scenario.
+    - num_orgs (int): Number of organizations conducting studies.
+    - num_concurrent_projects (int, default=1): Number of studies each org runs concurrently.
+    - horizon_years (int, default=50): Number of years to project.
+    - periods_per_year (int, default=1): Resolution of the projection (1 = yearly, 12 = monthly).
+    - studies_per_org (array-like, optional): Number of studies each org has completed by the end of each period,
+      e.g. from the resource-constrained simulation of `throughput.simulate_throughput`. By default, studies
+      are assumed never to compete for staff: floor(elapsed months × concurrent projects / time_months).
+
+    Returns:
+    - projection (pd.DataFrame): One row per period with cumulative costs, impact, and ROI. "Year" is the
+      elapsed time in years at the end of each period.
+    """
+    periods = np.arange(1, horizon_years * periods_per_year + 1)
+    total_months = periods * 12 / periods_per_year
+
+    # Compute number of studies each organization can conduct by the end of each period
+    if studies_per_org is not None:
+        studies_each_org = np.asarray(studies_per_org, dtype=np.int64)
+    elif time_months > 0:
+        studies_each_org = np.floor(total_months * num_concurrent_projects / time_months).astype(np.int64)
+    else:
+        studies_each_org = np.zeros(len(periods), dtype=np.int64)  # Avoid division by zero
+
+    # Compute costs
+    variable_cost = cost_per_study * studies_each_org * num_orgs
+    total_cost = variable_cost + fixed_cost
+
+    # Compute total impact
+    impact = impact_per_study * studies_each_org * num_orgs
+
+    # Compute ROI (0 where there is no cost)
+    roi_excl_fc = np.divide(impact, variable_cost, out=np.zeros(len(periods)), where=variable_cost > 0)
+    roi_incl_fc = np.divide(impact, total_cost, out=np.zeros(len(periods)), where=total_cost > 0)
+
+    return pd.DataFrame({
+        "Scenario": scenario_name,
+        "Year": periods if periods_per_year == 1 else periods / periods_per_year,
+        "# of studies per org": studies_each_org,
+        "Fixed Cost ($)": fixed_cost,
+        "Variable Cost ($)": variable_cost,
+        "Total Cost ($)": total_cost,
+        "Impact ($)": impact,
+        "Impact per $ (Variable only)": roi_excl_fc,
+        "Impact per $ (Total cost)": roi_incl_fc
+    })
+
+
+def compute_roi_projection(roi_df, roi_params, fixed_bau, fixed_tool, horizon_years=PROJECTION_YEARS,
+                           periods_per_year=1, studies_per_org=None):
+    """
+    Compute the Social ROI projection for both scenarios (50 years by default).
+
+    Args:
+        roi_df (pd.DataFrame): ROI table as returned by `compute_roi_table`.
+        roi_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        fixed_bau (float): Fixed 1-time setup cost for Business as Usual.
+        fixed_tool (float): Fixed 1-time setup cost for the Proposed Tool.
+        horizon_years (int): Number of years to project.
+        periods_per_year (int): Resolution of the projection (1 = yearly, 12 = monthly).
+        studies_per_org (dict, optional): Completed studies per org by the end of each period, keyed by "BAU"
+            and/or "Proposed Tool" (see `compute_projection`).
+
+    Returns:
+        pd.DataFrame: The projections of both scenarios, stacked.
+    """
+    studies_per_org = studies_per_org or {}
+    num_orgs_bau = roi_params.get("orgs_bau", 0)
+    num_orgs_proposed = roi_params.get("orgs_proposed", 0)
+    num_concurrent_projects = roi_params.get("concurrent_studies", 0)
+
+    # Compute projections for each scenario
+    projection_bau = compute_projection(
+        "BAU",
+        get_scenario_value(roi_df, "BAU", "Time (months)"),
+        get_scenario_value(roi_df, "BAU", "Cost ($)"),
+        get_scenario_value(roi_df, "BAU", "Impact per study ($)"),
+        fixed_bau, num_orgs_bau, num_concurrent_projects, horizon_years, periods_per_year,
+        studies_per_org.get("BAU")
+    )
+    projection_pt = compute_projection(
+        "Proposed Tool",
+        get_scenario_value(roi_df, "Proposed Tool", "Time (months)"),
+        get_scenario_value(roi_df, "Proposed Tool", "Cost ($)"),
+        get_scenario_value(roi_df, "Proposed Tool", "Impact per study ($)"),
+        fixed_tool, num_orgs_proposed, num_concurrent_projects, horizon_years, periods_per_year,
+        studies_per_org.get("Proposed Tool")
+    )
+
+    return pd.concat([projection_bau, projection_pt])
+
+
+# =========================================================
+#  SCENARIO COMPARISON
+# =========================================================
+def get_scenario_base(scenario, bases=None):
+    """
+    Return the scenario ("BAU" or "Proposed Tool") whose infrastructure costs, number of organizations and
+    fixed cost apply to `scenario`.
+
+    Args:
+        scenario (str): Scenario name.
+        bases (dict, optional): Base scenario keyed by scenario name. Scenarios that are not listed are
+            alternatives to Business as Usual and use the Proposed Tool's settings.
+
+    Returns:
+        str: "BAU" or "Proposed Tool".
+    """
+    if scenario in ("BAU", "Proposed Tool"):
+        return scenario
+    return (bases or {}).get(scenario, "Proposed Tool")
+
+
+def _pivot_by_scenario(values, index, names, order=None):
+    """
+    Sum the last column of `values` grouped by ("Scenario", `index`) into one column per scenario, with a
+    "Total" row. Rows follow `order` (missing rows are 0), or are sorted.
+    """
+    table = values.groupby(["Scenario", index])[values.columns[-1]].sum().unstack("Scenario")
+    table = table.reindex(index=order if order is not None else table.index, columns=names).fillna(0.0)
+    table.loc["Total"] = table.sum()
+    return table.rename_axis(index=index, columns=None).reset_index()
+
+
+def compare_scenarios(frames, rate_index, df_infra, roi_params, fixed_costs=None, bases=None,
+                      horizon_years=PROJECTION_YEARS, stages=PROJECT_STAGES, durations_weeks=None, cube=None):
+    """
+    Compute the stage, personnel and Social ROI figures of any number of named scenarios in one pass.
+
+    Person-hours and costs are slices of the cost cube of all scenarios (see `compute_cost_cube`), and the
+    durations a single group-by over the stacked activities tables, so adding scenarios does not add passes
+    over the data.
+
+    Args:
+        frames (dict): Activities table (as returned by `ActivityTable.to_frame`) keyed by scenario name,
+            in display order. Scenarios are compared against "BAU".
+        rate_index (dict): Hourly rate keyed by role, as returned by `build_rate_index`.
+        df_infra (pd.DataFrame): Infrastructure table as returned by `build_infrastructure_table`.
+        roi_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        fixed_costs (dict, optional): Fixed costs keyed by "BAU" and "Proposed Tool". Defaults to $0 for BAU
+            and the total investment for the Proposed Tool, as on the Social ROI page.
+        bases (dict, optional): Base scenario of each additional scenario (see `get_scenario_base`).
+        horizon_years (int): Projection year at which "Impact per $" is evaluated.
+        stages (list of str): Project stages, in display order.
+        durations_weeks (dict, optional): Project duration in weeks of the scenarios with a schedule (see
+            `compute_roi_table`).
+        cube (pd.DataFrame, optional): Cost cube of all scenarios (see `compute_cost_cube`). Computed from
+            `frames` if not given.
+
+    Returns:
+        dict: Tables keyed by name:
+            - "stage_time", "stage_duration", "stage_cost": One row per stage (plus "Infrastructure" for
+              cost) and a "Total" row, with one column per scenario (hours, weeks and $ respectively).
+            - "personnel_time", "personnel_cost": One row per role and a "Total" row, one column per scenario.
+            - "ranking": One row per scenario with its totals, time and cost of a single study, "Impact per $"
+              at `horizon_years` and its rank (1 = highest impact per $).
+    """
+    names = list(frames)
+    if fixed_costs is None:
+        fixed_costs = {"BAU": 0, "Proposed Tool": roi_params.get("total_investment", 0)}
+    base = {name: get_scenario_base(name, bases) for name in names}
+
+    # --- Price every row once, and stack all scenarios for the durations ---
+    if cube is None:
+        cube = compute_cost_cube(frames, rate_index)
+    cells = cube.reset_index()
+    combined = pd.concat(
+        [frames[name] if not frames[name].empty else pd.DataFrame(columns=ACTIVITY_COLUMNS) for name in names],
+        keys=names, names=["Scenario", None]
+    ).reset_index(level="Scenario")
+    combined["Total Duration (weeks)"] = combined["Total Duration (weeks)"].astype(float)
+
+    # --- Project-stage tables ---
+    stage_time = _pivot_by_scenario(cells[["Scenario", "Stage", "Person-Hours"]], "Stage", names, stages)
+    step_duration = combined.groupby(["Scenario", "Stage", "Step"])["Total Duration (weeks)"].max()
+    stage_duration = _pivot_by_scenario(step_duration.reset_index(), "Stage", names, stages)
+    stage_cost = _pivot_by_scenario(cells[["Scenario", "Stage", "Cost ($)"]], "Stage", names, stages)
+
+    infra = np.array([
+        get_infrastructure_total(df_infra, "Business as Usual ($)" if base[name] == "BAU" else "Proposed Tool ($)")
+        if df_infra is not None else 0
+        for name in names
+    ], dtype=float)
+    if df_infra is not None and not df_infra.empty:
+        stage_cost = pd.concat([
+            stage_cost.iloc[:-1],
+            pd.DataFrame([["Infrastructure", *infra]], columns=stage_cost.columns),
+            pd.DataFrame([["Total", *(stage_cost.iloc[-1, 1:].to_numpy(dtype=float) + infra)]],
+                         columns=stage_cost.columns)
+        ], ignore_index=True)
+
+    # --- Personnel tables ---
+    personnel_time = _pivot_by_scenario(cells[["Scenario", "Role", "Person-Hours"]], "Role", names)
+    personnel_cost = _pivot_by_scenario(cells[["Scenario", "Role", "Cost ($)"]], "Role", names)
+
+    # --- Ranking: time, cost and impact per $ of a single study, as on the Social ROI page ---
+    stage_max = combined.groupby(["Scenario", "Stage"])["Total Duration (weeks)"].max()
+    weeks = stage_max.groupby("Scenario").sum().reindex(names, fill_value=0)
+    weeks.update(pd.Series(durations_weeks or {}, dtype=float))  # Critical path of scheduled scenarios
+    time_months = np.round(weeks.to_numpy(dtype=float) / WEEKS_PER_MONTH, 1)
+    activity_cost = cells.groupby("Scenario")["Cost ($)"].sum().reindex(names, fill_value=0).to_numpy(dtype=float)
+    cost_per_study = np.round(infra + activity_cost, 2)
+    impact_per_study = round(
+        roi_params.get("computed_improvement", 0) * (roi_params.get("discovery_rate", 0) / 100)
+        * roi_params.get("total_students", 0), 2
+    )
+    num_orgs = np.array([roi_params.get("orgs_bau" if base[name] == "BAU" else "orgs_proposed", 0)
+                         for name in names], dtype=float)
+    fixed_cost = np.array([fixed_costs.get(base[name], 0) for name in names], dtype=float)
+
+    # Same formulas as `compute_projection`, evaluated at the horizon for all scenarios at once
+    total_months = horizon_years * 12.0
+    studies_each_org = np.floor(np.divide(
+        total_months * roi_params.get("concurrent_studies", 0), time_months,
+        out=np.zeros(len(names)), where=time_months > 0
+    ))
+    total_cost = cost_per_study * studies_each_org * num_orgs + fixed_cost
+    impact = impact_per_study * studies_each_org * num_orgs
+
+    ranking = pd.DataFrame({
+        "Scenario": names,
+        "Based on": [base[name] for name in names],
+        "Duration (weeks)": stage_duration.iloc[-1, 1:].to_numpy(dtype=float),
+        "Person-Hours": stage_time.iloc[-1, 1:].to_numpy(dtype=float),
+        "Time (months)": time_months,
+        "Cost ($)": cost_per_study,
+        "Cost Saved vs BAU ($)": (cost_per_study[names.index("BAU")] - cost_per_study
+                                  if "BAU" in names else np.nan),
+        f"Impact per $ in Year {horizon_years} (Total cost)": np.divide(
+            impact, total_cost, out=np.zeros(len(names)), where=total_cost > 0
+        )
+    })
+    ranking["Rank"] = ranking.iloc[:, -1].rank(ascending=False, method="min").astype(int)
+
+    return {
+        "stage_time": stage_time,
+        "stage_duration": stage_duration,
+        "stage_cost": stage_cost,
+        "personnel_time": personnel_time,
+        "personnel_cost": personnel_cost,
+        "ranking": ranking
+    }
+
+
+# =========================================================
+#  HEADLESS EVALUATION
+# =========================================================
+def evaluate(personnel_rows, project_steps, infrastructure_costs, roi_parameters, fixed_costs=None,
+             scenario_bases=None, schedules=None):
+    """
+    Compute every output table of the calculator from raw inputs, without Streamlit.
+
+    Args:
+        personnel_rows (list of dict): As stored in ``st.session_state.personnel_rows``.
+        project_steps (dict): As stored in ``st.session_state.project_steps`` (keys "BAU", "Proposed Tool" and
+            any additional scenarios), either as `ActivityTable` objects or as nested step dicts.
+        infrastructure_costs (list of dict): As stored in ``st.session_state.infrastructure_costs``.
+        roi_parameters (dict): As stored in ``st.session_state.roi_parameters``.
+        fixed_costs (dict, optional): Fixed costs keyed by "BAU" and "Proposed Tool". Defaults to $0 for BAU
+            and the total investment for the Proposed Tool, as on the Social ROI page.
+        scenario_bases (dict, optional): Base scenario of each additional scenario (see `get_scenario_base`).
+        schedules (dict, optional): Schedule keyed by scenario name (see `compute_schedule`). The Social ROI
+            time of a scenario with a schedule is the critical path of its schedule.
+
+    Returns:
+        dict: Output tables keyed by name. "scenario_ranking" ranks all scenarios (see `compare_scenarios`).
+    """
+    tables = {
+        name: as_activity_table(project_steps.get(name))
+        for name in dict.fromkeys(["BAU", "Proposed Tool", *project_steps])
+    }
+    frames = {name: table.to_frame() for name, table in tables.items()}
+    durations_weeks = compute_scheduled_durations(tables, schedules)
+    df_bau, df_tool = frames["BAU"], frames["Proposed Tool"]
+    df_infra = build_infrastructure_table(infrastructure_costs) if infrastructure_costs else pd.DataFrame()
+    rate_index = build_rate_index(personnel_rows)
+
+    if fixed_costs is None:
+        fixed_costs = {"BAU": 0, "Proposed Tool": roi_parameters.get("total_investment", 0)}
+
+    # All person-hours and costs are slices of one cost cube of every scenario
+    cube = compute_cost_cube(frames, rate_index)
+    personnel_time_summary, personnel_cost_summary = compute_personnel_summaries(df_bau, df_tool, rate_index, cube)
+    roi_df = compute_roi_table(df_bau, df_tool, rate_index, df_infra, roi_parameters, durations_weeks, cube)
+
+    return {
+        "stage_time_summary": compute_stage_time_summary(df_bau, df_tool, cube=cube),
+        "stage_duration_summary": compute_stage_duration_summary(df_bau, df_tool),
+        "stage_cost_summary": compute_stage_cost_summary(df_bau, df_tool, rate_index, df_infra, cube=cube),
+        "personnel_time_summary": personnel_time_summary,
+        "personnel_cost_summary": personnel_cost_summary,
+        "roi_df": roi_df,
+        "roi_projection": compute_roi_projection(
+            roi_df, roi_parameters, fixed_costs["BAU"], fixed_costs["Proposed Tool"]
+        ),
+        "scenario_ranking": compare_scenarios(
+            frames, rate_index, df_infra, roi_parameters, fixed_costs, scenario_bases,
+            durations_weeks=durations_weeks, cube=cube
+        )["ranking"]
+    }
@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark of the app.
+
+A new server process (e.g. a freshly scaled-up container) pays for importing Streamlit and the app's modules
+and for the first run of the app script before it can answer its first session; later sessions reuse the
+imported modules. This script measures that cost in fresh Python processes, for the first page a session
+shows:
+
+- "Import Streamlit (ms)": importing and starting Streamlit (the same for every page),
+- "First run (ms)": the first run of ``streamlit_app.py`` on that page, including the app's own imports,
+- "Process (ms)": the whole process, including interpreter start-up,
+
+and lists the heavy modules that the first run loaded (the charting stack is only imported by pages with
+charts). Every run is appended to a results CSV, as with ``benchmarks.py``.
+
+Usage::
+
+    python coldstart.py [--results coldstart_results.csv] [--repeat N] [--pages PAGE [PAGE ...]]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# --- App script, and the pages measured by default (the landing page and the page with the most charts) ---
+APP_PATH = Path(__file__).with_name("streamlit_app.py")
+DEFAULT_PAGES = ["Getting Started", "Social ROI"]
+
+# --- Modules reported when a first run loads them ---
+HEAVY_MODULES = ["plotly.express", "plotly.graph_objects", "scipy", "matplotlib", "PIL.Image"]
+
+# --- Code run in a fresh process: import Streamlit, then run the app once on one page ---
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_string("import streamlit as st").run()  # One-time set-up of the test runner, not of the app
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.session_state["current_page"] = sys.argv[2]
+app.run()
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "run_ms": (finished - imported) * 1000,
+    "loaded": [name for name in json.loads(sys.argv[3]) if name in sys.modules],
+    "error": str(app.exception[0].message) if app.exception else None
+}))
+"""
+
+
+def measure_cold_start(page, app_path=APP_PATH):
+    """
+    Start a fresh Python process that runs the app once on `page`.
+
+    Args:
+        page (str): Page shown by the first run.
+        app_path (str or Path): App script.
+
+    Returns:
+        dict: "Import Streamlit (ms)", "First run (ms)" and "Process (ms)", and the "Loaded" heavy modules.
+
+    Raises:
+        RuntimeError: If the process fails or the app raises an exception.
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-c", _CHILD, str(app_path), page, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=Path(app_path).parent
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if process.returncode != 0:
+        raise RuntimeError(f"Cold start of {page!r} failed:\n{process.stderr}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    if result["error"]:
+        raise RuntimeError(f"The app raised an exception on {page!r}: {result['error']}")
+    return {
+        "Import Streamlit (ms)": result["import_ms"],
+        "First run (ms)": result["run_ms"],
+        "Process (ms)": elapsed_ms,
+        "Loaded": " ".join(result["loaded"])
+    }
+
+
+def run_cold_starts(pages=DEFAULT_PAGES, repeat=5, progress=None):
+    """
+    Measure `repeat` cold starts of every page.
+
+    Args:
+        pages (list of str): Pages shown by the first run.
+        repeat (int): Number of fresh processes per page.
+        progress (callable, optional): Called with each result row as it is measured.
+
+    Returns:
+        pd.DataFrame: One row per page with the median of each timing over the processes, the best
+        "First run (ms)" and the heavy modules loaded.
+    """
+    rows = []
+    for page in pages:
+        runs = pd.DataFrame([measure_cold_start(page) for _ in range(repeat)])
+        row = {
+            "Page": page,
+            "Processes": repeat,
+            **{column: float(np.median(runs[column]))
+               for column in ["Import Streamlit (ms)", "First run (ms)", "Process (ms)"]},
+            "Best first run (ms)": runs["First run (ms)"].min(),
+            "Loaded": runs["Loaded"].iloc[-1]
+        }
+        rows.append(row)
+        if progress:
+            progress(row)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cold start of the app in fresh processes.")
+    parser.add_argument("--results", default="coldstart_results.csv",
+                        help="CSV file the results are appended to (default: coldstart_results.csv)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per page (default: 5)")
+    parser.add_argument("--pages", nargs="+", default=DEFAULT_PAGES, help="Pages shown by the first run")
+    args = parser.parse_args(argv)
+
+    def progress(row):
+        print(f"{row['Page']:<32} import={row['Import Streamlit (ms)']:7.0f} ms  "
+              f"first run={row['First run (ms)']:7.0f} ms  process={row['Process (ms)']:7.0f} ms  "
+              f"loaded: {row['Loaded'] or '-'}")
+
+    results = run_cold_starts(args.pages, args.repeat, progress=progress)
+    results.insert(0, "Run", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    results.insert(1, "Python", platform.python_version())
+
+    path = Path(args.results)
+    results.to_csv(path, mode="a", header=not path.exists(), index=False)
+    print(f"✅ Measured {len(results) * args.repeat} cold start(s); results appended to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
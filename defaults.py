@@ -0,0 +1,84 @@
+"""
+Default inputs shared by all sessions.
+
+Every new session starts from the same example personnel, infrastructure cost categories, assumptions and
+prefilled project steps. They are built once per process as read-only templates, and each session receives
+its own rows when it first needs them (`new_rows`). The prefilled activity tables of all sessions share
+their arrays with one template table until they are first edited (copy-on-write, see
+`calculator.ActivityTable.share`). Like `calculator`, this module does not depend on Streamlit.
+"""
+import uuid
+from functools import lru_cache
+from types import MappingProxyType
+
+from calculator import DEFAULT_STEPS, PROJECT_STAGES, ActivityTable
+
+# --- Personnel of a new session (before the Personnel Costs page is opened) ---
+PERSONNEL_TEMPLATE = tuple(MappingProxyType(row) for row in [
+    {"Role": "Engineer", "Hourly Rate": 0.0, "Notes": ""},
+    {"Role": "Researcher", "Hourly Rate": 0.0, "Notes": ""},
+    {"Role": "Project Manager", "Hourly Rate": 0.0, "Notes": ""}
+])
+
+# --- Example personnel filled in when the Personnel Costs page has no rows ---
+EXAMPLE_PERSONNEL_TEMPLATE = tuple(MappingProxyType(row) for row in [
+    {"Role": "Engineer", "Hourly Rate": 65.0, "Notes": "e.g. Software or Data Engineer"},
+    {"Role": "Researcher", "Hourly Rate": 25.0, "Notes": "e.g. PhD student"},
+    {"Role": "Project Manager", "Hourly Rate": 48.0, "Notes": "e.g. Partnerships or research manager"}
+])
+
+# --- Prefilled infrastructure cost categories (no costs) ---
+INFRASTRUCTURE_TEMPLATE = tuple(MappingProxyType(row) for row in [
+    {"Cost Category": "Integration Costs", "Business as Usual ($)": 0.0, "Proposed Tool ($)": 0.0,
+     "Notes": "e.g. Proposed tool requires API integration with the organization's codebase."},
+    {"Cost Category": "Software Licenses", "Business as Usual ($)": 0.0, "Proposed Tool ($)": 0.0,
+     "Notes": "e.g. Researchers require Stata for analysis."},
+    {"Cost Category": "Compute Resources", "Business as Usual ($)": 0.0, "Proposed Tool ($)": 0.0,
+     "Notes": "e.g. Researchers require GPUs for big data analysis."},
+    {"Cost Category": "Storage", "Business as Usual ($)": 0.0, "Proposed Tool ($)": 0.0,
+     "Notes": "e.g. Researchers require cloud storage for data access."}
+])
+
+# --- Example assumption ---
+ASSUMPTIONS_TEMPLATE = (
+    MappingProxyType({"Assumption": "e.g., A/B testing on the platform runs for 4 weeks."}),
+)
+
+
+def new_rows(template):
+    """
+    Copy template rows into new rows of a session.
+
+    Args:
+        template (tuple of Mapping): One of the ``*_TEMPLATE`` constants.
+
+    Returns:
+        list of dict: Editable rows, each with a new "id".
+    """
+    return [{"id": str(uuid.uuid4()), **row} for row in template]
+
+
+@lru_cache(maxsize=32)
+def _activity_template(roles, stages):
+    """Activity table with the default steps of every stage, built once per set of roles and stages."""
+    table = ActivityTable(roles, stages)
+    for stage in stages:
+        table.initialized_stages.add(stage)
+        for step, notes in DEFAULT_STEPS.get(stage, [("", "")]):
+            table.append(stage, step, notes)
+    return table
+
+
+def new_activity_table(roles, stages=PROJECT_STAGES):
+    """
+    Activity table prefilled with the default steps of every stage (one empty step for stages without
+    defaults).
+
+    Args:
+        roles (list of str): Role columns.
+        stages (list of str): Project stages, in display order.
+
+    Returns:
+        ActivityTable: A copy-on-write copy of the default table for these roles and stages.
+    """
+    return _activity_template(tuple(roles), tuple(stages)).share()
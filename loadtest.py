@@ -0,0 +1,392 @@
+"""
+Concurrent-user load test of the app.
+
+In a workshop, many participants use the app at the same time: every interaction reruns the app script for that
+participant's session, and all sessions share one server process (its CPU and memory). This script launches the
+app locally with ``streamlit run`` and connects scripted sessions to it as browsers do (one websocket per session,
+speaking Streamlit's protocol); all sessions start together. Every session walks through all pages with the Next
+button and, on the way, adds and names a role on the Personnel Costs page, enters an infrastructure cost, changes
+a Social ROI parameter, and adds a step (with its duration and the active time of the new role) to every stage of
+both Project Activities pages. On the last page, it turns on **Show session memory** to read the size of its
+session state.
+
+For each number of concurrent sessions, a fresh server is launched and the script reports:
+
+- "p50 (ms)" / "p95 (ms)": rerun latency, i.e. the time from an interaction to the end of its rerun(s), per page
+  and over all pages,
+- "CPU per rerun (ms)": CPU time of the server divided by the number of reruns,
+- "RSS per session (MB)": growth of the server's memory (resident set size) divided by the number of sessions,
+- "State per session (MB)": session state reported by the app (see `memory.session_memory`).
+
+The server's CPU and memory are read from ``/proc`` and are only reported on Linux. The time the browser takes to
+draw the page is not included. Every run is appended to a results CSV, as with ``benchmarks.py``.
+
+Usage::
+
+    python loadtest.py [--sessions N [N ...]] [--think-time SECONDS] [--results loadtest_results.csv]
+"""
+import argparse
+import ast
+import asyncio
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+from calculator import PROJECT_STAGES
+
+# --- App script, and the numbers of concurrent sessions measured by default ---
+APP_PATH = Path(__file__).with_name("streamlit_app.py")
+DEFAULT_SESSIONS = [1, 5, 10, 20]
+
+# --- Inputs entered by every scripted session ---
+NEW_ROLE = ("Analyst", 40.0)  # Role and hourly rate added on the Personnel Costs page
+INFRASTRUCTURE_COST = 1000.0  # BAU cost of the first infrastructure cost category
+DISCOVERY_RATE = 15.0  # Rate of discovery of impact (%)
+STEP_DURATION = 2.0  # Duration in weeks of the steps added on the Project Activities pages
+STEP_ACTIVE_TIME = 25.0  # % active time of the new role in those steps
+
+# --- Seconds to wait for the server to start, and for one interaction ---
+SERVER_TIMEOUT = 60
+RERUN_TIMEOUT = 600
+
+
+# =========================================================
+#  SERVER
+# =========================================================
+def app_pages(app_path=APP_PATH):
+    """Pages of the app (its ``PAGES`` list), in the order of the Next button."""
+    for node in ast.parse(Path(app_path).read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "PAGES" for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"{app_path} does not define PAGES")
+
+
+def start_server(app_path=APP_PATH):
+    """
+    Launch the app with ``streamlit run`` on a free local port and wait until it is ready.
+
+    Args:
+        app_path (str or Path): App script.
+
+    Returns:
+        tuple: (subprocess.Popen of the server, port).
+
+    Raises:
+        RuntimeError: If the server exits or does not start within ``SERVER_TIMEOUT`` seconds.
+    """
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        port = s.getsockname()[1]
+    log = tempfile.TemporaryFile("w+")  # Not a pipe: the server would block once the pipe is full
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(app_path), "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        stdout=log, stderr=subprocess.STDOUT, text=True, cwd=Path(app_path).parent
+    )
+    deadline = time.monotonic() + SERVER_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"The server exited on start-up:\n{log.read()}")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return server, port
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"The server did not start within {SERVER_TIMEOUT} s")
+
+
+def server_usage(pid):
+    """
+    Memory and CPU time of the server process `pid`.
+
+    Returns:
+        tuple: (resident set size in MB, CPU time in seconds), NaN where ``/proc`` is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            rss_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()  # Fields after the process name
+        return rss_mb, (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return np.nan, np.nan
+
+
+# =========================================================
+#  SCRIPTED SESSIONS
+# =========================================================
+class Session:
+    """
+    One browser session of the app, connected to the server's websocket.
+
+    Widgets are found by their key (or by their label, for widgets without a key) among the widgets shown by the
+    last rerun. As the browser does, every rerun sends the values of all widgets changed so far.
+
+    Args:
+        port (int): Port of the server.
+    """
+
+    def __init__(self, port):
+        self.url = f"ws://localhost:{port}/_stcore/stream"
+        self.websocket = None
+        self.widgets = {}  # Widget key (or label) → element, shown by the last rerun
+        self.markdown = []  # Markdown shown by the last rerun
+        self.values = {}  # Widget id → WidgetState of the widgets changed so far
+
+    async def connect(self):
+        self.websocket = await connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        await self.websocket.close()
+
+    def set_value(self, key, value):
+        """Change the value of the widget `key`; the change is sent with the next rerun."""
+        widget = self.widgets[key]
+        state = WidgetState(id=widget.id)
+        if isinstance(widget, NumberInput) and widget.data_type == NumberInput.FLOAT:
+            state.double_value = value
+        elif isinstance(widget, NumberInput):
+            state.int_value = value
+        elif isinstance(value, bool):
+            state.bool_value = value
+        else:
+            state.string_value = value
+        self.values[widget.id] = state
+
+    def new_key(self, prefix, known):
+        """Key of a widget shown by the last rerun that starts with `prefix` and is not in `known`."""
+        return next(key for key in self.widgets if key.startswith(prefix) and key not in known)
+
+    async def rerun(self, click=None):
+        """
+        Rerun the app with the widget values (and a click of the button `click`, if given), and wait until the
+        rerun and the reruns it requests (``st.rerun``) are finished.
+
+        Raises:
+            RuntimeError: If the app raises an exception.
+        """
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        widget_states = message.rerun_script.widget_states.widgets
+        widget_states.extend(self.values.values())
+        if click is not None:
+            widget_states.add(id=self.widgets[click].id, trigger_value=True)
+        await self.websocket.send(message.SerializeToString())
+
+        while True:
+            received = ForwardMsg()
+            received.ParseFromString(await asyncio.wait_for(self.websocket.recv(), RERUN_TIMEOUT))
+            kind = received.WhichOneof("type")
+            if kind == "new_session":  # Start of a run
+                self.widgets, self.markdown = {}, []
+            elif kind == "delta" and received.delta.WhichOneof("type") == "new_element":
+                self._show(received.delta.new_element)
+            elif kind == "script_finished" and received.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    def _show(self, element):
+        """Record an element shown by the current run."""
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise RuntimeError(f"The app raised an exception: {element.exception.message}")
+        if kind == "markdown":
+            self.markdown.append(element.markdown.body)
+        elif getattr(getattr(element, kind), "id", ""):
+            widget = getattr(element, kind)
+            key = widget.id.split("-", 2)[-1]  # Widget ids are "$$ID-<hash>-<key>" ("None" without a key)
+            self.widgets[getattr(widget, "label", "") if key == "None" else key] = widget
+
+
+async def run_session(session, pages, record, think_time=0.0, rng=None):
+    """
+    Walk a session through all pages, entering the inputs described at the top of this module on the way.
+
+    Args:
+        session (Session): Connected session.
+        pages (list of str): Pages of the app, in the order of the Next button.
+        record (callable): Called with (page, interaction, latency in ms) after every interaction.
+        think_time (float): Maximum random pause before every interaction, in seconds.
+        rng (random.Random, optional): Random generator of the pauses.
+
+    Returns:
+        float: Session state in MB, as reported by the app on the last page (NaN if not shown).
+    """
+    rng = rng or random.Random()
+    page = pages[0]
+
+    async def interact(name, click=None):
+        await asyncio.sleep(rng.uniform(0, think_time))
+        start = time.perf_counter()
+        await session.rerun(click)
+        record(page, name, (time.perf_counter() - start) * 1000)
+
+    await interact("open")
+    for page in pages[1:]:
+        await interact("next", click="next")
+
+        if page == "Personnel Costs":
+            known = set(session.widgets)
+            await interact("add role", click="➕ Add Row")
+            session.set_value(session.new_key("role_", known), NEW_ROLE[0])
+            await interact("edit role")
+            session.set_value(session.new_key("rate_", known), NEW_ROLE[1])
+            await interact("edit rate")
+
+        elif page == "Infrastructure Costs":
+            session.set_value(session.new_key("bau_", ()), INFRASTRUCTURE_COST)
+            await interact("edit cost")
+
+        elif page == "Social ROI Parameters":
+            session.set_value("roi_discovery_rate", DISCOVERY_RATE)
+            await interact("edit parameter")
+
+        elif page in ("Business as Usual", "Proposed Tool"):
+            section = "BAU" if page == "Business as Usual" else page
+            for stage in PROJECT_STAGES:
+                known = set(session.widgets)
+                await interact("add step", click=f"add_{section}_{stage}")
+                step_id = session.new_key(f"{section}_{stage}_dur_", known).rsplit("_", 1)[-1]
+                session.set_value(f"{section}_{stage}_dur_{step_id}", STEP_DURATION)
+                await interact("edit duration")
+                session.set_value(f"{section}_{stage}_{NEW_ROLE[0]}_{step_id}", STEP_ACTIVE_TIME)
+                await interact("edit active time")
+
+    session.set_value("show_session_memory", True)
+    await interact("show session memory")
+    for body in session.markdown:
+        match = re.search(r"Session Memory \(([\d,.]+) MB", body)
+        if match:
+            return float(match.group(1).replace(",", ""))
+    return np.nan
+
+
+def measure_load(sessions, think_time=0.0, app_path=APP_PATH, seed=0):
+    """
+    Launch a fresh server and drive `sessions` concurrent scripted sessions through the app.
+
+    The server is warmed up by one session (imports and first run) before the measurement, and the measured
+    sessions stay connected until the server's memory is read.
+
+    Args:
+        sessions (int): Number of concurrent sessions.
+        think_time (float): Maximum random pause before every interaction of a session, in seconds.
+        app_path (str or Path): App script.
+        seed (int): Seed of the pauses.
+
+    Returns:
+        pd.DataFrame: One row for "All pages" and one row per page, with the number of "Reruns", the "p50 (ms)",
+        "p95 (ms)" and "Max (ms)" rerun latency, and the measurements of the server ("CPU per rerun (ms)",
+        "RSS per session (MB)", "State per session (MB)", "Reruns per second").
+
+    Raises:
+        RuntimeError: If the server fails, or the app raises an exception in a session.
+    """
+    pages = app_pages(app_path)
+    server, port = start_server(app_path)
+    reruns = []
+    try:
+        warm_up = Session(port)
+
+        async def warm():
+            await warm_up.connect()
+            await warm_up.rerun()
+            await warm_up.close()
+
+        asyncio.run(warm())
+        rss_before, cpu_before = server_usage(server.pid)
+        wall_start = time.perf_counter()
+
+        async def drive():
+            clients = [Session(port) for _ in range(sessions)]
+            await asyncio.gather(*(client.connect() for client in clients))
+            try:
+                states = await asyncio.gather(*(
+                    run_session(client, pages, lambda *rerun: reruns.append(rerun), think_time,
+                                random.Random(seed + i))
+                    for i, client in enumerate(clients)
+                ))
+                return states, server_usage(server.pid)
+            finally:
+                await asyncio.gather(*(client.close() for client in clients))
+
+        state_mb, (rss_after, cpu_after) = asyncio.run(drive())
+        wall_s = time.perf_counter() - wall_start
+    finally:
+        server.terminate()
+        server.wait()
+
+    reruns = pd.DataFrame(reruns, columns=["Page", "Interaction", "Latency (ms)"])
+    rows = []
+    for page, group in [("All pages", reruns), *((page, reruns[reruns["Page"] == page]) for page in pages)]:
+        latency = group["Latency (ms)"].to_numpy()
+        rows.append({
+            "Page": page,
+            "Reruns": len(latency),
+            "p50 (ms)": float(np.percentile(latency, 50)),
+            "p95 (ms)": float(np.percentile(latency, 95)),
+            "Max (ms)": float(latency.max())
+        })
+    summary = pd.DataFrame(rows)
+    summary.insert(0, "Sessions", sessions)
+    summary["CPU per rerun (ms)"] = (cpu_after - cpu_before) * 1000 / len(reruns)
+    summary["RSS per session (MB)"] = (rss_after - rss_before) / sessions
+    summary["State per session (MB)"] = float(np.nanmean(state_mb))
+    summary["Reruns per second"] = len(reruns) / wall_s
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent scripted sessions through the app.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS,
+                        help="Numbers of concurrent sessions, each measured on a fresh server "
+                             f"(default: {' '.join(map(str, DEFAULT_SESSIONS))})")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Maximum random pause before every interaction, in seconds (default: 0)")
+    parser.add_argument("--results", default="loadtest_results.csv",
+                        help="CSV file the results are appended to (default: loadtest_results.csv)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for sessions in args.sessions:
+        summary = measure_load(sessions, args.think_time)
+        overall = summary.iloc[0]
+        print(f"{sessions:>4} session(s)  p50={overall['p50 (ms)']:7.0f} ms  p95={overall['p95 (ms)']:7.0f} ms  "
+              f"CPU/rerun={overall['CPU per rerun (ms)']:5.0f} ms  RSS/session={overall['RSS per session (MB)']:5.1f} MB  "
+              f"state/session={overall['State per session (MB)']:5.2f} MB  {overall['Reruns per second']:5.1f} reruns/s")
+        for _, row in summary.iloc[1:].iterrows():
+            print(f"      {row['Page']:<32} p50={row['p50 (ms)']:7.0f} ms  p95={row['p95 (ms)']:7.0f} ms")
+        results.append(summary)
+
+    results = pd.concat(results, ignore_index=True)
+    results.insert(0, "Run", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    results.insert(1, "Python", platform.python_version())
+    results.insert(2, "CPUs", os.cpu_count())
+    results.insert(3, "Think time (s)", args.think_time)
+
+    path = Path(args.results)
+    results.to_csv(path, mode="a", header=not path.exists(), index=False)
+    print(f"✅ Measured {len(args.sessions)} load level(s); results appended to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
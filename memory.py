@@ -0,0 +1,283 @@
+"""
+Memory accounting of a session, and spilling of its large tables to disk.
+
+Streamlit keeps the whole session state of every open session in the memory of the server process: the input
+tables, the derived tables stored for the output pages and the cached outputs. `session_memory` estimates how
+much memory each session state entry uses. When a session exceeds its memory budget, `spill_tables` moves its
+largest stored tables to memory-mapped files on local disk and leaves a small `SpilledTable` handle in their
+place; pages read stored tables with `load_table`, which maps them back only when they are needed.
+
+Like `calculator`, this module does not depend on Streamlit.
+"""
+import atexit
+import shutil
+import sys
+import tempfile
+import uuid
+import weakref
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from output_cache import fingerprint
+
+# --- Memory budget of a session, and the smallest table worth spilling to disk ---
+SESSION_MEMORY_BUDGET_MB = 64
+MIN_SPILL_MB = 1
+
+# --- Session state entry holding the handles of the spilled tables, keyed by their session state key ---
+SPILLED_TABLES_KEY = "spilled_tables"
+
+_MB = 1024 * 1024
+_spill_directory = None
+
+
+def spill_directory():
+    """Directory of the spilled tables of this process (created on first use, removed at exit)."""
+    global _spill_directory
+    if _spill_directory is None:
+        _spill_directory = Path(tempfile.mkdtemp(prefix="efficiency-calculator-"))
+    return _spill_directory
+
+
+@atexit.register
+def _remove_spill_directory():
+    if _spill_directory is not None:
+        shutil.rmtree(_spill_directory, ignore_errors=True)
+
+
+def _remove_files(paths):
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+class SpilledTable:
+    """
+    A DataFrame stored in memory-mapped files on local disk.
+
+    Numeric columns are saved as they are. Other columns (e.g. stage, step and role names) are stored as integer
+    codes and their distinct values: text is saved as fixed-width strings, which are memory-mapped as well, and the
+    distinct values of other columns stay in memory. ``attrs`` (e.g. the revision of an activities table) stay in
+    memory too, so outputs cached for the table remain valid. The files are removed when the handle is no longer
+    referenced.
+
+    Args:
+        df (pd.DataFrame): Table to spill.
+        directory (str or Path, optional): Directory of the files. Defaults to `spill_directory`.
+    """
+
+    def __init__(self, df, directory=None):
+        directory = Path(directory or spill_directory())
+        name = uuid.uuid4().hex
+        self.columns = df.columns
+        self.index = df.index if isinstance(df.index, pd.RangeIndex) else df.index.copy()
+        self.attrs = dict(df.attrs)
+        self.fingerprint = fingerprint(df)
+        self._columns = []  # (path, dtype, distinct values) of every column; no distinct values if numeric
+        for i in range(df.shape[1]):
+            column = df.iloc[:, i]
+            path = directory / f"{name}-{i}.npy"
+            if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+                np.save(path, column.to_numpy())
+                self._columns.append((path, column.dtype, None))
+                continue
+            codes, uniques = pd.factorize(column)  # Missing values get the code -1
+            np.save(path, codes.astype(np.int32 if len(uniques) < 2 ** 31 else np.int64))
+            uniques = np.asarray(uniques, dtype=object)
+            if all(isinstance(value, str) for value in uniques):
+                # Text columns: the distinct values are memory-mapped too, as fixed-width strings
+                uniques_path = directory / f"{name}-{i}-values.npy"
+                np.save(uniques_path, uniques.astype(str) if len(uniques) else np.zeros(0, dtype="U1"))
+                uniques = uniques_path
+            self._columns.append((path, column.dtype, uniques))
+        self._finalizer = weakref.finalize(self, _remove_files, self._paths())
+
+    def _paths(self):
+        """Files of the spilled table."""
+        paths = []
+        for path, _, uniques in self._columns:
+            paths += [path, uniques] if isinstance(uniques, Path) else [path]
+        return paths
+
+    def __len__(self):
+        return len(self.index)
+
+    def matches(self, df):
+        """Whether `df` has the same content as the spilled table (compared by revision or content hash)."""
+        return fingerprint(df) == self.fingerprint
+
+    def load(self):
+        """
+        Map the table back from disk.
+
+        Returns:
+            pd.DataFrame: The spilled table. Numeric columns are read-only views of the files, read from disk
+            as they are used.
+        """
+        data = {}
+        for i, (path, dtype, uniques) in enumerate(self._columns):
+            values = np.load(path, mmap_mode="r")
+            if uniques is not None:
+                uniques = np.load(uniques, mmap_mode="r") if isinstance(uniques, Path) else uniques
+                codes = values
+                values = np.full(len(codes), np.nan, dtype=object)
+                present = codes >= 0
+                values[present] = uniques[codes[present]]
+                values = pd.Series(values, dtype=dtype, copy=False).array
+            data[i] = values
+        frame = pd.DataFrame(data, index=self.index, copy=False)
+        frame.columns = self.columns
+        frame.attrs.update(self.attrs)
+        return frame
+
+    @property
+    def disk_bytes(self):
+        """Size of the files on disk."""
+        return sum(path.stat().st_size for path in self._paths() if path.exists())
+
+    @property
+    def memory_bytes(self):
+        """Memory kept by the handle (index, attrs and distinct values of non-text columns)."""
+        return (sys.getsizeof(self) + estimate_size(self.index) + estimate_size(self.attrs)
+                + sum(estimate_size(uniques) for _, _, uniques in self._columns if isinstance(uniques, np.ndarray)))
+
+
+def estimate_size(value, seen=None):
+    """
+    Estimate the memory used by a value and everything it references.
+
+    Args:
+        value: Any value (DataFrames, arrays, containers and objects are followed).
+        seen (set, optional): Ids of the objects already counted; an object referenced several times (e.g. an
+            activities table stored both in its `ActivityTable` and on its own) is only counted once.
+
+    Returns:
+        int: Estimated size in bytes. Memory-mapped arrays count as 0, as their data stays on disk.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, SpilledTable):
+        return value.memory_bytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.memmap):
+        return sys.getsizeof(value)
+    if isinstance(value, np.ndarray):
+        size = sys.getsizeof(value) if value.base is None else sys.getsizeof(value) + value.nbytes
+        if value.dtype == object:
+            size += sum(estimate_size(item, seen) for item in value.ravel())
+        return size
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key, seen) + estimate_size(item, seen) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)) or type(value).__name__ == "deque":
+        return sys.getsizeof(value) + sum(estimate_size(item, seen) for item in value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))) or callable(value):
+        return sys.getsizeof(value)
+
+    # Other objects (e.g. `ActivityTable`, `OutputCache`): the object and its attributes
+    size = sys.getsizeof(value)
+    if hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), seen)
+    for slot in getattr(type(value), "__slots__", ()):
+        size += estimate_size(getattr(value, slot, None), seen)
+    return size
+
+
+def session_memory(state):
+    """
+    Estimate the memory used by every entry of a session state.
+
+    Args:
+        state (Mapping): Session state (``st.session_state``).
+
+    Returns:
+        pd.DataFrame: One row per entry with its "Entry" key, "Type", "Size (KB)" in memory and "On disk (KB)"
+        (spilled tables), largest first. An object shared by several entries is counted in the first one, in
+        key order.
+    """
+    seen = set()
+    rows = []
+    for key in sorted(state.keys(), key=str):
+        value = state[key]
+        rows.append({
+            "Entry": str(key),
+            "Type": type(value).__name__,
+            "Size (KB)": estimate_size(value, seen) / 1024,
+            "On disk (KB)": value.disk_bytes / 1024 if isinstance(value, SpilledTable) else 0.0
+        })
+    usage = pd.DataFrame(rows, columns=["Entry", "Type", "Size (KB)", "On disk (KB)"])
+    return usage.sort_values("Size (KB)", ascending=False, ignore_index=True)
+
+
+def spill_tables(state, keys, budget_mb=SESSION_MEMORY_BUDGET_MB, min_mb=MIN_SPILL_MB):
+    """
+    Keep a session within its memory budget by spilling its largest stored tables to disk.
+
+    While the session uses more than `budget_mb`, the largest of the tables stored under `keys` are replaced by a
+    `SpilledTable` handle (tables smaller than `min_mb` are kept). A table that was spilled by an earlier call and
+    stored again unchanged (e.g. rebuilt by its page) is spilled again without rewriting its files.
+
+    Args:
+        state (MutableMapping): Session state (``st.session_state``).
+        keys (iterable of str): Entries of `state` that may be spilled. Pages must read them with `load_table`.
+        budget_mb (float): Memory budget of the session in MB.
+        min_mb (float): Size in MB below which a table is not spilled.
+
+    Returns:
+        list of str: Keys of the tables replaced by a handle in this call.
+    """
+    keys = list(keys)
+    if SPILLED_TABLES_KEY not in state:
+        state[SPILLED_TABLES_KEY] = {}
+    handles = state[SPILLED_TABLES_KEY]
+    for key in list(handles):
+        if key not in state:
+            del handles[key]  # Table removed from the session (e.g. deleted scenario): its files are removed
+
+    spilled = []
+    for key in keys:
+        value = state.get(key)
+        if isinstance(value, pd.DataFrame) and key in handles and handles[key].matches(value):
+            state[key] = handles[key]
+            spilled.append(key)
+
+    candidates = sorted(
+        ((estimate_size(state[key]), key) for key in keys if isinstance(state.get(key), pd.DataFrame)), reverse=True
+    )
+    candidates = [(size, key) for size, key in candidates if size >= min_mb * _MB]
+    if not candidates:
+        return spilled  # Nothing large enough to spill: the rest of the session is not measured
+    total = session_memory(state)["Size (KB)"].sum() * 1024
+    for size, key in candidates:
+        if total <= budget_mb * _MB:
+            break
+        handles[key] = state[key] = SpilledTable(state[key])
+        total -= size
+        spilled.append(key)
+    return spilled
+
+
+def load_table(state, key):
+    """
+    Read a stored table, mapping it back from disk if it was spilled.
+
+    Args:
+        state (Mapping): Session state (``st.session_state``).
+        key (str): Entry of the table.
+
+    Returns:
+        pd.DataFrame: The table, or an empty DataFrame if it is not stored.
+    """
+    value = state.get(key)
+    if isinstance(value, SpilledTable):
+        return value.load()
+    return pd.DataFrame() if value is None else value
@@ -0,0 +1,83 @@
+"""
+Memoization of computed output tables, keyed on a content hash of their inputs.
+
+The output pages are re-run by Streamlit on every interaction (including navigation). Keeping the computed
+tables in a small per-session LRU cache means the summaries are only recomputed when their inputs change.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+
+import pandas as pd
+
+# --- Number of computed tables kept per session ---
+OUTPUT_CACHE_SIZE = 32
+
+
+def fingerprint(*inputs):
+    """
+    Compute a content hash of the inputs of an output table.
+
+    DataFrames that carry a revision (``attrs["revision"]``, set by `calculator.ActivityTable.to_frame`) are
+    identified by it instead of hashing their rows, which keeps reruns cheap for large activity tables.
+
+    Args:
+        *inputs: DataFrames, dicts of DataFrames (e.g. one activities table per scenario) and/or
+            JSON-serializable values (dicts, lists, numbers, strings).
+
+    Returns:
+        str: A hex digest that only changes when the content of the inputs changes.
+    """
+    digest = hashlib.sha1()
+    for value in inputs:
+        if isinstance(value, pd.DataFrame) and "revision" in value.attrs:
+            digest.update(json.dumps(["revision", *value.attrs["revision"]]).encode())
+        elif isinstance(value, dict) and value and all(isinstance(v, pd.DataFrame) for v in value.values()):
+            digest.update(fingerprint(list(value), *value.values()).encode())
+        elif isinstance(value, pd.DataFrame):
+            digest.update(json.dumps([str(c) for c in value.columns]).encode())
+            digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+        digest.update(b"\x00")  # Separator so that inputs cannot run into each other
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Least-recently-used cache of computed output tables.
+
+    Args:
+        maxsize (int): Maximum number of entries kept; the least recently used entry is evicted first.
+    """
+
+    def __init__(self, maxsize=OUTPUT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        Args:
+            key (hashable): Cache key, typically ``(table name, fingerprint of inputs)``.
+            compute (callable): Zero-argument function producing the value on a miss.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)  # Evict least recently used entry
+        return value
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,269 @@
+"""
+Portfolio-level aggregation of many calculator submissions.
+
+Streams the scenario files (``*.json``, see `batch.py` for the format) of one or more portfolio directories
+from disk, evaluates them across a pool of worker processes, and folds each submission into running totals
+as soon as it is evaluated. Only the portfolio totals and a handful of headline figures per submission are
+kept in memory, never the full output tables of every submission, so large portfolios can be rolled up on
+a laptop.
+
+For each portfolio, the following tables are written to ``OUTPUT_DIR/<portfolio name>/``:
+
+- ``stage_time_totals.csv``, ``stage_duration_totals.csv``, ``stage_cost_totals.csv``: Project-stage tables
+  summed over all submissions.
+- ``personnel_time_totals.csv``, ``personnel_cost_totals.csv``: Personnel tables summed over all submissions
+  (roles are matched by name).
+- ``projection_totals.csv``: Social ROI projection of the whole portfolio: costs and impact summed over all
+  submissions per scenario and year, with the resulting Impact per $.
+- ``submission_metrics.csv``: One row of headline figures per submission.
+- ``metric_distribution.csv``: Mean, spread and percentiles of each headline figure across submissions.
+
+and ``OUTPUT_DIR/portfolios.csv`` compares the portfolios side by side.
+
+Usage::
+
+    python portfolio.py PORTFOLIO_DIR [PORTFOLIO_DIR ...] --output-dir OUTPUT_DIR [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from batch import load_scenario
+from calculator import PROJECT_STAGES, PROJECTION_YEARS, evaluate
+
+# --- Summed output tables, with the column identifying their rows ---
+TOTAL_TABLES = {
+    "stage_time_summary": ("stage_time_totals", "Stage"),
+    "stage_duration_summary": ("stage_duration_totals", "Stage"),
+    "stage_cost_summary": ("stage_cost_totals", "Stage"),
+    "personnel_time_summary": ("personnel_time_totals", "Role"),
+    "personnel_cost_summary": ("personnel_cost_totals", "Role")
+}
+
+# --- Projection columns summed over submissions ---
+PROJECTION_SUMS = ["Fixed Cost ($)", "Variable Cost ($)", "Total Cost ($)", "Impact ($)"]
+
+# --- Percentiles of the headline figures across submissions ---
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def summarize_submission(outputs):
+    """
+    Reduce the output tables of one submission to what the portfolio totals need.
+
+    Args:
+        outputs (dict): Output tables as returned by `calculator.evaluate`.
+
+    Returns:
+        dict: Tables to sum (keyed by output table name, indexed by their row labels), the projection sums
+        per (scenario, year), and the submission's headline figures ("metrics").
+    """
+    tables = {
+        name: outputs[name].set_index(key).astype(float)
+        for name, (_, key) in TOTAL_TABLES.items()
+    }
+    projection = outputs["roi_projection"].groupby(["Scenario", "Year"])[PROJECTION_SUMS].sum()
+
+    stage_time = outputs["stage_time_summary"].set_index("Stage")
+    stage_duration = outputs["stage_duration_summary"].set_index("Stage")
+    stage_cost = outputs["stage_cost_summary"].set_index("Stage")
+    roi = outputs["roi_df"].set_index("Scenario")
+    final_year = outputs["roi_projection"].groupby("Scenario")["Impact per $ (Total cost)"].last()
+
+    metrics = {
+        "Time Saved vs BAU (weeks)": stage_duration.loc["Total", "Time Saved vs BAU (weeks)"],
+        "Time Saved vs BAU (hrs)": stage_time.loc["Total", "Time Saved vs BAU (hrs)"],
+        "Cost Saved vs BAU ($)": stage_cost.loc["Total", "Cost Saved vs BAU ($)"],
+        "BAU Cost per study ($)": roi.loc["BAU", "Cost ($)"],
+        "Proposed Tool Cost per study ($)": roi.loc["Proposed Tool", "Cost ($)"],
+        f"BAU Impact per $ in Year {PROJECTION_YEARS}": final_year.get("BAU", np.nan),
+        f"Proposed Tool Impact per $ in Year {PROJECTION_YEARS}": final_year.get("Proposed Tool", np.nan)
+    }
+    return {"tables": tables, "projection": projection, "metrics": {k: float(v) for k, v in metrics.items()}}
+
+
+def evaluate_submission(path):
+    """
+    Evaluate one scenario file and reduce it for the portfolio totals. Runs in a worker process.
+
+    Args:
+        path (Path): Path of the JSON scenario file.
+
+    Returns:
+        tuple: ``(submission name, summary or None, error message or None)``.
+    """
+    try:
+        return path.stem, summarize_submission(evaluate(**load_scenario(path))), None
+    except Exception as e:
+        return path.stem, None, f"{type(e).__name__}: {e}"
+
+
+class PortfolioAccumulator:
+    """
+    Running totals and headline figures of the submissions of one portfolio.
+
+    Submissions are added one at a time with `add`; `result` computes the portfolio tables.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = {}
+        self._totals = {}
+        self._projection = None
+        self._metrics = []
+        self._metric_names = []
+        self._names = []
+
+    def add(self, name, summary):
+        """
+        Fold one submission into the totals.
+
+        Args:
+            name (str): Submission name.
+            summary (dict): As returned by `summarize_submission`.
+        """
+        for table_name, table in summary["tables"].items():
+            total = self._totals.get(table_name)
+            self._totals[table_name] = table if total is None else total.add(table, fill_value=0)
+        projection = summary["projection"]
+        self._projection = projection if self._projection is None else self._projection.add(projection, fill_value=0)
+        self._metrics.append(list(summary["metrics"].values()))
+        self._metric_names = list(summary["metrics"])
+        self._names.append(name)
+        self.count += 1
+
+    def result(self):
+        """
+        Compute the portfolio tables.
+
+        Returns:
+            dict: DataFrames keyed by output file name (see the module docstring). Empty if no submission was
+            added.
+        """
+        if not self.count:
+            return {}
+
+        tables = {}
+        for table_name, (file_name, key) in TOTAL_TABLES.items():
+            total = self._totals[table_name]
+            # Stages in project order, then any other rows sorted, with "Infrastructure" and "Total" last (as in
+            # the app)
+            first = [stage for stage in PROJECT_STAGES if stage in total.index]
+            last = [row for row in ("Infrastructure", "Total") if row in total.index]
+            order = first + sorted(set(total.index) - set(first) - set(last)) + last
+            tables[file_name] = total.loc[order].rename_axis(key).reset_index()
+
+        projection = self._projection.reset_index()
+        projection["Impact per $ (Variable only)"] = np.divide(
+            projection["Impact ($)"], projection["Variable Cost ($)"],
+            out=np.zeros(len(projection)), where=projection["Variable Cost ($)"] > 0
+        )
+        projection["Impact per $ (Total cost)"] = np.divide(
+            projection["Impact ($)"], projection["Total Cost ($)"],
+            out=np.zeros(len(projection)), where=projection["Total Cost ($)"] > 0
+        )
+        tables["projection_totals"] = projection
+
+        metrics = pd.DataFrame(self._metrics, columns=self._metric_names)
+        tables["submission_metrics"] = metrics.assign(Submission=self._names)[["Submission"] + self._metric_names]
+
+        values = metrics.to_numpy()
+        distribution = pd.DataFrame({
+            "Metric": self._metric_names,
+            "Mean": np.nanmean(values, axis=0),
+            "Std": np.nanstd(values, axis=0),
+            "Min": np.nanmin(values, axis=0),
+            **{f"P{p}": np.nanpercentile(values, p, axis=0) for p in PERCENTILES},
+            "Max": np.nanmax(values, axis=0)
+        })
+        tables["metric_distribution"] = distribution
+        return tables
+
+
+def aggregate_portfolio(input_dir, pool, chunksize=None):
+    """
+    Stream the scenario files of one portfolio through `pool` and accumulate them.
+
+    Args:
+        input_dir (str or Path): Directory containing the ``*.json`` scenario files of the portfolio.
+        pool (multiprocessing.pool.Pool): Worker pool evaluating the submissions.
+        chunksize (int, optional): Number of files handed to a worker at a time.
+
+    Returns:
+        PortfolioAccumulator: The accumulated portfolio, with ``errors`` keyed by submission name.
+    """
+    paths = sorted(Path(input_dir).glob("*.json"))
+    chunksize = chunksize or max(1, len(paths) // (os.cpu_count() or 1) // 4)
+
+    portfolio = PortfolioAccumulator()
+    for name, summary, error in pool.imap(evaluate_submission, paths, chunksize=chunksize):
+        if error:
+            portfolio.errors[name] = error
+        else:
+            portfolio.add(name, summary)
+    return portfolio
+
+
+def run_portfolios(input_dirs, output_dir, workers=None):
+    """
+    Aggregate every portfolio directory and write the portfolio tables to `output_dir`.
+
+    Args:
+        input_dirs (list of str or Path): Portfolio directories, each containing ``*.json`` scenario files.
+        output_dir (str or Path): Directory the tables are written to (one subdirectory per portfolio).
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        dict: Error message keyed by ``"<portfolio>/<submission>"``, for every submission that could not be
+        evaluated.
+    """
+    output_dir = Path(output_dir)
+    errors = {}
+    overview = []
+    with Pool(processes=workers or os.cpu_count() or 1) as pool:
+        for input_dir in map(Path, input_dirs):
+            portfolio = aggregate_portfolio(input_dir, pool)
+            errors.update({f"{input_dir.name}/{name}": error for name, error in portfolio.errors.items()})
+
+            tables = portfolio.result()
+            portfolio_dir = output_dir / input_dir.name
+            portfolio_dir.mkdir(parents=True, exist_ok=True)
+            for file_name, df in tables.items():
+                df.to_csv(portfolio_dir / f"{file_name}.csv", index=False)
+
+            row = {"Portfolio": input_dir.name, "Submissions": portfolio.count, "Errors": len(portfolio.errors)}
+            if tables:
+                row.update(tables["metric_distribution"].set_index("Metric")["Mean"].add_prefix("Mean ").to_dict())
+                final = tables["projection_totals"].groupby("Scenario").last()
+                row.update(final["Impact per $ (Total cost)"].add_prefix("Portfolio Impact per $ ").to_dict())
+            overview.append(row)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(overview).to_csv(output_dir / "portfolios.csv", index=False)
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate calculator submissions into portfolio-level tables.")
+    parser.add_argument("input_dirs", nargs="+", help="Portfolio directories containing *.json scenario files")
+    parser.add_argument("--output-dir", required=True, help="Directory the portfolio tables (CSV) are written to")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPUs)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    errors = run_portfolios(args.input_dirs, args.output_dir, args.workers)
+    for name, error in errors.items():
+        print(f"⚠️ {name}: {error}", file=sys.stderr)
+    print(f"✅ Aggregated {len(args.input_dirs)} portfolio(s) in {time.perf_counter() - start:.2f}s; "
+          f"results written to {args.output_dir}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Timing of the phases of a Streamlit rerun.
+
+Every interaction reruns the whole app script. `RerunProfiler` times named phases of one rerun (sidebar, page
+body, each project stage, output computations, charts, ...), and `ProfileHistory` keeps the breakdowns of the
+latest reruns so that slow phases can be told apart from noise. Profiling is opt-in: a disabled profiler
+does not read the clock. Like `calculator`, this module does not depend on Streamlit.
+"""
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# --- Number of reruns kept in the profiling history ---
+PROFILE_HISTORY_SIZE = 50
+
+# --- Separator between the names of nested phases ---
+PATH_SEPARATOR = " › "
+
+
+class RerunProfiler:
+    """
+    Timings of the named phases of one rerun.
+
+    Phases may be nested; a phase started while another is running is recorded as its child, e.g.
+    ``page › compute: stage_time_summary``. Use `phase` as a context manager, or `start`/`stop` around code
+    that cannot easily be indented (such as the page body).
+
+    Args:
+        enabled (bool): Record timings. A disabled profiler does nothing.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []  # (phase path, depth, elapsed ms), in the order the phases finished
+        self.total_ms = None
+        self._running = []  # Stack of (phase path, start time)
+        self._order = {}  # Start order of each phase path, to list parents before their children
+        self._start = time.perf_counter()
+
+    def start(self, name):
+        """Start timing the phase `name` (nested in the running phase, if any)."""
+        if self.enabled:
+            path = f"{self._running[-1][0]}{PATH_SEPARATOR}{name}" if self._running else name
+            self._order.setdefault(path, len(self._order))
+            self._running.append((path, time.perf_counter()))
+
+    def stop(self, name):
+        """Stop timing the phase `name` and record its duration."""
+        if not self.enabled:
+            return
+        path, started = self._running.pop()
+        if path.split(PATH_SEPARATOR)[-1] != name:
+            raise ValueError(f"Phase {name!r} stopped while {path!r} is running")
+        self.records.append((path, len(self._running), (time.perf_counter() - started) * 1000))
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a ``with`` statement as the phase `name`."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def finish(self):
+        """
+        End the rerun: stop phases still running and record the total time since the profiler was created.
+
+        Returns:
+            float: Total duration of the rerun in milliseconds.
+        """
+        while self._running:
+            self.stop(self._running[-1][0].split(PATH_SEPARATOR)[-1])
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        return self.total_ms
+
+    def breakdown(self):
+        """
+        Timing breakdown of the rerun.
+
+        Returns:
+            pd.DataFrame: One row per phase, parents before their children, with "Phase" (indented by depth),
+            "Time (ms)" and "% of rerun". Phases that ran several times (e.g. a helper called in a loop) are
+            summed, with their number of "Calls".
+        """
+        if not self.records:
+            return pd.DataFrame(columns=["Phase", "Calls", "Time (ms)", "% of rerun"])
+
+        df = pd.DataFrame(self.records, columns=["Path", "Depth", "Time (ms)"])
+        df = df.groupby(["Path", "Depth"], sort=False, as_index=False).agg(
+            Calls=("Time (ms)", "size"), **{"Time (ms)": ("Time (ms)", "sum")}
+        )
+        df = df.sort_values("Path", key=lambda paths: paths.map(self._tree_position))
+        total = self.total_ms if self.total_ms else df.loc[df["Depth"] == 0, "Time (ms)"].sum()
+        df["Phase"] = [
+            "    " * depth + path.split(PATH_SEPARATOR)[-1] for path, depth in zip(df["Path"], df["Depth"])
+        ]
+        df["% of rerun"] = df["Time (ms)"] / total * 100 if total else 0.0
+        return df[["Phase", "Calls", "Time (ms)", "% of rerun"]].reset_index(drop=True)
+
+    def _tree_position(self, path):
+        """Sort key listing each phase after its parent, and siblings in the order they first started."""
+        parts = path.split(PATH_SEPARATOR)
+        return tuple(self._order[PATH_SEPARATOR.join(parts[:k])] for k in range(1, len(parts) + 1))
+
+
+class ProfileHistory:
+    """
+    Rolling history of rerun timings.
+
+    Args:
+        maxlen (int): Number of reruns kept; the oldest rerun is dropped first.
+    """
+
+    def __init__(self, maxlen=PROFILE_HISTORY_SIZE):
+        self.reruns = deque(maxlen=maxlen)
+
+    def __len__(self):
+        return len(self.reruns)
+
+    def add(self, page, profiler):
+        """
+        Record a finished rerun.
+
+        Args:
+            page (str): Page shown by the rerun.
+            profiler (RerunProfiler): Profiler of the rerun (after `RerunProfiler.finish`).
+        """
+        phases = {}
+        for path, _, elapsed in sorted(profiler.records, key=lambda record: profiler._tree_position(record[0])):
+            phases[path] = phases.get(path, 0.0) + elapsed
+        self.reruns.append({"page": page, "total_ms": profiler.total_ms, "phases": phases})
+
+    def summary(self):
+        """
+        Timing statistics per page and phase over the recorded reruns.
+
+        Returns:
+            pd.DataFrame: One row per page and phase ("Total" for whole reruns) with the number of "Reruns"
+            and the "Mean (ms)", "P95 (ms)" and "Last (ms)" times.
+        """
+        rows = []
+        for rerun in self.reruns:
+            rows.append((rerun["page"], "Total", rerun["total_ms"]))
+            rows += [(rerun["page"], path, elapsed) for path, elapsed in rerun["phases"].items()]
+        if not rows:
+            return pd.DataFrame(columns=["Page", "Phase", "Reruns", "Mean (ms)", "P95 (ms)", "Last (ms)"])
+
+        df = pd.DataFrame(rows, columns=["Page", "Phase", "Time (ms)"])
+        return (
+            df.groupby(["Page", "Phase"], sort=False)["Time (ms)"]
+            .agg(**{
+                "Reruns": "size",
+                "Mean (ms)": "mean",
+                "P95 (ms)": lambda times: np.percentile(times, 95),
+                "Last (ms)": "last"
+            })
+            .reset_index()
+        )
+
+    def clear(self):
+        self.reruns.clear()
@@ -0,0 +1,234 @@
+"""
+Sensitivity analysis for the Social ROI projection.
+
+Evaluates "Impact per $" over grids of the Social ROI parameters with batched NumPy math, using the same
+formulas as `calculator.compute_roi_table` and `calculator.compute_projection`. Like `calculator`, this
+module does not depend on Streamlit.
+"""
+import numpy as np
+import pandas as pd
+
+from calculator import PROJECTION_YEARS, get_scenario_value
+
+# --- Social ROI parameters that can be swept, with their display labels ---
+SWEEP_PARAMETERS = {
+    "discovery_rate": "Rate of discovery of impact (%)",
+    "learning_sd": "Median impact (SD)",
+    "econ_per_sd": "Average increase per 1 SD improvement ($)",
+    "total_students": "Total reach (# individuals)",
+    "orgs_bau": "Orgs supported (Business as Usual)",
+    "orgs_proposed": "Orgs supported (Proposed Tool)",
+    "concurrent_studies": "Concurrent research projects per org"
+}
+
+# --- Parameters that only take whole values (minimum 1) ---
+INTEGER_PARAMETERS = {"total_students", "orgs_bau", "orgs_proposed", "concurrent_studies"}
+
+# --- Output metrics of the projection ---
+METRICS = ["Impact per $ (Variable only)", "Impact per $ (Total cost)"]
+
+# --- Largest parameter grid evaluated in full (one row per combination) ---
+MAX_GRID_SIZE = 250_000
+
+
+def scenario_parameters(scenario=None):
+    """
+    Sweepable parameters that affect the projection of a scenario.
+
+    Args:
+        scenario (str, optional): "BAU" or "Proposed Tool". Defaults to all parameters.
+
+    Returns:
+        list of str: Parameter names, in the order of ``SWEEP_PARAMETERS``. Only the org count of `scenario`
+        is included, as the other one does not change its projection.
+    """
+    unused = {"BAU": "orgs_proposed", "Proposed Tool": "orgs_bau"}.get(scenario)
+    return [name for name in SWEEP_PARAMETERS if name != unused]
+
+
+def build_sweep_ranges(base_params, spread=0.5, points=5, scenario=None):
+    """
+    Build evenly spaced values around the current value of every sweepable parameter.
+
+    Args:
+        base_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        spread (float): Relative distance of the lowest/highest value from the current value (0.5 = ±50%).
+        points (int): Number of values per parameter.
+        scenario (str, optional): Only sweep the parameters that affect this scenario (see
+            `scenario_parameters`).
+
+    Returns:
+        dict: Sorted unique NumPy array of values keyed by parameter name.
+    """
+    ranges = {}
+    for name in scenario_parameters(scenario):
+        values = base_params.get(name, 0) * np.linspace(1 - spread, 1 + spread, points)
+        if name in INTEGER_PARAMETERS:
+            values = np.maximum(np.round(values), 1)
+        elif name == "discovery_rate":
+            values = np.clip(values, 0, 100)
+        ranges[name] = np.unique(values)
+    return ranges
+
+
+def compute_impact_per_dollar(params, time_months, cost_per_study, fixed_cost, scenario="Proposed Tool",
+                              year=PROJECTION_YEARS):
+    """
+    Compute both "Impact per $" metrics for many parameter sets at once.
+
+    Args:
+        params (dict): Value(s) of every parameter in ``SWEEP_PARAMETERS``; scalars or broadcastable arrays.
+        time_months (float or np.ndarray): Duration of a single study in months.
+        cost_per_study (float or np.ndarray): Variable cost per study.
+        fixed_cost (float): Fixed 1-time setup cost for the scenario.
+        scenario (str): "BAU" or "Proposed Tool"; selects which org count applies.
+        year (int): Projection year at which the metrics are evaluated.
+
+    Returns:
+        dict: Arrays of each metric in ``METRICS``, broadcast to the shape of the inputs.
+    """
+    orgs = np.asarray(params["orgs_bau" if scenario == "BAU" else "orgs_proposed"], dtype=float)
+
+    # Impact per study, as in the ROI table: per-student improvement × discovery rate × total reach
+    impact_per_study = np.round(
+        params["learning_sd"] * params["econ_per_sd"] * (np.asarray(params["discovery_rate"]) / 100)
+        * params["total_students"], 2
+    )
+
+    # Number of studies each organization can conduct by the end of the year (0 if a study takes no time)
+    study_months, time_months = np.broadcast_arrays(
+        year * 12 * np.asarray(params["concurrent_studies"], dtype=float), np.asarray(time_months, dtype=float)
+    )
+    studies_each_org = np.floor(
+        np.divide(study_months, time_months, out=np.zeros(study_months.shape), where=time_months > 0)
+    )
+
+    variable_cost, impact = np.broadcast_arrays(
+        cost_per_study * studies_each_org * orgs, impact_per_study * studies_each_org * orgs
+    )
+    total_cost = variable_cost + fixed_cost
+
+    return {
+        "Impact per $ (Variable only)": np.divide(
+            impact, variable_cost, out=np.zeros(impact.shape), where=variable_cost > 0
+        ),
+        "Impact per $ (Total cost)": np.divide(
+            impact, total_cost, out=np.zeros(impact.shape), where=total_cost > 0
+        )
+    }
+
+
+def _scenario_inputs(roi_df, scenario):
+    """Time (months) and cost ($) of a single study for `scenario`, from the ROI table."""
+    return get_scenario_value(roi_df, scenario, "Time (months)"), get_scenario_value(roi_df, scenario, "Cost ($)")
+
+
+def run_sweep(ranges, roi_df, fixed_cost, scenario="Proposed Tool", year=PROJECTION_YEARS):
+    """
+    Evaluate the Social ROI projection over the Cartesian grid of the given parameter ranges.
+
+    Args:
+        ranges (dict): Values of the parameters that affect `scenario`, as returned by `build_sweep_ranges`.
+        roi_df (pd.DataFrame): ROI table as returned by `calculator.compute_roi_table`.
+        fixed_cost (float): Fixed 1-time setup cost for the scenario.
+        scenario (str): "BAU" or "Proposed Tool".
+        year (int): Projection year at which the metrics are evaluated.
+
+    Returns:
+        pd.DataFrame: One row per grid point with the parameter values and both metrics in ``METRICS``.
+    """
+    names = [name for name in SWEEP_PARAMETERS if name in ranges]
+    grids = np.meshgrid(*[np.asarray(ranges[name], dtype=float) for name in names], indexing="ij")
+    params = {name: grid.ravel() for name, grid in zip(names, grids)}
+
+    time_months, cost_per_study = _scenario_inputs(roi_df, scenario)
+    metrics = compute_impact_per_dollar(params, time_months, cost_per_study, fixed_cost, scenario, year)
+
+    return pd.DataFrame({**params, **metrics})
+
+
+def compute_tornado(base_params, ranges, roi_df, fixed_cost, scenario="Proposed Tool", year=PROJECTION_YEARS,
+                    metric="Impact per $ (Total cost)"):
+    """
+    Compute one-at-a-time sensitivities: each parameter is set to its lowest and highest value while all
+    others stay at their current value.
+
+    Args:
+        base_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        ranges (dict): Values of the parameters that affect `scenario`, as returned by `build_sweep_ranges`.
+        roi_df (pd.DataFrame): ROI table as returned by `calculator.compute_roi_table`.
+        fixed_cost (float): Fixed 1-time setup cost for the scenario.
+        scenario (str): "BAU" or "Proposed Tool".
+        year (int): Projection year at which the metric is evaluated.
+        metric (str): One of ``METRICS``.
+
+    Returns:
+        pd.DataFrame: One row per swept parameter with the low/high values, the metric at each, the metric at
+        the current values ("Base") and the "Swing" between low and high, sorted by swing (largest first).
+    """
+    names = [name for name in SWEEP_PARAMETERS if name in ranges]
+    base = np.array([float(base_params.get(name, 0)) for name in names])
+
+    # Rows 0..n-1 set parameter i to its low value, rows n..2n-1 to its high value, last row is the base case
+    values = np.tile(base, (2 * len(names) + 1, 1))
+    for i, name in enumerate(names):
+        values[i, i] = np.min(ranges[name])
+        values[len(names) + i, i] = np.max(ranges[name])
+
+    time_months, cost_per_study = _scenario_inputs(roi_df, scenario)
+    result = compute_impact_per_dollar(
+        {name: values[:, i] for i, name in enumerate(names)}, time_months, cost_per_study, fixed_cost, scenario,
+        year
+    )[metric]
+
+    tornado = pd.DataFrame({
+        "Parameter": [SWEEP_PARAMETERS[name] for name in names],
+        "Low value": values[:len(names)].diagonal(),
+        "High value": values[len(names):2 * len(names)].diagonal(),
+        "At low value": result[:len(names)],
+        "At high value": result[len(names):2 * len(names)],
+        "Base": result[-1]
+    })
+    tornado["Swing"] = (tornado["At high value"] - tornado["At low value"]).abs()
+    return tornado.sort_values("Swing", ascending=False, ignore_index=True)
+
+
+def compute_heatmap(base_params, x_param, y_param, ranges, roi_df, fixed_cost, scenario="Proposed Tool",
+                    year=PROJECTION_YEARS, metric="Impact per $ (Total cost)"):
+    """
+    Compute a metric over a two-parameter grid, holding all other parameters at their current value.
+
+    Args:
+        base_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        x_param (str): Parameter name varied along the columns.
+        y_param (str): Parameter name varied along the rows.
+        ranges (dict): Values of (at least) `x_param` and `y_param`, as returned by `build_sweep_ranges`.
+        roi_df (pd.DataFrame): ROI table as returned by `calculator.compute_roi_table`.
+        fixed_cost (float): Fixed 1-time setup cost for the scenario.
+        scenario (str): "BAU" or "Proposed Tool".
+        year (int): Projection year at which the metric is evaluated.
+        metric (str): One of ``METRICS``.
+
+    Returns:
+        pd.DataFrame: The metric with `y_param` values as index and `x_param` values as columns.
+    """
+    x_values = np.asarray(ranges[x_param], dtype=float)
+    y_values = np.asarray(ranges[y_param], dtype=float)
+
+    params = {name: float(base_params.get(name, 0)) for name in SWEEP_PARAMETERS}
+    params[x_param] = x_values[np.newaxis, :]
+    params[y_param] = y_values[:, np.newaxis]
+
+    time_months, cost_per_study = _scenario_inputs(roi_df, scenario)
+    result = compute_impact_per_dollar(params, time_months, cost_per_study, fixed_cost, scenario, year)[metric]
+
+    return pd.DataFrame(
+        result,
+        index=pd.Index(y_values, name=SWEEP_PARAMETERS[y_param]),
+        columns=pd.Index(x_values, name=SWEEP_PARAMETERS[x_param])
+    )
+
+
+def grid_size(ranges):
+    """Number of points in the Cartesian grid of `ranges`."""
+    return int(np.prod([len(values) for values in ranges.values()]))
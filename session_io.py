@@ -0,0 +1,250 @@
+"""
+Saving and loading the inputs of a calculator session.
+
+A session file holds the inputs that take time to enter: personnel, infrastructure costs, the project
+activities of all scenarios, their schedules, the staff capacity and the Social ROI parameters. Two forms are
+supported:
+
+- JSON (default): a compact JSON object. It is also a valid scenario file for `batch.py`.
+- Parquet: the project steps as one columnar table, with the other inputs in the file metadata. This is more
+  compact for projects with many steps and roles. Requires pyarrow, which is installed with Streamlit.
+
+Both forms carry a format version, which is checked when loading. Like `calculator`, this module does not
+depend on Streamlit.
+"""
+import io
+import json
+from numbers import Real
+
+import numpy as np
+
+from calculator import DEFAULT_ROI_PARAMETERS, ActivityTable, as_activity_table
+
+# --- Format identification ---
+FORMAT_NAME = "efficiency-gains-calculator-session"
+FORMAT_VERSION = 1
+
+# --- Session state entries saved next to the project steps ---
+SESSION_KEYS = ["personnel_rows", "infrastructure_costs", "roi_parameters", "scenario_bases", "schedules",
+                "staff_capacity"]
+
+# --- Expected type of each entry of a session file ---
+_ENTRY_TYPES = {"personnel_rows": list, "infrastructure_costs": list, "roi_parameters": dict,
+                "scenario_bases": dict, "schedules": dict, "staff_capacity": dict, "project_steps": dict}
+
+# --- Keys every personnel and infrastructure row must have, with the type of their value ---
+_ROW_FIELDS = {
+    "personnel_rows": {"Role": str, "Hourly Rate": Real},
+    "infrastructure_costs": {"Cost Category": str, "Business as Usual ($)": Real, "Proposed Tool ($)": Real}
+}
+
+# --- Social ROI parameters that must be numbers (the others are descriptions) ---
+_NUMERIC_PARAMETERS = [name for name, value in DEFAULT_ROI_PARAMETERS.items() if isinstance(value, Real)]
+
+_PARQUET_MAGIC = b"PAR1"
+_METADATA_KEY = b"efficiency_gains_calculator"
+
+
+def _to_builtin(value):
+    """JSON fallback for NumPy scalars and other values."""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def _header(state):
+    """Format identification and the session state entries in ``SESSION_KEYS``."""
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        **{key: state[key] for key in SESSION_KEYS if key in state}
+    }
+
+
+def export_session(state, binary=False):
+    """
+    Serialize the inputs of a session.
+
+    Args:
+        state (Mapping): Session state, i.e. ``st.session_state`` or a dict with the same entries.
+        binary (bool): Write the Parquet form instead of JSON.
+
+    Returns:
+        bytes: The content of the session file.
+    """
+    project_steps = {section: as_activity_table(table) for section, table in state.get("project_steps", {}).items()}
+    if binary:
+        return _export_parquet(_header(state), project_steps)
+
+    payload = _header(state)
+    payload["project_steps"] = {section: table.to_steps() for section, table in project_steps.items()}
+    return json.dumps(payload, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+def _export_parquet(header, project_steps):
+    """Write the project steps as a Parquet table, with `header` and the table layouts as metadata."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    header["project_steps"] = {
+        section: {"roles": table.roles, "initialized_stages": sorted(table.initialized_stages)}
+        for section, table in project_steps.items()
+    }
+
+    def list_column(values, width):
+        """One list of `width` values per step."""
+        offsets = np.arange(len(values) + 1, dtype=np.int32) * width
+        return pa.ListArray.from_arrays(pa.array(offsets), pa.array(np.ravel(values), type=pa.float64()))
+
+    tables = []
+    for section, table in project_steps.items():
+        r = len(table.roles)
+        tables.append(pa.table({
+            "Section": pa.array([section] * len(table), type=pa.string()),
+            "id": pa.array(table.ids, type=pa.string()),
+            "Stage": pa.array(table.stages, type=pa.string()),
+            "Step": pa.array(table.steps, type=pa.string()),
+            "Notes": pa.array(table.notes, type=pa.string()),
+            "Duration": pa.array(table.duration, type=pa.float64()),
+            "Duration Low": pa.array(table.duration_range[:, 0], type=pa.float64()),
+            "Duration High": pa.array(table.duration_range[:, 1], type=pa.float64()),
+            "Active": list_column(table.active, r),
+            "Active Low": list_column(table.active_range[..., 0], r),
+            "Active High": list_column(table.active_range[..., 1], r)
+        }))
+
+    steps = pa.concat_tables(tables) if tables else pa.table({"Section": pa.array([], type=pa.string())})
+    steps = steps.replace_schema_metadata({_METADATA_KEY: json.dumps(header, default=_to_builtin)})
+    buffer = io.BytesIO()
+    pq.write_table(steps, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def load_session(data):
+    """
+    Read a session file written by `export_session` (either form) or a `batch.py` scenario file.
+
+    Args:
+        data (bytes): The content of the file.
+
+    Returns:
+        dict: Session state entries: those in ``SESSION_KEYS`` that the file contains, and "project_steps"
+        with one `ActivityTable` per scenario ("BAU" and "Proposed Tool" first).
+
+    Raises:
+        ValueError: If the file is not a session file, is malformed (e.g. an entry of the wrong type or a step
+            without roles) or was written by a newer version of the calculator.
+    """
+    try:
+        return _load_session(data)
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed session file: {type(e).__name__}: {e}") from e
+
+
+def _load_session(data):
+    """`load_session`, which may raise other errors than ValueError for files of the wrong shape."""
+    if data[:4] == _PARQUET_MAGIC:
+        payload, project_steps = _load_parquet(data)
+    else:
+        try:
+            payload = json.loads(data)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Not a session file: {e}") from e
+        if not isinstance(payload, dict):
+            raise ValueError("Not a session file: expected a JSON object")
+        project_steps = None
+
+    if payload.get("format", FORMAT_NAME) != FORMAT_NAME:
+        raise ValueError(f"Not a session file: unknown format {payload['format']!r}")
+    version = payload.get("version", FORMAT_VERSION)
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise ValueError(f"Not a session file: invalid format version {version!r}")
+    for key, expected in _ENTRY_TYPES.items():
+        if key in payload and not isinstance(payload[key], expected):
+            raise ValueError(f"Malformed session file: {key!r} must be a JSON {_json_type(expected)}")
+    for key, fields in _ROW_FIELDS.items():
+        for row in payload.get(key, []):
+            if not isinstance(row, dict):
+                raise ValueError(f"Malformed session file: every row of {key!r} must be a JSON object")
+            for field, expected in fields.items():
+                if not _is_type(row.get(field), expected):
+                    raise ValueError(
+                        f"Malformed session file: every row of {key!r} needs a {field!r} {_type_name(expected)}"
+                    )
+    for name in _NUMERIC_PARAMETERS:
+        value = payload.get("roi_parameters", {}).get(name, 0)
+        if not _is_type(value, Real):
+            raise ValueError(f"Malformed session file: the Social ROI parameter {name!r} must be a number")
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"The session file has format version {payload['version']}, but this version of the calculator "
+            f"only reads up to version {FORMAT_VERSION}."
+        )
+
+    if project_steps is None:
+        for section, steps in payload.get("project_steps", {}).items():
+            if not isinstance(steps, dict) or not all(isinstance(rows, list) for rows in steps.values()):
+                raise ValueError(f"Malformed session file: the steps of {section!r} must map each stage to a list")
+        project_steps = {
+            section: ActivityTable.from_steps(steps)
+            for section, steps in payload.get("project_steps", {}).items()
+        }
+
+    session = {key: payload[key] for key in SESSION_KEYS if key in payload}
+    session["project_steps"] = {section: project_steps.get(section, ActivityTable())
+                                for section in dict.fromkeys(["BAU", "Proposed Tool", *project_steps])}
+    return session
+
+
+def _json_type(expected):
+    """JSON name of a Python container type."""
+    return "array" if expected is list else "object"
+
+
+def _is_type(value, expected):
+    """Whether `value` is of the `expected` type; booleans are not numbers."""
+    return isinstance(value, expected) and not (expected is Real and isinstance(value, bool))
+
+
+def _type_name(expected):
+    """Name of a value type in error messages."""
+    return "number" if expected is Real else "text"
+
+
+def _load_parquet(data):
+    """Read the header and the activity tables of the Parquet form."""
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    steps = pq.read_table(io.BytesIO(data))
+    metadata = (steps.schema.metadata or {}).get(_METADATA_KEY)
+    if metadata is None:
+        raise ValueError("Not a session file: missing calculator metadata")
+    payload = json.loads(metadata)
+    if not isinstance(payload, dict):
+        raise ValueError("Not a session file: the calculator metadata must be a JSON object")
+
+    project_steps = {}
+    for section, layout in payload.get("project_steps", {}).items():
+        part = steps.filter(pc.equal(steps.column("Section"), section))
+        r = len(layout["roles"])
+
+        def values(name):
+            return part.column(name).to_numpy()
+
+        def matrix(name):
+            if r == 0:
+                return np.zeros((len(part), 0))  # No roles (e.g. an activities page never opened)
+            return part.column(name).combine_chunks().flatten().to_numpy().reshape(-1, r)
+
+        project_steps[section] = ActivityTable.from_arrays(
+            layout["roles"],
+            part.column("Stage").to_pylist(),
+            part.column("Step").to_pylist(),
+            part.column("Notes").to_pylist(),
+            values("Duration"),
+            matrix("Active"),
+            step_ids=part.column("id").to_pylist(),
+            duration_range=np.column_stack([values("Duration Low"), values("Duration High")]),
+            active_range=np.stack([matrix("Active Low"), matrix("Active High")], axis=-1),
+            initialized_stages=layout["initialized_stages"]
+        )
+    return payload, project_steps
@@ -0,0 +1,373 @@
+"""
+Monte Carlo uncertainty analysis for the Efficiency Gains Calculator.
+
+Durations and % active time are estimates. Each step may carry an optional range for its duration and for
+the active time of each role (see `calculator.ActivityTable`); inputs without a range are varied by a default
+relative spread around their point estimate. Samples are drawn with vectorized NumPy, split into
+chunks and evaluated across a process pool, and summarized as percentile bands.
+
+Like `calculator`, this module does not depend on Streamlit.
+"""
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from calculator import HOURS_PER_WEEK, PROJECTION_YEARS, WEEKS_PER_MONTH, as_activity_table
+from output_cache import fingerprint
+from sensitivity import compute_impact_per_dollar
+
+# --- Supported distributions for sampled inputs ---
+DISTRIBUTIONS = ["Triangular", "Uniform"]
+
+# --- Sampled values (samples × steps × roles) per worker task; each array of a chunk takes 8 bytes per value ---
+CHUNK_ELEMENT_BUDGET = 2_000_000
+
+# --- Percentiles reported in the summary ---
+PERCENTILES = [5, 25, 50, 75, 95]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_bounds(point, explicit_range, default_spread):
+    """
+    Lowest, point estimate and highest value of every input, stacked along a new first axis.
+
+    Inputs without an explicit range (NaN) are varied by the default relative spread around their point estimate.
+    """
+    low = np.where(np.isnan(explicit_range[..., 0]), point * (1 - default_spread), explicit_range.min(axis=-1))
+    high = np.where(np.isnan(explicit_range[..., 0]), point * (1 + default_spread), explicit_range.max(axis=-1))
+    return np.stack([np.maximum(low, 0.0), point, np.maximum(high, 0.0)])
+
+
+def build_simulation_model(table, rate_index, default_spread=0.2):
+    """
+    Collect the inputs of one project activity section into arrays that can be sampled.
+
+    Args:
+        table (ActivityTable): Activities of the section, as stored in ``st.session_state.project_steps``
+            (nested step dicts are converted).
+        rate_index (dict): Hourly rate keyed by role, as returned by `calculator.build_rate_index`.
+        default_spread (float): Relative spread (0.2 = ±20%) applied to inputs without an explicit range.
+
+    Returns:
+        dict: Point estimates and low/high bounds of durations (steps) and active times (steps × roles),
+        hourly rates per role, and the group boundaries used for the duration tables.
+    """
+    table = as_activity_table(table)
+
+    # Steps sorted by (stage, step description) and by stage, with the start index of each group, so that
+    # group maxima can be taken with np.maximum.reduceat
+    step_keys = [(table.stage_order.index(stage), step) for stage, step in zip(table.stages, table.steps)]
+    step_order = sorted(range(len(table)), key=lambda k: step_keys[k])
+    stage_order = sorted(range(len(table)), key=lambda k: step_keys[k][0])
+
+    return {
+        "duration": _get_bounds(table.duration, table.duration_range, default_spread),
+        "active": _get_bounds(table.active, table.active_range, default_spread),
+        "rates": np.array([float(rate_index.get(role, 0) or 0) for role in table.roles]),
+        "step_order": np.array(step_order, dtype=int),
+        "step_starts": _group_starts([step_keys[k] for k in step_order]),
+        "stage_order": np.array(stage_order, dtype=int),
+        "stage_starts": _group_starts([step_keys[k][0] for k in stage_order])
+    }
+
+
+def _group_starts(sorted_keys):
+    """Start index of every run of equal keys in a sorted list."""
+    return np.array([k for k in range(len(sorted_keys)) if k == 0 or sorted_keys[k] != sorted_keys[k - 1]],
+                    dtype=int)
+
+
+def _sample(rng, bounds, distribution, size):
+    """
+    Draw samples of every input at once.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        bounds (np.ndarray): Array of shape ``(3, ...)`` with low, point estimate (mode) and high values.
+        distribution (str): One of ``DISTRIBUTIONS``.
+        size (int): Number of samples.
+
+    Returns:
+        np.ndarray: Samples of shape ``(size, ...)``.
+    """
+    low, mode, high = bounds
+    u = rng.random((size,) + low.shape)
+    width = high - low
+    if distribution == "Uniform":
+        return low + u * width
+
+    # Triangular distribution by inverse CDF (the point estimate is the mode, clipped into the range)
+    mode = np.clip(mode, low, high)
+    split = np.divide(mode - low, width, out=np.zeros(low.shape), where=width > 0)
+    return np.where(
+        u < split,
+        low + np.sqrt(u * width * (mode - low)),
+        high - np.sqrt((1 - u) * width * (high - mode))
+    )
+
+
+def _evaluate_samples(model, duration, active):
+    """
+    Evaluate the output totals of a scenario for every sample.
+
+    Args:
+        model (dict): As returned by `build_simulation_model`.
+        duration (np.ndarray): Sampled step durations (samples × steps).
+        active (np.ndarray): Sampled % active time (samples × steps × roles).
+
+    Returns:
+        dict: Arrays (one value per sample) of the project duration as on the Project-Stage page, the active
+        person-hours, the personnel cost and the project duration used by the Social ROI page.
+    """
+    size = duration.shape[0]
+    if duration.shape[1] == 0:
+        zeros = np.zeros(size)
+        return {"duration_weeks": zeros, "person_hours": zeros, "personnel_cost": zeros, "roi_weeks": zeros}
+
+    # Person-hours and cost: duration × active % × 40 hours/week (× hourly rate)
+    role_weeks = np.einsum("ns,nsr->nr", duration, active) / 100
+    return {
+        # Sum over stages of the longest duration of each unique step
+        "duration_weeks": np.maximum.reduceat(
+            duration[:, model["step_order"]], model["step_starts"], axis=1
+        ).sum(axis=1),
+        "person_hours": role_weeks.sum(axis=1) * HOURS_PER_WEEK,
+        "personnel_cost": role_weeks @ model["rates"] * HOURS_PER_WEEK,
+        # Sum over stages of the longest step of each stage
+        "roi_weeks": np.maximum.reduceat(
+            duration[:, model["stage_order"]], model["stage_starts"], axis=1
+        ).sum(axis=1)
+    }
+
+
+def _simulate_chunk(models, distribution, size, seed):
+    """
+    Sample and evaluate one chunk of the simulation for every scenario. Runs in a worker process.
+
+    Args:
+        models (dict): Simulation models keyed by scenario name.
+        distribution (str): One of ``DISTRIBUTIONS``.
+        size (int): Number of samples in this chunk.
+        seed (np.random.SeedSequence): Independent seed of this chunk.
+
+    Returns:
+        dict: For each scenario, the per-sample totals returned by `_evaluate_samples`.
+    """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for scenario, model in models.items():
+        duration = _sample(rng, model["duration"], distribution, size)
+        active = _sample(rng, model["active"], distribution, size)
+        results[scenario] = _evaluate_samples(model, duration, active)
+    return results
+
+
+def _get_executor(max_workers):
+    """
+    Process pool shared by all simulations of this process (started on first use).
+
+    Sessions run in their own threads, so the pool is created and replaced under a lock: two sessions starting
+    a simulation at the same time share one pool instead of each starting one and leaking the other.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor._max_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)  # Running simulations finish on the old pool
+            # "spawn" avoids forking the threads of the Streamlit server
+            _executor = ProcessPoolExecutor(max_workers=max_workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+@atexit.register
+def _shutdown_executor():
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _chunk_size(models):
+    """Samples per worker task, so that the sampled values of a chunk stay within ``CHUNK_ELEMENT_BUDGET``."""
+    values_per_sample = max(int(np.prod(model["active"].shape[1:])) + model["duration"].shape[1]
+                            for model in models.values())
+    return max(1, CHUNK_ELEMENT_BUDGET // max(1, values_per_sample))
+
+
+def simulation_key(project_steps, rate_index, infra_totals, **options):
+    """
+    Content hash of the inputs of a simulation, to tell whether a stored result is still up to date.
+
+    Unlike the revision of an activities table, it also changes with the uncertainty ranges of the steps.
+
+    Args:
+        project_steps (dict): As passed to `run_simulation`.
+        rate_index (dict): As passed to `run_simulation`.
+        infra_totals (dict): As passed to `run_simulation`.
+        **options: The other arguments of `run_simulation` (number of samples, distribution, spread, seed).
+
+    Returns:
+        str: A hex digest that only changes when an input of the simulation changes.
+    """
+    digest = hashlib.sha1()
+    for scenario in ["BAU", "Proposed Tool"]:
+        table = as_activity_table(project_steps.get(scenario))
+        digest.update(json.dumps([table.roles, table.stages, table.steps]).encode())
+        for values in (table.duration, table.active, table.duration_range, table.active_range):
+            digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    digest.update(fingerprint(rate_index, infra_totals, options).encode())
+    return digest.hexdigest()
+
+
+def run_simulation(project_steps, rate_index, infra_totals, num_samples=100_000, distribution="Triangular",
+                   default_spread=0.2, seed=None, max_workers=None):
+    """
+    Run the Monte Carlo simulation for both scenarios.
+
+    Args:
+        project_steps (dict): As stored in ``st.session_state.project_steps`` (keys "BAU" and "Proposed Tool"),
+            either as `ActivityTable` objects or as nested step dicts.
+        rate_index (dict): Hourly rate keyed by role, as returned by `calculator.build_rate_index`.
+        infra_totals (dict): Total infrastructure cost keyed by "BAU" and "Proposed Tool".
+        num_samples (int): Number of samples.
+        distribution (str): One of ``DISTRIBUTIONS``.
+        default_spread (float): Relative spread (0.2 = ±20%) applied to inputs without an explicit range.
+        seed (int, optional): Seed for reproducible results.
+        max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs; with 1 worker
+            (or a single chunk) the simulation runs in the current process.
+
+    Returns:
+        dict: For each scenario ("BAU", "Proposed Tool"), a DataFrame with one row per sample and the columns
+        "Duration (weeks)", "Person-Hours", "Cost ($)", "Time (months)" and "Cost per study ($)". The last two
+        are rounded as in the Social ROI table.
+    """
+    models = {
+        scenario: build_simulation_model(project_steps.get(scenario), rate_index, default_spread)
+        for scenario in ["BAU", "Proposed Tool"]
+    }
+
+    chunk_size = _chunk_size(models)
+    chunk_sizes = [chunk_size] * (num_samples // chunk_size)
+    if num_samples % chunk_size:
+        chunk_sizes.append(num_samples % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(chunk_sizes) == 1:
+        chunks = [_simulate_chunk(models, distribution, size, s) for size, s in zip(chunk_sizes, seeds)]
+    else:
+        executor = _get_executor(max_workers)
+        chunks = list(executor.map(_simulate_chunk, [models] * len(chunk_sizes), [distribution] * len(chunk_sizes),
+                                   chunk_sizes, seeds))
+
+    samples = {}
+    for scenario in models:
+        totals = {key: np.concatenate([chunk[scenario][key] for chunk in chunks]) for key in chunks[0][scenario]}
+        cost = totals["personnel_cost"] + infra_totals.get(scenario, 0)
+        samples[scenario] = pd.DataFrame({
+            "Duration (weeks)": totals["duration_weeks"],
+            "Person-Hours": totals["person_hours"],
+            "Cost ($)": cost,
+            "Time (months)": np.round(totals["roi_weeks"] / WEEKS_PER_MONTH, 1),
+            "Cost per study ($)": np.round(cost, 2)
+        })
+    return samples
+
+
+def summarize_simulation(samples, roi_params, fixed_costs, year=PROJECTION_YEARS):
+    """
+    Summarize simulated outputs as percentile bands.
+
+    Args:
+        samples (dict): As returned by `run_simulation`.
+        roi_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        fixed_costs (dict): Fixed 1-time setup cost keyed by "BAU" and "Proposed Tool".
+        year (int): Projection year at which Impact per $ is evaluated.
+
+    Returns:
+        pd.DataFrame: One row per output with its mean and percentiles.
+    """
+    bau, tool = samples["BAU"], samples["Proposed Tool"]
+    outputs = {
+        "Duration Saved vs BAU (weeks)": bau["Duration (weeks)"] - tool["Duration (weeks)"],
+        "Time Saved vs BAU (hrs)": bau["Person-Hours"] - tool["Person-Hours"],
+        "Cost Saved vs BAU ($)": bau["Cost ($)"] - tool["Cost ($)"]
+    }
+    for scenario, df in samples.items():
+        outputs[f"Impact per $ in Year {year} ({scenario})"] = _impact_per_dollar(
+            df, roi_params, fixed_costs[scenario], scenario, year
+        )["Impact per $ (Total cost)"]
+
+    summary = pd.DataFrame({
+        "Output": list(outputs),
+        "Mean": [np.mean(values) for values in outputs.values()]
+    })
+    bands = np.percentile(np.vstack([np.asarray(v) for v in outputs.values()]), PERCENTILES, axis=1)
+    for p, band in zip(PERCENTILES, bands):
+        summary[f"P{p}"] = band
+    return summary
+
+
+def compute_impact_bands(samples, roi_params, fixed_costs, horizon_years=PROJECTION_YEARS,
+                         metric="Impact per $ (Total cost)"):
+    """
+    Compute percentile bands of Impact per $ for every year of the projection.
+
+    Args:
+        samples (dict): As returned by `run_simulation`.
+        roi_params (dict): Social ROI parameters, as stored in ``st.session_state.roi_parameters``.
+        fixed_costs (dict): Fixed 1-time setup cost keyed by "BAU" and "Proposed Tool".
+        horizon_years (int): Number of years to project.
+        metric (str): "Impact per $ (Variable only)" or "Impact per $ (Total cost)".
+
+    Returns:
+        pd.DataFrame: One row per scenario and year with the percentiles in ``PERCENTILES``.
+    """
+    years = np.arange(1, horizon_years + 1)
+    tables = []
+    for scenario, df in samples.items():
+        # Years × samples at once, in blocks of years that stay within ``CHUNK_ELEMENT_BUDGET`` values
+        block = max(1, CHUNK_ELEMENT_BUDGET // max(1, len(df)))
+        bands = np.hstack([
+            np.percentile(
+                _impact_per_dollar(df, roi_params, fixed_costs[scenario], scenario,
+                                   years[start:start + block, np.newaxis])[metric],
+                PERCENTILES, axis=1
+            )
+            for start in range(0, horizon_years, block)
+        ]) if horizon_years > 0 else np.zeros((len(PERCENTILES), 0))
+        tables.append(pd.DataFrame({
+            "Scenario": scenario,
+            "Year": years,
+            **{f"P{p}": band for p, band in zip(PERCENTILES, bands)}
+        }))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def _impact_per_dollar(df, roi_params, fixed_cost, scenario, year):
+    """
+    Impact per $ of every sample of a scenario, with the Social ROI parameters held at their values. With an
+    array of years (shape ``(years, 1)``), one row per year.
+    """
+    params = {
+        # Per-student improvement as used by the ROI table (learning_sd × econ_per_sd)
+        "learning_sd": roi_params.get("computed_improvement", 0),
+        "econ_per_sd": 1.0,
+        "discovery_rate": roi_params.get("discovery_rate", 0),
+        "total_students": roi_params.get("total_students", 0),
+        "orgs_bau": roi_params.get("orgs_bau", 0),
+        "orgs_proposed": roi_params.get("orgs_proposed", 0),
+        "concurrent_studies": roi_params.get("concurrent_studies", 0)
+    }
+    return compute_impact_per_dollar(
+        params, df["Time (months)"].values, df["Cost per study ($)"].values, fixed_cost, scenario, year
+    )
@@ -1,9 +1,59 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import uuid
-import math
-import plotly.express as px
-from PIL import Image
+
+from calculator import (
+    HOURS_PER_WEEK,
+    PROJECTION_YEARS,
+    DEFAULT_STEPS,
+    PROJECT_STAGES,
+    ActivityTable,
+    build_infrastructure_table,
+    build_personnel_table,
+    build_rate_index,
+    compare_scenarios,
+    compute_cost_cube,
+    compute_personnel_summaries,
+    compute_roi_projection,
+    compute_roi_table,
+    compute_schedule,
+    compute_scheduled_durations,
+    compute_stage_cost_summary,
+    compute_stage_duration_summary,
+    compute_stage_time_summary,
+    get_infrastructure_total,
+    get_rate_index_key,
+    get_scenario_value,
+)
+from defaults import (
+    ASSUMPTIONS_TEMPLATE,
+    EXAMPLE_PERSONNEL_TEMPLATE,
+    INFRASTRUCTURE_TEMPLATE,
+    PERSONNEL_TEMPLATE,
+    new_activity_table,
+    new_rows,
+)
+from output_cache import OutputCache, fingerprint
+from memory import SESSION_MEMORY_BUDGET_MB, load_table, session_memory, spill_tables
+from profiling import ProfileHistory, RerunProfiler
+from simulation import DISTRIBUTIONS, compute_impact_bands, run_simulation, simulation_key, summarize_simulation
+from session_io import export_session, load_session
+from throughput import simulate_scenarios
+from sensitivity import (
+    INTEGER_PARAMETERS,
+    MAX_GRID_SIZE,
+    METRICS,
+    SWEEP_PARAMETERS,
+    build_sweep_ranges,
+    compute_heatmap,
+    compute_tornado,
+    grid_size,
+    run_sweep,
+)
+
+# --- Opt-in timing of this rerun's phases (enabled in the sidebar, shown at the bottom of the page) ---
+profiler = RerunProfiler(enabled=st.session_state.get("profile_reruns", False))
 
 # --- Page configuration ---
 st.set_page_config(
@@ -46,6 +96,7 @@ if "current_page" not in st.session_state:
     st.session_state.current_page = "Getting Started"
 
 # --- Sidebar Navigation ---
+profiler.start("sidebar")
 st.sidebar.title("Navigation")
 
 if st.sidebar.button("Getting Started", use_container_width=True):
@@ -67,6 +118,7 @@ st.sidebar.markdown("### 📊 Outputs")
 for page_name, subpages in PAGE_GROUPS["Outputs"].items():
     if st.sidebar.button(f"{page_name}", use_container_width=True):
         st.session_state.current_page = page_name
+profiler.stop("sidebar")
 
 
 # --- Helper functions ---
@@ -86,33 +138,525 @@ def go_first():
     st.session_state.current_page = PAGES[0]
 
 
+def cached_output(name, compute, *inputs):
+    """
+    Compute an output table, reusing the result of a previous rerun if its inputs have not changed.
+
+    Args:
+        name (str): Name of the output table.
+        compute (callable): Function computing the table from `inputs`.
+        *inputs: Inputs of the table (DataFrames or JSON-serializable values).
+
+    Returns:
+        The output of ``compute(*inputs)``, possibly from this session's cache.
+    """
+    if "output_cache" not in st.session_state:
+        st.session_state.output_cache = OutputCache()
+    with profiler.phase(f"compute: {name}"):
+        key = (name, fingerprint(*inputs))
+        return st.session_state.output_cache.get_or_compute(key, lambda: compute(*inputs))
+
+
+def scenario_table_key(name):
+    """Session state entry of the activities table of a scenario, read by the output pages."""
+    return f"df_{name.replace(' ', '_')}"
+
+
+def cost_cube(df_bau, df_tool):
+    """
+    Compute the person-hours and personnel cost per scenario, stage and role of BAU and the Proposed Tool, from
+    which the Project-Stage, Personnel and Social ROI tables are sliced (see `calculator.compute_cost_cube`).
+
+    Args:
+        df_bau (pd.DataFrame): Activities table for Business as Usual.
+        df_tool (pd.DataFrame): Activities table for the Proposed Tool.
+
+    Returns:
+        pd.DataFrame: The cost cube, computed once per change of the activities or hourly rates.
+    """
+    return cached_output(
+        "cost_cube", compute_cost_cube, {"BAU": df_bau, "Proposed Tool": df_tool}, st.session_state.rate_index
+    )
+
+
+def compare_all_scenarios(fixed_costs=None):
+    """
+    Compute the comparison tables of all scenarios in ``st.session_state.project_steps``.
+
+    Args:
+        fixed_costs (dict, optional): Fixed costs keyed by "BAU" and "Proposed Tool" (see
+            `calculator.compare_scenarios`).
+
+    Returns:
+        dict: Comparison tables keyed by name, as returned by `calculator.compare_scenarios`.
+    """
+    frames = {name: table.to_frame() for name, table in st.session_state.project_steps.items()}
+    return cached_output(
+        "scenario_comparison", compare_scenarios, frames, st.session_state.rate_index,
+        load_table(st.session_state, "df_infrastructure_costs"), st.session_state.get("roi_parameters", {}),
+        fixed_costs, st.session_state.scenario_bases, PROJECTION_YEARS, project_stages, scheduled_durations()
+    )
+
+
+def scheduled_durations():
+    """
+    Compute the project duration of every scenario with an enabled schedule (see `calculator.compute_schedule`).
+
+    Returns:
+        dict: Critical-path duration in weeks keyed by scenario name. Schedules that cannot be evaluated are
+        skipped with a warning.
+    """
+    durations = {}
+    for name, schedule in st.session_state.schedules.items():
+        try:
+            durations.update(compute_scheduled_durations(st.session_state.project_steps, {name: schedule}))
+        except ValueError as e:
+            st.warning(f"⚠️ The schedule of {name} is ignored: {e}")
+    return durations
+
+
+def simulate_staff_capacity(concurrent_studies):
+    """
+    Simulate the throughput of BAU and the Proposed Tool with the staff capacity of
+    ``st.session_state.staff_capacity`` (see `throughput.simulate_throughput`).
+
+    Args:
+        concurrent_studies (int): Maximum number of studies an organization runs at a time.
+
+    Returns:
+        dict: Result of `throughput.simulate_throughput` keyed by "BAU" and "Proposed Tool".
+    """
+    # Same activities as the ROI table: those of the Project Activities pages visited in this session
+    frames = {name: load_table(st.session_state, scenario_table_key(name))
+              for name in ("BAU", "Proposed Tool")}
+    tables = {name: st.session_state.project_steps[name] if len(frame) else ActivityTable()
+              for name, frame in frames.items()}
+    capacity = {role: st.session_state.staff_capacity["hours"].get(role, HOURS_PER_WEEK) for role in personnel_roles}
+    return cached_output(
+        "throughput", lambda _, *args: simulate_scenarios(tables, *args), frames, capacity, concurrent_studies,
+        PROJECTION_YEARS
+    )
+
+
+def spill_session_tables():
+    """
+    Keep this session within its memory budget by spilling its largest stored tables to disk (see
+    `memory.spill_tables`). The output pages read them back with `memory.load_table`.
+
+    A spilled activities table is also dropped from its `ActivityTable`, which rebuilds it when its Project
+    Activities page is shown again.
+    """
+    tables = {scenario_table_key(name): table for name, table in st.session_state.project_steps.items()}
+    for key in spill_tables(st.session_state, [*tables, "df_personnel_salaries", "df_infrastructure_costs"]):
+        if key in tables:
+            tables[key].release_frame()
+
+
 # --- Initialize session state for storing activity data ---
+profiler.start("session setup")
 if "project_steps" not in st.session_state:
     st.session_state.project_steps = {
-        "BAU": {},
-        "Proposed Tool": {}
+        "BAU": ActivityTable(),
+        "Proposed Tool": ActivityTable()
     }
 
+# --- Base scenario ("BAU" or "Proposed Tool") of each additional scenario ---
+if "scenario_bases" not in st.session_state:
+    st.session_state.scenario_bases = {}
+
+# --- Optional dependency schedule of each scenario (see `calculator.compute_schedule`) ---
+if "schedules" not in st.session_state:
+    st.session_state.schedules = {}
+
+# --- Optional staff capacity per role (hours per week), limiting concurrent studies on the Social ROI page ---
+if "staff_capacity" not in st.session_state:
+    st.session_state.staff_capacity = {"enabled": False, "hours": {}}
+
 # --- Example personnel list (from Personnel Salaries) ---
 if "personnel_rows" not in st.session_state:
-    st.session_state.personnel_rows = [
-        {"id": str(uuid.uuid4()), "Role": "Engineer", "Hourly Rate": 0.0,
-         "Notes": ""},
-        {"id": str(uuid.uuid4()), "Role": "Researcher", "Hourly Rate": 0.0, "Notes": ""},
-        {"id": str(uuid.uuid4()), "Role": "Project Manager", "Hourly Rate": 0.0,
-         "Notes": ""},
-    ]
+    st.session_state.personnel_rows = new_rows(PERSONNEL_TEMPLATE)
 personnel_roles = [p["Role"] for p in st.session_state.personnel_rows]
 
+# --- Role → hourly rate index shared by all cost calculations (rebuilt only when personnel change) ---
+rate_index_key = get_rate_index_key(st.session_state.personnel_rows)
+if st.session_state.get("rate_index_key") != rate_index_key:
+    st.session_state.rate_index = build_rate_index(st.session_state.personnel_rows)
+    st.session_state.rate_index_key = rate_index_key
+profiler.stop("session setup")
+
 # --- Project stages ---
-project_stages = [
-    "Data Agreements & Research Approvals",
-    "Data Collection & Access or Transfer",
-    "Study Design & Infrastructure Setup",
-    "Study Implementation & Monitoring",
-    "Data Modeling & Analysis",
-    "Reporting"
-]
+project_stages = PROJECT_STAGES
+
+# --- Keys of the Social ROI Parameters widgets, by parameter name ---
+ROI_WIDGET_KEYS = {
+    "learning_definition": "roi_learning_definition",
+    "learning_sd": "roi_learning_sd",
+    "econ_definition": "roi_econ_definition",
+    "econ_per_sd": "roi_econ_per_sd",
+    "discovery_rate": "roi_discovery_rate",
+    "total_students": "roi_total_students",
+    "total_investment": "roi_total_investment_k",
+    "orgs_bau": "roi_orgs_bau",
+    "orgs_proposed": "roi_orgs_proposed",
+    "concurrent_studies": "roi_concurrent_studies"
+}
+
+# --- Session state entries kept when a session file is loaded (navigation and display preferences) ---
+LOAD_KEEP_KEYS = {"current_page", "session_upload", "session_binary", "lazy_stages", "activity_edit_mode",
+                  "profile_reruns", "profile_history", "show_session_memory"}
+
+
+# --- Helper function to load an uploaded session file (file uploader callback) ---
+def load_uploaded_session():
+    """
+    Replaces the inputs of this session with those of the uploaded session file in a single operation.
+
+    All other session state (widget values, derived tables, cached outputs) is cleared, as with the Reset
+    button, and the derived input tables are rebuilt so the output pages can be opened directly. A file that
+    cannot be loaded leaves the session unchanged and shows an error.
+    """
+    uploaded = st.session_state.get("session_upload")
+    if uploaded is None:
+        return
+    try:
+        loaded = load_session(uploaded.getvalue())
+
+        # Widgets of the Social ROI Parameters page show the loaded values
+        widget_values = {}
+        for name, value in loaded.get("roi_parameters", {}).items():
+            if name in ROI_WIDGET_KEYS:
+                is_integer = name in INTEGER_PARAMETERS or name == "total_investment"
+                widget_values[ROI_WIDGET_KEYS[name]] = int(value) if is_integer else value
+
+        # Derived tables used by the output pages
+        derived = {}
+        if "personnel_rows" in loaded:
+            derived["df_personnel_salaries"] = build_personnel_table(loaded["personnel_rows"])
+        if "infrastructure_costs" in loaded:
+            derived["df_infrastructure_costs"] = build_infrastructure_table(loaded["infrastructure_costs"])
+        for section, table in loaded["project_steps"].items():
+            if len(table):
+                derived[scenario_table_key(section)] = table.to_frame()
+    except (KeyError, TypeError, ValueError) as e:
+        # Nothing is replaced: the session keeps its inputs
+        st.session_state.session_message = ("error", f"⚠️ Could not load {uploaded.name}: {e}")
+        return
+
+    for key in list(st.session_state.keys()):
+        if key not in LOAD_KEEP_KEYS:
+            del st.session_state[key]
+    for key, value in {**loaded, **widget_values, **derived}.items():
+        st.session_state[key] = value
+
+    st.session_state.session_message = ("success", f"✅ Loaded {uploaded.name}")
+
+
+# --- Helper function to render the steps of one project stage ---
+def render_stage_steps(table, section_name, stage):
+    """
+    Renders the editable steps of one project stage and writes the edits back into the activity table.
+
+    Args:
+        table (ActivityTable): The activity table of the section.
+        section_name (str): The name of the project activity section.
+        stage (str): The project stage to render.
+    """
+    roles = table.roles
+    for idx, i in enumerate(table.stage_rows(stage)):
+        row_id = table.ids[i]
+        st.markdown(
+            f"<span style='color:#FB754B; font-weight:bold;'>Step {idx + 1}</span>",
+            unsafe_allow_html=True
+        )
+
+        # Step Description and Notes
+        cols1 = st.columns([4, 4])
+        step = cols1[0].text_area("Step Description", value=table.steps[i],
+                                  key=f"{section_name}_{stage}_step_{row_id}", height=80)
+        notes = cols1[1].text_area("Notes", value=table.notes[i],
+                                   key=f"{section_name}_{stage}_notes_{row_id}", height=80)
+
+        # Duration
+        cols2 = st.columns([2])
+        duration = cols2[0].number_input(
+            "Total Duration (weeks)",
+            min_value=0.0,
+            step=1.0,
+            format="%.2f",
+            value=float(table.duration[i]),
+            key=f"{section_name}_{stage}_dur_{row_id}"
+        )
+
+        # Active time per role
+        st.markdown(
+            "<span style='color:#E8886E; font-style:italic;'>% Active Time Spent per Role</span>",
+            unsafe_allow_html=True
+        )
+        active = [0.0] * len(roles)
+        roles_per_row = 5
+        for k in range(0, len(roles), roles_per_row):
+            role_subset = roles[k:k + roles_per_row]
+            cols = st.columns(roles_per_row)
+            for j, role in enumerate(role_subset):
+                with cols[j]:
+                    active[k + j] = st.number_input(
+                        role,
+                        min_value=0.0,
+                        step=1.0,
+                        value=float(table.active[i, k + j]),
+                        format="%.2f",
+                        key=f"{section_name}_{stage}_{role}_{row_id}"
+                    )
+            # Fill remaining columns for layout
+            for j in range(len(role_subset), roles_per_row):
+                with cols[j]:
+                    st.markdown("")
+
+        table.update(i, step, notes, duration, active)
+
+        # Optional uncertainty ranges (used by the uncertainty analysis on the Social ROI page)
+        if st.checkbox("Specify uncertainty range", value=table.has_range(i),
+                       key=f"{section_name}_{stage}_unc_{row_id}"):
+            low, high = table.duration_range[i] if table.has_range(i) else (duration, duration)
+            cols3 = st.columns([1, 1, 2])
+            duration_range = [
+                cols3[0].number_input("Lowest Duration (weeks)", min_value=0.0, step=1.0, format="%.2f",
+                                      value=float(low), key=f"{section_name}_{stage}_dur_low_{row_id}"),
+                cols3[1].number_input("Highest Duration (weeks)", min_value=0.0, step=1.0, format="%.2f",
+                                      value=float(high), key=f"{section_name}_{stage}_dur_high_{row_id}")
+            ]
+
+            active_range = []
+            for k in range(0, len(roles), roles_per_row):
+                role_subset = roles[k:k + roles_per_row]
+                cols = st.columns(roles_per_row)
+                for j, role in enumerate(role_subset):
+                    low, high = table.active_range[i, k + j]
+                    if np.isnan(low):
+                        low, high = active[k + j], active[k + j]
+                    with cols[j]:
+                        active_range.append([
+                            st.number_input(f"{role} lowest (%)", min_value=0.0, step=1.0, format="%.2f",
+                                            value=float(low),
+                                            key=f"{section_name}_{stage}_{role}_low_{row_id}"),
+                            st.number_input(f"{role} highest (%)", min_value=0.0, step=1.0, format="%.2f",
+                                            value=float(high),
+                                            key=f"{section_name}_{stage}_{role}_high_{row_id}")
+                        ])
+            table.set_range(i, duration_range, np.array(active_range).reshape(len(roles), 2))
+        else:
+            table.clear_range(i)
+
+        # Delete step button
+        if st.button("❌ Delete", key=f"del_{section_name}_{stage}_{row_id}"):
+            table.delete(row_id)
+            st.rerun()
+
+        st.markdown("---")
+
+    # Add new step button
+    if st.button(f"➕ Add Step to {stage}", key=f"add_{section_name}_{stage}"):
+        table.append(stage)
+        st.rerun()
+
+
+# --- Helper function to render the steps of one project stage as a single editable table ---
+def render_stage_grid(table, section_name, stage):
+    """
+    Renders the steps of one project stage as one steps × roles table. Edits are committed to the activity
+    table in one operation when the user saves them.
+
+    Args:
+        table (ActivityTable): The activity table of the section.
+        section_name (str): The name of the project activity section.
+        stage (str): The project stage to render.
+    """
+    roles = table.roles
+    rows = table.stage_rows(stage)
+    grid = pd.DataFrame({
+        "id": [table.ids[i] for i in rows],
+        "Step": [table.steps[i] for i in rows],
+        "Notes": [table.notes[i] for i in rows],
+        "Total Duration (weeks)": table.duration[rows],
+        **{role: table.active[rows, j] for j, role in enumerate(roles)}
+    })
+
+    editor_key = f"{section_name}_{stage}_grid"
+    with st.form(f"{editor_key}_form", border=False):
+        edited = st.data_editor(
+            grid,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key=editor_key,
+            column_config={
+                "id": None,  # Hidden; identifies existing steps
+                "Step": st.column_config.TextColumn("Step Description"),
+                "Notes": st.column_config.TextColumn("Notes"),
+                "Total Duration (weeks)": st.column_config.NumberColumn(min_value=0.0, format="%.2f"),
+                **{role: st.column_config.NumberColumn(f"{role} (% active)", min_value=0.0, format="%.2f")
+                   for role in roles}
+            }
+        )
+        if st.form_submit_button(f"💾 Save changes to {stage}"):
+            edited = edited.fillna(
+                {"Step": "", "Notes": "", "Total Duration (weeks)": 0.0, **dict.fromkeys(roles, 0.0)}
+            )
+            table.replace_stage(
+                stage,
+                edited["Step"].tolist(),
+                edited["Notes"].tolist(),
+                edited["Total Duration (weeks)"].to_numpy(dtype=float),
+                edited[roles].to_numpy(dtype=float),
+                step_ids=edited["id"].tolist()
+            )
+            del st.session_state[editor_key]  # Start the next edit from the saved table
+            st.rerun()
+
+
+# --- Helper function to render the optional dependency schedule of a section ---
+def render_schedule(table, section_name):
+    """
+    Renders the schedule of a project activity section: the stages and steps each stage or step starts after,
+    and the resulting critical path. When the schedule is enabled, the Social ROI page uses the critical path
+    as the duration of a research study.
+
+    Args:
+        table (ActivityTable): The activity table of the section.
+        section_name (str): The name of the project activity section.
+    """
+    schedule = st.session_state.schedules.get(section_name, {})
+    st.markdown(
+        """
+        By default, the stages run one after the other and the steps within a stage run in parallel. Describe 
+        which stages or steps can only start after others; the project then takes as long as its longest chain of 
+        dependent steps (the **critical path**).""")
+    enabled = st.toggle(
+        "Use this schedule for the Social ROI",
+        value=schedule.get("enabled", False),
+        key=f"{section_name}_schedule_enabled",
+        help="When on, the time of a research study on the Social ROI page is the critical path of this schedule."
+    )
+    if enabled != schedule.get("enabled", False):
+        schedule = st.session_state.schedules[section_name] = {**schedule, "enabled": enabled}
+
+    def selected(values):
+        """Selected options of a multiselect cell (None when empty)."""
+        return [] if values is None else list(values)
+
+    stage_dependencies = schedule.get("stages", {})
+    step_dependencies = schedule.get("steps", {})
+    labels = {step_id: f"{k + 1}. {step or '(unnamed step)'}" for k, (step_id, step) in
+              enumerate(zip(table.ids, table.steps))}
+    stage_grid = pd.DataFrame({
+        "Stage": project_stages,
+        "Starts after": [stage_dependencies.get(stage, project_stages[k - 1:k])
+                         for k, stage in enumerate(project_stages)]
+    })
+    step_grid = pd.DataFrame({
+        "id": table.ids,
+        "Step": list(labels.values()),
+        "Stage": table.stages,
+        "Duration (weeks)": table.duration,
+        "Starts after": [[d for d in step_dependencies.get(step_id, []) if d in labels] for step_id in table.ids]
+    })
+
+    with st.form(f"{section_name}_schedule_form", border=False):
+        st.markdown("##### Stages")
+        edited_stages = st.data_editor(
+            stage_grid,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Stage"],
+            key=f"{section_name}_schedule_stages",
+            column_config={"Starts after": st.column_config.MultiselectColumn(
+                options=project_stages, help="Stages that must finish before this stage starts (none: week 0)."
+            )}
+        )
+        st.markdown("##### Steps")
+        edited_steps = st.data_editor(
+            step_grid,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["Step", "Stage", "Duration (weeks)"],
+            key=f"{section_name}_schedule_steps",
+            column_config={
+                "id": None,  # Hidden; identifies the steps
+                "Starts after": st.column_config.MultiselectColumn(
+                    options=table.ids, format_func=labels.get,
+                    help="Steps of any stage that must finish before this step starts (none: when its stage starts)."
+                )
+            }
+        )
+        if st.form_submit_button("💾 Save schedule"):
+            new_schedule = {
+                "enabled": enabled,
+                "stages": {stage: selected(deps) for stage, deps in zip(project_stages, edited_stages["Starts after"])},
+                "steps": {step_id: selected(deps) for step_id, deps in zip(table.ids, edited_steps["Starts after"])
+                          if selected(deps)}
+            }
+            try:
+                compute_schedule(table, new_schedule)
+            except ValueError as e:
+                st.error(f"⚠️ {e}. The schedule was not saved.")
+            else:
+                st.session_state.schedules[section_name] = new_schedule
+                del st.session_state[f"{section_name}_schedule_stages"]  # Start the next edit from the saved schedule
+                del st.session_state[f"{section_name}_schedule_steps"]
+                st.rerun()
+
+    # --- Critical path ---
+    try:
+        result = compute_schedule(table, schedule)
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+        return
+    col1, col2 = st.columns(2)
+    col1.metric("Project duration (critical path)", f"{result['duration_weeks']:.1f} weeks")
+    col2.metric("Without dependencies (stages in sequence, steps in parallel)",
+                f"{compute_schedule(table)['duration_weeks']:.1f} weeks")
+
+    steps = result["steps"].assign(Step=list(labels.values()))
+    if 0 < len(steps) <= 300:
+        import plotly.express as px  # Deferred until a chart is drawn (see "Fast start" in the README)
+        fig = px.bar(
+            steps,
+            x="Duration (weeks)",
+            base="Start (week)",
+            y="Step",
+            color="Critical",
+            orientation="h",
+            color_discrete_map={True: "#E8886E", False: "#9DB4C0"},
+            hover_data=["Stage", "Start (week)", "Finish (week)", "Slack (weeks)"],
+            title="Schedule (critical steps highlighted)"
+        )
+        fig.update_yaxes(autorange="reversed", title=None)
+        fig.update_xaxes(title="Week")
+        st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(steps.drop(columns="id"), use_container_width=True, hide_index=True)
+
+
+# --- Helper function to copy the schedule of a section along with its steps ---
+def copy_schedule(source_section, target_section):
+    """
+    Copy the schedule of a source section to a target section whose steps were just copied from it (with new
+    ids, in the same order).
+
+    Args:
+        source_section (str): Name of the section to copy from.
+        target_section (str): Name of the section to copy to.
+    """
+    schedule = st.session_state.schedules.get(source_section)
+    if not schedule:
+        st.session_state.schedules.pop(target_section, None)
+        return
+    new_ids = dict(zip(st.session_state.project_steps[source_section].ids,
+                       st.session_state.project_steps[target_section].ids))
+    st.session_state.schedules[target_section] = {
+        **schedule,
+        "steps": {new_ids[step_id]: [new_ids[d] for d in deps if d in new_ids]
+                  for step_id, deps in schedule.get("steps", {}).items() if step_id in new_ids}
+    }
 
 
 # --- Helper function to render project activity sections ---
@@ -129,226 +673,82 @@ def render_activity_section(section_name):
         - Displays an expander for each stage
         - Allows editing of step description, notes, duration, and role-based active time
         - Provides buttons to add or delete steps
-        - Collects all data into a consolidated preview table
+    Finally, it displays the consolidated preview table built from the stored activity table.
+
+    In lazy mode, only the widgets of expanded stages are rendered; collapsed stages keep their stored values.
+    In table mode, each stage is edited as one steps × roles table instead of one input per value.
     """
+    table = st.session_state.project_steps[section_name]
+    if not len(table) and not table.initialized_stages:
+        # First time the section is shown: start from the default steps shared by all sessions
+        table = st.session_state.project_steps[section_name] = new_activity_table(personnel_roles, project_stages)
+    table.set_roles(personnel_roles)  # Align role columns with the Personnel Costs page
 
-    # List to collect all preview data
-    all_preview_data = []
-    st.markdown("#### Project Stages ####")
+    # Prefill stage-specific steps the first time a stage is shown (default: one empty step)
     for stage in project_stages:
-        with st.expander(stage, expanded=False):
-            # Initialize stage in session_state if empty
-            if stage not in st.session_state.project_steps[section_name]:
-                st.session_state.project_steps[section_name][stage] = []
-
-                # Prefill stage-specific steps
-                if stage == 'Data Agreements & Research Approvals':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Drafting agreements, review, executing DSAs and DUAs",
-                            "Notes": "",
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        },
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Researchers to complete IRB requirements",
-                            "Notes": "",
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        },
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Consenting Participants",
-                            "Notes": ("e.g. Obtaining consent from users / students using the curriculum "
-                                      "platform through ToS, pop-up or checkbox, or another form of notification"),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                elif stage == 'Data Collection & Access or Transfer':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Data Collection, Documentation, Anonymization (Data setup)",
-                            "Notes": ("e.g. Collecting individual observations, querying, verification, "
-                                      "troubleshooting, anonymization, and documentation"),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        },
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Secure data access / transfer to researchers",
-                            "Notes": ("e.g. District may share data via secure file storage. Requires account setup, "
-                                      "permissions, VPN configuration, and validation."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                elif stage == 'Study Design & Infrastructure Setup':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Data Prep and Exploration",
-                            "Notes": ("e.g. Review, clean, merge, validate datasets; run power calculations, "
-                                      "determine randomization strategy."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        },
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Data preparation to implement the study",
-                            "Notes": ("e.g. Prepare content or implement feature changes for A/B testing: "
-                                      "update database, UI, variants."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        },
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Infrastructure setup for experiment execution",
-                            "Notes": ("e.g. Setup database, pipelines, dashboards, integrate content, QA, "
-                                      "documentation, training."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                elif stage == 'Study Implementation & Monitoring':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Run the study",
-                            "Notes": ("e.g. Run pilot study, scale, monitor, and share periodic data."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                elif stage == 'Data Modeling & Analysis':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Analysis & QA",
-                            "Notes": ("e.g. Verify experiment, run statistical/ML analyses, interpret findings, "
-                                      "produce descriptives/graphs."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                elif stage == 'Reporting':
-                    st.session_state.project_steps[section_name][stage] = [
-                        {
-                            "id": str(uuid.uuid4()),
-                            "Step": "Report writing & communications",
-                            "Notes": (
-                                "e.g. Setup dashboards, publish reports, disseminate findings, propose next steps."),
-                            "Duration": 0.0,
-                            "Roles": {r: 0.0 for r in personnel_roles}
-                        }
-                    ]
-                else:
-                    # Default empty step
-                    st.session_state.project_steps[section_name][stage] = [{
-                        "id": str(uuid.uuid4()),
-                        "Step": "",
-                        "Notes": "",
-                        "Duration": 0.0,
-                        "Roles": {r: 0.0 for r in personnel_roles}
-                    }]
-
-            # --- Render all rows for the current stage ---
-            rows = st.session_state.project_steps[section_name][stage]
-
-            for idx, row in enumerate(rows.copy()):
-                st.markdown(
-                    f"<span style='color:#FB754B; font-weight:bold;'>Step {idx + 1}</span>",
-                    unsafe_allow_html=True
-                )
+        if stage not in table.initialized_stages:
+            table.initialized_stages.add(stage)
+            for step, notes in DEFAULT_STEPS.get(stage, [("", "")]):
+                table.append(stage, step, notes)
 
-                # Step Description and Notes
-                cols1 = st.columns([4, 4])
-                row["Step"] = cols1[0].text_area("Step Description", value=row.get("Step", ""),
-                                                 key=f"{section_name}_{stage}_step_{row['id']}", height=80)
-                row["Notes"] = cols1[1].text_area("Notes", value=row.get("Notes", ""),
-                                                  key=f"{section_name}_{stage}_notes_{row['id']}", height=80)
-
-                # Duration
-                cols2 = st.columns([2])
-                row["Duration"] = cols2[0].number_input(
-                    "Total Duration (weeks)",
-                    min_value=0.0,
-                    step=1.0,
-                    format="%.2f",
-                    value=row.get("Duration", 0.0),
-                    key=f"{section_name}_{stage}_dur_{row['id']}"
-                )
-
-                # Active time per role
-                st.markdown(
-                    "<span style='color:#E8886E; font-style:italic;'>% Active Time Spent per Role</span>",
-                    unsafe_allow_html=True
-                )
-                time_data = {}
-                roles_per_row = 5
-                for i in range(0, len(personnel_roles), roles_per_row):
-                    role_subset = personnel_roles[i:i + roles_per_row]
-                    cols = st.columns(roles_per_row)
-                    for j, role in enumerate(role_subset):
-                        with cols[j]:
-                            time_data[role] = st.number_input(
-                                role,
-                                min_value=0.0,
-                                step=1.0,
-                                value=row.get("Roles", {}).get(role, 0.0),
-                                format="%.2f",
-                                key=f"{section_name}_{stage}_{role}_{row['id']}"
-                            )
-                    # Fill remaining columns for layout
-                    for j in range(len(role_subset), roles_per_row):
-                        with cols[j]:
-                            st.markdown("")
-
-                row["Roles"] = time_data
-
-                # Delete step button
-                if st.button("❌ Delete", key=f"del_{section_name}_{stage}_{row['id']}"):
-                    st.session_state.project_steps[section_name][stage] = [
-                        r for r in rows if r["id"] != row["id"]
-                    ]
-                    st.rerun()
-
-                st.markdown("---")
-
-            # Add new step button
-            if st.button(f"➕ Add Step to {stage}", key=f"add_{section_name}_{stage}"):
-                st.session_state.project_steps[section_name][stage].append({
-                    "id": str(uuid.uuid4()),
-                    "Step": "",
-                    "Notes": "",
-                    "Duration": 0.0,
-                    "Roles": {r: 0.0 for r in personnel_roles}
-                })
-                st.rerun()
+    st.markdown("#### Project Stages ####")
+    lazy = st.toggle(
+        "Only render expanded stages",
+        value=st.session_state.get("lazy_stages", False),
+        key=f"{section_name}_lazy_stages",
+        help="Recommended for projects with many steps or roles: the inputs of a stage are only loaded when "
+             "its section is expanded, which keeps the page responsive."
+    )
+    st.session_state.lazy_stages = lazy  # Shared by both activity pages
+
+    edit_modes = ["Step by step", "Table (bulk edit)"]
+    edit_mode = st.radio(
+        "Editing mode",
+        options=edit_modes,
+        index=edit_modes.index(st.session_state.get("activity_edit_mode", edit_modes[0])),
+        horizontal=True,
+        key=f"{section_name}_edit_mode",
+        help="Table mode shows each stage as one table of steps × roles. Add or delete rows in the table, "
+             "then save the stage to apply all changes at once."
+    )
+    st.session_state.activity_edit_mode = edit_mode  # Shared by both activity pages
+    render_stage = render_stage_grid if edit_mode == edit_modes[1] else render_stage_steps
 
-            # Collect all stage data for final preview
-            for r in st.session_state.project_steps[section_name][stage]:
-                for role, active_time in r["Roles"].items():
-                    all_preview_data.append({
-                        "Stage": stage,
-                        "Step": r["Step"],
-                        "Notes": r["Notes"],
-                        "Total Duration (weeks)": r["Duration"],
-                        "Role": role,
-                        "Active Time Spent (%)": active_time
-                    })
+    for stage in project_stages:
+        with profiler.phase(f"stage: {stage}"):
+            if lazy:
+                expander = st.expander(stage, expanded=False, key=f"{section_name}_{stage}_expander",
+                                       on_change="rerun")
+                if expander.open:
+                    with expander:
+                        render_stage(table, section_name, stage)
+            else:
+                with st.expander(stage, expanded=False):
+                    render_stage(table, section_name, stage)
+
+    # --- Optional schedule (dependencies between stages and steps) ---
+    with profiler.phase("schedule"):
+        if lazy:
+            expander = st.expander("🗓️ Schedule (optional)", expanded=False,
+                                   key=f"{section_name}_schedule_expander", on_change="rerun")
+            if expander.open:
+                with expander:
+                    render_schedule(table, section_name)
+        else:
+            with st.expander("🗓️ Schedule (optional)", expanded=False):
+                render_schedule(table, section_name)
 
     # --- Render final consolidated preview table ---
-    if all_preview_data:
-        st.markdown(f"#### {section_name} Activities Table ####")
-        df = pd.DataFrame(all_preview_data)
-        st.dataframe(df, use_container_width=True)
+    # Edits patch only the edited step's rows of the stored table; its revision tells the output pages
+    # whether their cached results are still valid
+    with profiler.phase("activities table"):
+        df = table.to_frame()
+        if not df.empty:
+            st.markdown(f"#### {section_name} Activities Table ####")
+            st.dataframe(df, use_container_width=True)
 
-        # Save final table in session_state for computations
-        st.session_state[f"df_{section_name.replace(' ', '_')}"] = df
+            # Save final table in session_state for computations
+            st.session_state[scenario_table_key(section_name)] = df
 
 
 # --- Helper function to copy all project activities from BAU to proposed tool (on button click)---
@@ -357,7 +757,7 @@ def copy_from_section(source_section, target_section):
     Copy all project steps from a source section to a target section.
 
     Each step in the target section receives a **new UUID**, while preserving
-    Step description, Notes, Duration, and Roles.
+    Step description, Notes, Duration, Roles, and any uncertainty ranges.
 
     Args:
         source_section (str): Name of the section to copy from.
@@ -369,108 +769,15 @@ def copy_from_section(source_section, target_section):
         - Warns if the source section has no data.
     """
     if source_section in st.session_state.project_steps:
-        # Initialize target section as empty
-        st.session_state.project_steps[target_section] = {}
-
-        # Copy each stage and its steps
-        for stage, steps in st.session_state.project_steps[source_section].items():
-            copied_steps = []
-            for step in steps:
-                copied_steps.append({
-                    "id": str(uuid.uuid4()),  # Assign a new unique ID
-                    "Step": step["Step"],
-                    "Notes": step["Notes"],
-                    "Duration": step["Duration"],
-                    "Roles": step["Roles"].copy()  # Ensure roles dictionary is copied
-                })
-            st.session_state.project_steps[target_section][stage] = copied_steps
+        # Replace the target section with a copy of the source section (new ids for every step)
+        st.session_state.project_steps[target_section] = st.session_state.project_steps[source_section].copy()
+        copy_schedule(source_section, target_section)
 
         st.success(f"✅ All values copied from {source_section} to {target_section}!")
     else:
         st.warning(f"⚠️ No data found in {source_section} to copy.")
 
 
-def compute_projection(
-        scenario_name,
-        time_months,
-        cost_per_study,
-        impact_per_study,
-        fixed_cost,
-        num_orgs,
-        num_concurrent_projects=1
-):
-    """
-    Computes a 50-year projection of costs, impact, and ROI for a research scenario.
-
-    Args:
-    - scenario_name (str): Name of the scenario (e.g., "Business as Usual", "Proposed Tool").
-    - time_months (float): Duration of a single study in months.
-    - cost_per_study (float): Variable cost per study.
-    - impact_per_study (float): Impact (in $) per study.
-    - fixed_cost (float): Fixed 1-time setup cost for the scenario.
-    - num_orgs (int): Number of organizations conducting studies.
-    - num_concurrent_projects (int, default=1): Number of studies each org runs concurrently.
-
-    Returns:
-    - projection_data (list of dict): List containing annual projections of costs, impact, and ROI.
-    """
-
-    projection_data = []
-    for year in range(1, 51):  # 50-year projection
-        total_months = year * 12
-
-        # Compute number of studies each organization can conduct in this year
-        if time_months > 0:
-            studies_each_org = math.floor(total_months * num_concurrent_projects / time_months)
-        else:
-            studies_each_org = 0  # Avoid division by zero
-
-        # Compute costs
-        variable_cost = cost_per_study * studies_each_org * num_orgs
-        total_cost = variable_cost + fixed_cost
-
-        # Compute total impact
-        impact = impact_per_study * studies_each_org * num_orgs
-
-        # Compute ROI
-        roi_excl_fc = impact / variable_cost if variable_cost > 0 else 0
-        roi_incl_fc = impact / total_cost if total_cost > 0 else 0
-
-        # Append data for this year
-        projection_data.append({
-            "Scenario": scenario_name,
-            "Year": year,
-            "# of studies per org": studies_each_org,
-            "Fixed Cost ($)": fixed_cost,
-            "Variable Cost ($)": variable_cost,
-            "Total Cost ($)": total_cost,
-            "Impact ($)": impact,
-            "Impact per $ (Variable only)": roi_excl_fc,
-            "Impact per $ (Total cost)": roi_incl_fc
-        })
-
-    return projection_data
-
-
-# Extract scenario values from ROI summary
-def get_scenario_value(scenario, col):
-    """
-    Retrieve a specific value from the ROI dataframe for a given scenario.
-
-    Args:
-        scenario (str): The name of the scenario to look up in the "Scenario" column of `roi_df`.
-        col (str): The name of the column from which to retrieve the value.
-
-    Returns:
-        The value from the specified column for the matching scenario.
-        Returns 0 if the scenario or column is not found, or if any error occurs.
-    """
-    try:
-        return roi_df.loc[roi_df["Scenario"] == scenario, col].values[0]
-    except:
-        return 0
-
-
 page = st.session_state.current_page
 
 st.markdown(
@@ -484,6 +791,8 @@ st.markdown(
 # =========================================================
 # =========================================================
 
+profiler.start("page body")
+
 # =========================================================
 #  Getting Started PAGE
 # =========================================================
@@ -624,13 +933,7 @@ elif page == "Personnel Costs":
 
     # Fill default rows if empty
     if len(st.session_state.personnel_rows) == 0:
-        st.session_state.personnel_rows = [
-            {"id": str(uuid.uuid4()), "Role": "Engineer", "Hourly Rate": 65.0,
-             "Notes": "e.g. Software or Data Engineer"},
-            {"id": str(uuid.uuid4()), "Role": "Researcher", "Hourly Rate": 25.0, "Notes": "e.g. PhD student"},
-            {"id": str(uuid.uuid4()), "Role": "Project Manager", "Hourly Rate": 48.0,
-             "Notes": "e.g. Partnerships or research manager"},
-        ]
+        st.session_state.personnel_rows = new_rows(EXAMPLE_PERSONNEL_TEMPLATE)
 
     rows = st.session_state.personnel_rows
 
@@ -677,7 +980,7 @@ elif page == "Personnel Costs":
 
     # Display summary
     st.write("#### Personnel Costs Table")
-    personnel_salaries_df = pd.DataFrame(st.session_state.personnel_rows).drop(columns="id")
+    personnel_salaries_df = build_personnel_table(st.session_state.personnel_rows)
     st.dataframe(personnel_salaries_df, use_container_width=True)
     st.session_state[f"df_personnel_salaries"] = personnel_salaries_df
 
@@ -739,8 +1042,57 @@ elif page == "Proposed Tool":
         number of research projects completed within a given time period. """
     )
 
-    # --- Collapsible section using expander ---
+    # --- Additional scenarios (other candidate tools or staffing plans) ---
     st.markdown("<br>", unsafe_allow_html=True)
+    additional_scenarios = [name for name in st.session_state.project_steps if name not in ("BAU", "Proposed Tool")]
+    with st.expander("🧪 Additional Scenarios"):
+        st.markdown(
+            """
+            Describe other candidate tools or staffing plans as additional scenarios, to compare and rank all 
+            scenarios on the output pages. A new scenario starts as a copy of the activities of the scenario it is 
+            based on, and uses that scenario's infrastructure costs, number of organizations and fixed cost.""")
+        cols = st.columns([3, 2, 1])
+        new_name = cols[0].text_input("Scenario name", key="new_scenario_name")
+        new_base = cols[1].selectbox("Based on", options=["Proposed Tool", "BAU"], key="new_scenario_base")
+        if cols[2].button("➕ Add Scenario", key="add_scenario"):
+            new_name = new_name.strip()
+            # The activities table of the scenario must not replace another stored table (e.g. "Proposed_Tool"
+            # would replace that of "Proposed Tool", and "personnel salaries" the personnel table)
+            used_keys = {scenario_table_key(name) for name in st.session_state.project_steps}
+            used_keys |= {key for key in st.session_state.keys() if str(key).startswith("df_")}
+            used_keys |= {"df_personnel_salaries", "df_infrastructure_costs"}
+            if not new_name or new_name in st.session_state.project_steps or scenario_table_key(new_name) in used_keys:
+                st.warning("⚠️ Please enter a name that is not used by another scenario or table.")
+            else:
+                st.session_state.project_steps[new_name] = st.session_state.project_steps[new_base].copy()
+                copy_schedule(new_base, new_name)
+                st.session_state.scenario_bases[new_name] = new_base
+                st.session_state.edited_scenario = new_name
+                st.rerun()
+
+        for name in additional_scenarios:
+            cols = st.columns([3, 2, 1])
+            cols[0].markdown(f"**{name}**")
+            cols[1].markdown(f"Based on: {st.session_state.scenario_bases.get(name, 'Proposed Tool')}")
+            if cols[2].button("❌ Delete", key=f"del_scenario_{name}"):
+                del st.session_state.project_steps[name]
+                st.session_state.scenario_bases.pop(name, None)
+                st.session_state.schedules.pop(name, None)
+                st.session_state.pop(scenario_table_key(name), None)
+                st.rerun()
+
+    # --- Scenario edited on this page ---
+    scenario_options = ["Proposed Tool"] + additional_scenarios
+    edited_scenario = st.session_state.get("edited_scenario", "Proposed Tool")
+    if edited_scenario not in scenario_options:
+        edited_scenario = "Proposed Tool"
+    if additional_scenarios:
+        edited_scenario = st.selectbox(
+            "Scenario to edit", options=scenario_options, index=scenario_options.index(edited_scenario)
+        )
+    st.session_state.edited_scenario = edited_scenario
+
+    # --- Collapsible section using expander ---
     with st.expander("📋 Pre-Fill estimates from Business as Usual"):
         st.markdown(
             """
@@ -759,10 +1111,12 @@ elif page == "Proposed Tool":
 
         # Act only if user selects Yes
         if choice == "Yes":
-            copy_from_section("BAU", "Proposed Tool")
+            copy_from_section("BAU", edited_scenario)
     st.markdown("---")
 
-    render_activity_section("Proposed Tool")
+    if edited_scenario != "Proposed Tool":
+        st.markdown(f"### Scenario: *{edited_scenario}* ###")
+    render_activity_section(edited_scenario)
 
 # =========================================================
 #  ROI PARAMETERS PAGE
@@ -797,6 +1151,7 @@ elif page == "Social ROI Parameters":
         learning_definition = st.text_input(
             "Primary outcome used to evaluate research project impact",
             value="Standardized math scores in middle school",
+            key="roi_learning_definition",
             help="Specify the outcome that a research project supported by the proposed tool is evaluated on to "
                  "measure effectiveness or success. "
         )
@@ -821,7 +1176,8 @@ elif page == "Social ROI Parameters":
         econ_definition = st.text_input(
             "Long-term Earnings Impact",
             help="Specify the long-term earnings impact that the primary outcome influences",
-            value="Income at age 30"
+            value="Income at age 30",
+            key="roi_econ_definition"
         )
     with col2:
         econ_per_sd = st.number_input(
@@ -972,9 +1328,7 @@ elif page == "Assumptions":
 
     # Initialize session state
     if "assumptions" not in st.session_state:
-        st.session_state.assumptions = [
-            {"id": str(uuid.uuid4()), "Assumption": "e.g., A/B testing on the platform runs for 4 weeks."}
-        ]
+        st.session_state.assumptions = new_rows(ASSUMPTIONS_TEMPLATE)
 
     # Display and edit assumptions
     rows = st.session_state.assumptions
@@ -1037,36 +1391,7 @@ elif page == "Infrastructure Costs":
 
     # --- Initialize with prefilled categories but no costs ---
     if "infrastructure_costs" not in st.session_state:
-        st.session_state.infrastructure_costs = [
-            {
-                "id": str(uuid.uuid4()),
-                "Cost Category": "Integration Costs",
-                "Business as Usual ($)": 0.0,
-                "Proposed Tool ($)": 0.0,
-                "Notes": "e.g. Proposed tool requires API integration with the organization's codebase."
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "Cost Category": "Software Licenses",
-                "Business as Usual ($)": 0.0,
-                "Proposed Tool ($)": 0.0,
-                "Notes": "e.g. Researchers require Stata for analysis."
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "Cost Category": "Compute Resources",
-                "Business as Usual ($)": 0.0,
-                "Proposed Tool ($)": 0.0,
-                "Notes": "e.g. Researchers require GPUs for big data analysis."
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "Cost Category": "Storage",
-                "Business as Usual ($)": 0.0,
-                "Proposed Tool ($)": 0.0,
-                "Notes": "e.g. Researchers require cloud storage for data access."
-            }
-        ]
+        st.session_state.infrastructure_costs = new_rows(INFRASTRUCTURE_TEMPLATE)
 
     # --- Editable Cost Inputs ---
     rows = st.session_state.infrastructure_costs
@@ -1129,21 +1454,8 @@ elif page == "Infrastructure Costs":
         })
         st.rerun()
 
-    # --- Convert to DataFrame ---
-    df_infra = pd.DataFrame(st.session_state.infrastructure_costs).drop(columns="id")
-
-    # --- Compute totals ---
-    total_bau = df_infra["Business as Usual ($)"].sum()
-    total_tool = df_infra["Proposed Tool ($)"].sum()
-
-    # --- Add a Total row ---
-    total_row = pd.DataFrame({
-        "Cost Category": ["Total"],
-        "Business as Usual ($)": [total_bau],
-        "Proposed Tool ($)": [total_tool]
-    })
-
-    df_combined = pd.concat([df_infra, total_row], ignore_index=True)
+    # --- Convert to DataFrame with a Total row ---
+    df_combined = build_infrastructure_table(st.session_state.infrastructure_costs)
 
     # --- Display combined table ---
     st.markdown("#### Infrastructure Costs Table ####")
@@ -1158,205 +1470,24 @@ elif page == "Infrastructure Costs":
 elif page == "Project-Stage Efficiency Gains":
     st.header("📊 Project-Stage Efficiency Gains")
 
-
-    # --- Helper function to compute total person-hours per stage ---
-    def compute_total_time(df):
-        """
-        Compute total person-hours per stage from a dataframe of activity estimates.
-
-        Args:
-            df (pd.DataFrame): A dataframe containing the following columns:
-                - "Stage": Name of the project stage.
-                - "Total Duration (weeks)": Duration of the step in weeks.
-                - "Active Time Spent (%)": Percent of time each role spends on the step.
-
-        Returns:
-            pd.DataFrame: A dataframe with columns:
-                - "Stage": Project stage.
-                - "Person-Hours": Total hours spent by all roles for that stage.
-        """
-        # Return empty dataframe if input is None or empty
-        if df is None or df.empty:
-            return pd.DataFrame(columns=["Stage", "Person-Hours"])
-
-        df = df.copy()
-
-        # Ensure numeric values and fill missing/invalid data with 0
-        df["Total Duration (weeks)"] = pd.to_numeric(df.get("Total Duration (weeks)", 0), errors="coerce").fillna(0)
-        df["Active Time Spent (%)"] = pd.to_numeric(df.get("Active Time Spent (%)", 0), errors="coerce").fillna(0)
-
-        # Fill missing Stage column
-        if "Stage" not in df.columns:
-            df["Stage"] = "Unknown Stage"
-
-        # Compute Person-Weeks per row
-        df["Person-Weeks"] = df["Total Duration (weeks)"] * df["Active Time Spent (%)"] / 100
-
-        # Aggregate Person-Weeks by Stage
-        df_hours = df.groupby("Stage", as_index=False)["Person-Weeks"].sum()
-
-        # Convert Person-Weeks to Person-Hours (assuming 40-hr weeks)
-        df_hours["Person-Hours"] = df_hours["Person-Weeks"] * 40
-
-        # Return only relevant columns
-        return df_hours[["Stage", "Person-Hours"]]
-
-
-    # ------------------------------------------
-    # --- Total Time Spent per Project Stage ---
-    # ------------------------------------------
     # --- Retrieve DataFrames ---
-    df_bau = st.session_state.get("df_BAU", pd.DataFrame())
-    df_tool = st.session_state.get("df_Proposed_Tool", pd.DataFrame())
-    personnel_rows = st.session_state.get("personnel_rows", [])
-
-    # --- Compute Time Tables for BAU and Proposed Tool ---
-    df_time_bau = compute_total_time(df_bau)  # Total person-hours per stage for Business as Usual
-    df_time_tool = compute_total_time(df_tool)  # Total person-hours per stage for Proposed Tool
-
-    # --- Merge time tables by Stage ---
-    time_summary = pd.DataFrame({"Stage": project_stages})  # Start with all project stages
-
-    # Merge BAU data
-    time_summary = (
-        time_summary
-        .merge(df_time_bau, on="Stage", how="left")  # Merge BAU hours
-        .rename(columns={"Person-Hours": "Business as Usual (hrs)"})  # Rename column
-        .fillna(0)  # Fill missing stages with 0
+    df_bau = load_table(st.session_state, "df_BAU")
+    df_tool = load_table(st.session_state, "df_Proposed_Tool")
+    infra_costs = load_table(st.session_state, "df_infrastructure_costs")
+
+    # --- Compute summary tables (reused across reruns while inputs are unchanged) ---
+    cube = cost_cube(df_bau, df_tool)
+    time_summary = cached_output(  # Active person-hours per stage
+        "time_summary", compute_stage_time_summary, df_bau, df_tool, project_stages, cube
     )
-
-    # Merge Proposed Tool data
-    time_summary = (
-        time_summary
-        .merge(df_time_tool, on="Stage", how="left")  # Merge tool hours
-        .rename(columns={"Person-Hours": "Proposed Tool (hrs)"})  # Rename column
-        .fillna(0)  # Fill missing stages with 0
+    total_time_summary = cached_output(  # Duration per stage
+        "total_time_summary", compute_stage_duration_summary, df_bau, df_tool
     )
-
-    # --- Compute Time Saved vs BAU ---
-    time_summary["Time Saved vs BAU (hrs)"] = (
-            time_summary["Business as Usual (hrs)"] - time_summary["Proposed Tool (hrs)"]
+    cost_summary = cached_output(  # Cost per stage
+        "cost_summary", compute_stage_cost_summary, df_bau, df_tool, st.session_state.rate_index, infra_costs,
+        project_stages, cube
     )
 
-    # --- Add Total row ---
-    total_time_row = pd.DataFrame([{
-        "Stage": "Total",
-        "Business as Usual (hrs)": time_summary["Business as Usual (hrs)"].sum(),
-        "Proposed Tool (hrs)": time_summary["Proposed Tool (hrs)"].sum(),
-        "Time Saved vs BAU (hrs)": time_summary["Time Saved vs BAU (hrs)"].sum()
-    }])
-
-    # Append total row to the summary
-    time_summary = pd.concat([time_summary, total_time_row], ignore_index=True)
-
-    # --------------------------------------------------------------------------
-    # --- Total Time Spent per Project Stage (ignoring personnel allocation) ---
-    # --------------------------------------------------------------------------
-    total_time_summary = pd.DataFrame({"Stage": project_stages})  # Initialize summary with project stages
-
-    # Loop through each scenario: Business as Usual (BAU) and Proposed Tool
-    for scenario in ["BAU", "Proposed_Tool"]:
-        durations = []
-
-        # Get the scenario-specific dataframe from session state; default to empty
-        df_scenario = st.session_state.get(f"df_{scenario}", pd.DataFrame())
-
-        # Loop through each stage
-        for stage in project_stages:
-            # Filter rows corresponding to the current stage
-            stage_rows = df_scenario[df_scenario["Stage"] == stage] if not df_scenario.empty else pd.DataFrame()
-
-            stage_time = 0  # Initialize stage time accumulator
-
-            # Sum the maximum duration for each unique step within the stage
-            if "Step" in stage_rows.columns:
-                for step in stage_rows["Step"].unique():
-                    step_rows = stage_rows[stage_rows["Step"] == step]
-                    if not step_rows.empty:
-                        stage_time += step_rows["Total Duration (weeks)"].max()
-                durations.append(stage_time)  # Append summed stage time
-            else:
-                durations.append(stage_time)  # Append 0 if no steps exist
-
-        # Add scenario duration column to the summary dataframe
-        total_time_summary[f"{scenario.replace('_', ' ')} Duration (weeks)"] = durations
-
-    # --- Compute time saved (positive = time saved) ---
-    total_time_summary["Time Saved vs BAU (weeks)"] = (
-            total_time_summary["BAU Duration (weeks)"] - total_time_summary["Proposed Tool Duration (weeks)"]
-    )
-
-    # --- Add Total row ---
-    total_time_row = pd.DataFrame([{
-        "Stage": "Total",
-        "BAU Duration (weeks)": total_time_summary["BAU Duration (weeks)"].sum(),
-        "Proposed Tool Duration (weeks)": total_time_summary["Proposed Tool Duration (weeks)"].sum(),
-        "Time Saved vs BAU (weeks)": total_time_summary["Time Saved vs BAU (weeks)"].sum()
-    }])
-
-    # Append total row to the summary
-    total_time_summary = pd.concat([total_time_summary, total_time_row], ignore_index=True)
-
-    # ------------------------------------
-    # --- Total Cost Per Project Stage ---
-    # ------------------------------------
-    cost_summary = pd.DataFrame({"Stage": project_stages})
-
-    # --- Loop through each scenario (BAU and Proposed Tool) ---
-    for scenario in ["BAU", "Proposed_Tool"]:
-        costs = []
-
-        # Retrieve the dataframe for the current scenario from session state
-        df_scenario = st.session_state.get(f"df_{scenario}", pd.DataFrame())
-
-        # Loop through each project stage
-        for stage in project_stages:
-            # Filter rows for the current stage; if empty, create an empty dataframe
-            stage_rows = df_scenario[df_scenario["Stage"] == stage] if not df_scenario.empty else pd.DataFrame()
-
-            stage_cost = 0  # Initialize stage cost accumulator
-
-            # Loop through each row (role) in the stage
-            for _, row in stage_rows.iterrows():
-                role = row.get("Role", "")  # Role name
-                pct_active = row.get("Active Time Spent (%)", 0)  # Percent time active
-                duration_weeks = row.get("Total Duration (weeks)", 0)  # Duration in weeks
-
-                # Look up the hourly rate for this role from personnel_rows
-                hr_rate = next((p["Hourly Rate"] for p in personnel_rows if p["Role"] == role), 0)
-
-                # Compute cost for this row: duration × active % × 40 hours/week × hourly rate
-                stage_cost += duration_weeks * (pct_active / 100) * 40 * hr_rate
-
-            # Append the total cost for this stage
-            costs.append(stage_cost)
-
-        # Add the scenario cost column to the summary dataframe
-        cost_summary[f"{scenario.replace('_', ' ')} Cost ($)"] = costs
-
-    # --- Add Infrastructure row ---
-    infra_costs = st.session_state.get("df_infrastructure_costs", pd.DataFrame())
-    if not infra_costs.empty:
-        infra_row = {
-            "Stage": "Infrastructure",
-            "BAU Cost ($)": infra_costs.loc[infra_costs["Cost Category"] == "Total", "Business as Usual ($)"].values[0],
-            "Proposed Tool Cost ($)":
-                infra_costs.loc[infra_costs["Cost Category"] == "Total", "Proposed Tool ($)"].values[0]
-        }
-        cost_summary = pd.concat([cost_summary, pd.DataFrame([infra_row])], ignore_index=True)
-
-    # --- Compute Cost Saved ---
-    cost_summary["Cost Saved vs BAU ($)"] = cost_summary["BAU Cost ($)"] - cost_summary["Proposed Tool Cost ($)"]
-
-    # --- Add Total row ---
-    total_row = pd.DataFrame([{
-        "Stage": "Total",
-        "BAU Cost ($)": cost_summary["BAU Cost ($)"].sum(),
-        "Proposed Tool Cost ($)": cost_summary["Proposed Tool Cost ($)"].sum(),
-        "Cost Saved vs BAU ($)": cost_summary["Cost Saved vs BAU ($)"].sum()
-    }])
-    cost_summary = pd.concat([cost_summary, total_row], ignore_index=True)
-
     # --- Display tables ---
     st.markdown('### Duration (in weeks) by Project Stage ### ')
     st.info("""
@@ -1385,85 +1516,35 @@ elif page == "Project-Stage Efficiency Gains":
             """)
     st.dataframe(cost_summary, use_container_width=True)
 
+    # --- Comparison of all scenarios (when additional scenarios exist) ---
+    if len(st.session_state.project_steps) > 2:
+        comparison = compare_all_scenarios()
+        st.markdown('### Comparison of All Scenarios ### ')
+        st.info("""
+                - These tables show every scenario side by side, including the additional scenarios defined on the 
+                **Proposed Tool** page. 
+                - Each additional scenario uses the infrastructure costs of the scenario it is based on.
+                """)
+        st.markdown("##### Duration (in weeks) by Project Stage")
+        st.dataframe(comparison["stage_duration"], use_container_width=True)
+        st.markdown("##### Active Person-Hours by Project Stage")
+        st.dataframe(comparison["stage_time"], use_container_width=True)
+        st.markdown("##### Cost ($) by Project Stage")
+        st.dataframe(comparison["stage_cost"], use_container_width=True)
+
 elif page == "Personnel Efficiency Gains":
     st.header("📊 Personnel Efficiency Gains")
 
     # --- Retrieve DataFrames from session state ---
-    df_bau = st.session_state.get("df_BAU_1", pd.DataFrame())  # Business as Usual scenario
-    df_tool = st.session_state.get("df_Proposed_Tool", pd.DataFrame())  # Proposed Tool scenario
-    personnel_rows = st.session_state.get("personnel_rows", [])  # List of personnel with hourly rates
-
-    # --- Get unique roles across all scenarios ---
-    roles = sorted({
-        row.get("Role", "Unknown Role")
-        for df in [df_bau, df_tool]
-        for _, row in df.iterrows()
-    })
+    df_bau = load_table(st.session_state, "df_BAU")  # Business as Usual scenario
+    df_tool = load_table(st.session_state, "df_Proposed_Tool")  # Proposed Tool scenario
 
-    # --- Person-Hours Table ---
-    time_summary = pd.DataFrame({"Role": roles})
-
-    # Loop through scenarios and compute total hours per role
-    for scenario_name, df_scenario in zip(["BAU", "Proposed Tool"], [df_bau, df_tool]):
-        hours_list = []
-        for role in roles:
-            # Filter rows for current role
-            role_rows = df_scenario[df_scenario["Role"] == role] if not df_scenario.empty else pd.DataFrame()
-            # Sum total active hours: duration_weeks * % active * 40 hours/week
-            total_hours = sum(
-                row.get("Total Duration (weeks)", 0) * row.get("Active Time Spent (%)", 0) / 100 * 40
-                for _, row in role_rows.iterrows()
-            )
-            hours_list.append(total_hours)
-        time_summary[f"{scenario_name} (hrs)"] = hours_list
-
-    # Compute time saved (positive = hours saved)
-    time_summary["Time Saved vs BAU (hrs)"] = (
-            time_summary["BAU (hrs)"] - time_summary["Proposed Tool (hrs)"]
-    )
-
-    # Add Total row
-    total_time_row = pd.DataFrame([{
-        "Role": "Total",
-        "BAU (hrs)": time_summary["BAU (hrs)"].sum(),
-        "Proposed Tool (hrs)": time_summary["Proposed Tool (hrs)"].sum(),
-        "Time Saved vs BAU (hrs)": time_summary["Time Saved vs BAU (hrs)"].sum()
-    }])
-    time_summary = pd.concat([time_summary, total_time_row], ignore_index=True)
-
-    # --- Cost Table ---
-    cost_summary = pd.DataFrame({"Role": roles})
-
-    # Loop through scenarios and compute total cost per role
-    for scenario_name, df_scenario in zip(["BAU", "Proposed Tool"], [df_bau, df_tool]):
-        cost_list = []
-        for role in roles:
-            role_rows = df_scenario[df_scenario["Role"] == role] if not df_scenario.empty else pd.DataFrame()
-            total_cost = 0
-            for _, row in role_rows.iterrows():
-                pct_active = row.get("Active Time Spent (%)", 0)
-                duration_weeks = row.get("Total Duration (weeks)", 0)
-                # Look up hourly rate for this role
-                hr_rate = next((p["Hourly Rate"] for p in personnel_rows if p["Role"] == role), 0)
-                # Compute cost for this row and accumulate
-                total_cost += duration_weeks * pct_active / 100 * 40 * hr_rate
-            cost_list.append(total_cost)
-        cost_summary[f"{scenario_name} Cost ($)"] = cost_list
-
-    # Compute cost saved (positive = cost saved)
-    cost_summary["Cost Saved vs BAU ($)"] = (
-            cost_summary["BAU Cost ($)"] - cost_summary["Proposed Tool Cost ($)"]
+    # --- Compute person-hours and cost per role (reused across reruns while inputs are unchanged) ---
+    time_summary, cost_summary = cached_output(
+        "personnel_summaries", compute_personnel_summaries, df_bau, df_tool, st.session_state.rate_index,
+        cost_cube(df_bau, df_tool)
     )
 
-    # Add Total row for costs
-    total_cost_row = pd.DataFrame([{
-        "Role": "Total",
-        "BAU Cost ($)": cost_summary["BAU Cost ($)"].sum(),
-        "Proposed Tool Cost ($)": cost_summary["Proposed Tool Cost ($)"].sum(),
-        "Cost Saved vs BAU ($)": cost_summary["Cost Saved vs BAU ($)"].sum()
-    }])
-    cost_summary = pd.concat([cost_summary, total_cost_row], ignore_index=True)
-
     # --- Display Person-Hours Table ---
     st.markdown('### Active Person-Hours by Role ### ')
     st.info("""
@@ -1484,7 +1565,22 @@ elif page == "Personnel Efficiency Gains":
     """)
     st.dataframe(cost_summary, use_container_width=True)
 
+    # --- Comparison of all scenarios (when additional scenarios exist) ---
+    if len(st.session_state.project_steps) > 2:
+        comparison = compare_all_scenarios()
+        st.markdown('### Comparison of All Scenarios ### ')
+        st.info("""
+            - These tables show every scenario side by side, including the additional scenarios defined on the 
+            **Proposed Tool** page.
+        """)
+        st.markdown("##### Active Person-Hours by Role")
+        st.dataframe(comparison["personnel_time"], use_container_width=True)
+        st.markdown("##### Personnel Cost ($) by Role")
+        st.dataframe(comparison["personnel_cost"], use_container_width=True)
+
 elif page == "Social ROI":
+    import plotly.express as px  # Deferred until a chart page is shown (see "Fast start" in the README)
+
     st.header("📈 Social Return on Investment (ROI) Analysis")
 
     # --- Section: Impact per Study ---
@@ -1495,77 +1591,26 @@ elif page == "Social ROI":
         "(i.e., number of students impacted by the research study)"
     )
 
-    # --- Retrieve total project durations in weeks ---
-    durations_weeks = {}
-    for scenario in ["BAU", "Proposed_Tool"]:
-        df_scenario = st.session_state.get(f"df_{scenario}", pd.DataFrame())
-        total_weeks = 0
-        if not df_scenario.empty:
-            # Sum the maximum duration per stage
-            total_weeks = df_scenario.groupby("Stage")["Total Duration (weeks)"].max().sum()
-        durations_weeks[scenario] = total_weeks
-
-    # Convert weeks to months (approx 4.345 weeks/month)
-    durations_months = {k: v / 4.345 for k, v in durations_weeks.items()}
-
-    # --- Retrieve total costs (personnel + infrastructure) ---
-    cost_summary = st.session_state.get("df_infrastructure_costs", pd.DataFrame())
-    total_costs = {}
-    for scenario in ["BAU", "Proposed_Tool"]:
-        # Infrastructure cost
-        infra_cost = 0
-        if not cost_summary.empty:
-            if scenario == "BAU":
-                infra_cost = cost_summary.loc[cost_summary["Cost Category"] == "Total", "Business as Usual ($)"].values[
-                    0]
-            else:
-                infra_cost = cost_summary.loc[cost_summary["Cost Category"] == "Total", "Proposed Tool ($)"].values[0]
-
-        # Personnel cost
-        df_scenario = st.session_state.get(f"df_{scenario}", pd.DataFrame())
-        personnel_rows = st.session_state.get("personnel_rows", [])
-        personnel_cost = 0
-        for _, row in df_scenario.iterrows():
-            role = row.get("Role", "")
-            pct_active = row.get("Active Time Spent (%)", 0)
-            duration_weeks = row.get("Total Duration (weeks)", 0)
-            hr_rate = next((p["Hourly Rate"] for p in personnel_rows if p["Role"] == role), 0)
-            personnel_cost += duration_weeks * pct_active / 100 * 40 * hr_rate
-
-        total_costs[scenario] = infra_cost + personnel_cost
-
-    # --- Compute Impact per Study ---
+    # --- Retrieve inputs ---
+    df_bau = load_table(st.session_state, "df_BAU")
+    df_tool = load_table(st.session_state, "df_Proposed_Tool")
+    infra_costs = load_table(st.session_state, "df_infrastructure_costs")
     roi_params = st.session_state.get("roi_parameters", {})
-    per_student_improvement = roi_params.get("computed_improvement", 0)
-    discovery_rate = roi_params.get("discovery_rate", 0) / 100
-    total_students = roi_params.get("total_students", 0)
 
-    impact_per_study = {
-        scenario: per_student_improvement * discovery_rate * total_students
-        for scenario in ["BAU", "Proposed_Tool"]
+    # --- Build ROI DataFrame (time, cost and impact of a single study) ---
+    durations_weeks = {
+        name: weeks for name, weeks in scheduled_durations().items() if name in ("BAU", "Proposed Tool")
     }
-
-    # --- Build ROI DataFrame ---
-    roi_df = pd.DataFrame({
-        "Scenario": ["BAU", "Proposed Tool"],
-        "Time (months)": [round(durations_months["BAU"], 1), round(durations_months["Proposed_Tool"], 1)],
-        "Cost ($)": [round(total_costs["BAU"], 2), round(total_costs["Proposed_Tool"], 2)],
-        "Impact per study ($)": [round(impact_per_study["BAU"], 2), round(impact_per_study["Proposed_Tool"], 2)]
-    })
+    roi_df = cached_output(
+        "roi_df", compute_roi_table, df_bau, df_tool, st.session_state.rate_index, infra_costs, roi_params,
+        durations_weeks, cost_cube(df_bau, df_tool)
+    )
     st.dataframe(roi_df, use_container_width=True)
+    if durations_weeks:
+        st.caption(f"Time (months) of {' and '.join(durations_weeks)} is the critical path of its schedule "
+                   f"(see 🗓️ Schedule on the Project Activities pages).")
 
-    # --- Retrieve additional ROI parameters ---
-    num_orgs_bau = roi_params.get("orgs_bau", 0)
-    num_orgs_proposed = roi_params.get("orgs_proposed", 0)
     total_investment = roi_params.get("total_investment", 0)
-    num_concurrent_projects = roi_params.get("concurrent_studies", 0)
-
-    bau_time = get_scenario_value("BAU", "Time (months)")
-    tool_time = get_scenario_value("Proposed Tool", "Time (months)")
-    bau_cost = get_scenario_value("BAU", "Cost ($)")
-    tool_cost = get_scenario_value("Proposed Tool", "Cost ($)")
-    bau_impact = get_scenario_value("BAU", "Impact per study ($)")
-    tool_impact = get_scenario_value("Proposed Tool", "Impact per study ($)")
 
     # === User Inputs for Fixed Costs ===
     st.markdown('---')
@@ -1613,50 +1658,330 @@ elif page == "Social ROI":
         st.caption("""This is initialized to the grantee organization's investment in building the proposed tool.
         Adjust as needed to reflect actual or projected cost of tool development.""")
 
+    # === Staff Capacity (optional) ===
+    st.markdown('---')
+    st.markdown("#### 👥 Staff Capacity (optional)")
+    st.info(
+        """
+        By default, each organization completes *Time (months)* ÷ *Number of concurrent studies* studies per
+        month, as if concurrent studies never competed for staff. Enter the hours per week each role can work in
+        one organization to **simulate** studies sharing that staff instead: a step only starts once the roles it
+        needs (its *Active Time Spent (%)* of a 40-hour week) are free, including for the parallel steps of the
+        same study, and steps that need more than a role's capacity take proportionally longer.""")
+    staff_capacity = st.session_state.staff_capacity
+    capacity_enabled = st.toggle(
+        "Limit studies by staff capacity",
+        value=staff_capacity["enabled"],
+        key="staff_capacity_enabled",
+        help="When on, the projection below uses the number of studies completed in the simulation."
+    )
+    if capacity_enabled != staff_capacity["enabled"]:
+        staff_capacity = st.session_state.staff_capacity = {**staff_capacity, "enabled": capacity_enabled}
+
+    if capacity_enabled:
+        with st.form("staff_capacity_form", border=False):
+            edited_capacity = st.data_editor(
+                pd.DataFrame({
+                    "Role": personnel_roles,
+                    "Capacity (hrs/week)": [float(staff_capacity["hours"].get(role, HOURS_PER_WEEK))
+                                            for role in personnel_roles]
+                }),
+                hide_index=True,
+                use_container_width=True,
+                disabled=["Role"],
+                key="staff_capacity_editor",
+                column_config={"Capacity (hrs/week)": st.column_config.NumberColumn(
+                    min_value=0.0, step=1.0, format="%.1f",
+                    help="Hours per week this role can work in one organization (40 = one full-time person)."
+                )}
+            )
+            if st.form_submit_button("💾 Save capacity"):
+                st.session_state.staff_capacity = {
+                    **staff_capacity,
+                    "hours": {role: float(hours) for role, hours in
+                              zip(edited_capacity["Role"], edited_capacity["Capacity (hrs/week)"].fillna(0.0))}
+                }
+                del st.session_state["staff_capacity_editor"]  # Start the next edit from the saved capacity
+                st.rerun()
+
+        concurrent_studies = roi_params.get("concurrent_studies", 0)
+        throughput = simulate_staff_capacity(concurrent_studies)
+        for name, result in throughput.items():
+            if result["unstaffed_roles"]:
+                st.warning(f"⚠️ No {name} study can finish: {', '.join(result['unstaffed_roles'])} "
+                           f"{'has' if len(result['unstaffed_roles']) == 1 else 'have'} no capacity.")
+
+        st.dataframe(
+            pd.DataFrame({
+                "Scenario": list(throughput),
+                "Study duration (weeks)": [result["study_weeks"] for result in throughput.values()],
+                "Studies per org per year (simulated)": [
+                    result["studies_per_org"][-1] / PROJECTION_YEARS for result in throughput.values()
+                ],
+                "Studies per org per year (without capacity limit)": [
+                    np.floor(PROJECTION_YEARS * 12 * concurrent_studies / months) / PROJECTION_YEARS
+                    if months > 0 else 0.0
+                    for months in (get_scenario_value(roi_df, name, "Time (months)") for name in throughput)
+                ]
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        utilization = pd.concat(
+            {name: result["utilization"].set_index("Role")["Utilization (%)"] for name, result in throughput.items()},
+            axis=1
+        ).add_suffix(" utilization (%)").reset_index()
+        st.dataframe(
+            utilization,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                column: st.column_config.ProgressColumn(format="%.0f", min_value=0, max_value=100)
+                for column in utilization.columns[1:]
+            }
+        )
+        st.caption(f"Average share of each role's capacity in use over {PROJECTION_YEARS} years. Roles close to "
+                   f"100% are the bottleneck of concurrent studies.")
+        studies_per_org = {name: result["studies_per_org"].tolist() for name, result in throughput.items()}
+    else:
+        studies_per_org = None
+
     # === Charts: Impact per Dollar Over Time ===
     st.markdown('---')
     st.markdown("### 📉 Impact per Dollar Over Time")
 
     # Compute projections for each scenario
-    projection_data_bau = compute_projection("BAU", bau_time, bau_cost, bau_impact,
-                                             fixed_bau_user, num_orgs_bau, num_concurrent_projects)
-    projection_data_pt = compute_projection("Proposed Tool", tool_time, tool_cost, tool_impact,
-                                            fixed_tool_user, num_orgs_proposed, num_concurrent_projects)
-
-    # Convert projections to DataFrames
-    roi_projection_bau = pd.DataFrame(projection_data_bau)
-    roi_projection_pt = pd.DataFrame(projection_data_pt)
-    roi_projection_all = pd.concat([roi_projection_bau, roi_projection_pt])
+    roi_projection_all = cached_output(
+        "roi_projection", compute_roi_projection, roi_df, roi_params, fixed_bau_user, fixed_tool_user,
+        PROJECTION_YEARS, 1, studies_per_org
+    )
+    if studies_per_org:
+        st.caption("The number of studies completed each year is simulated with the staff capacity above.")
 
     # --- Plot 1: Variable Cost Only ---
-    fig1 = px.line(
-        roi_projection_all,
-        x="Year",
-        y="Impact per $ (Variable only)",
-        color="Scenario",
-        title="Impact per $ (Variable Cost)",
-        markers=True
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    with profiler.phase("chart: impact per $ (variable cost)"):
+        fig1 = px.line(
+            roi_projection_all,
+            x="Year",
+            y="Impact per $ (Variable only)",
+            color="Scenario",
+            title="Impact per $ (Variable Cost)",
+            markers=True
+        )
+        st.plotly_chart(fig1, use_container_width=True)
 
     # --- Plot 2: Total Cost (Fixed + Variable) ---
-    fig2 = px.line(
-        roi_projection_all,
-        x="Year",
-        y="Impact per $ (Total cost)",
-        color="Scenario",
-        title="Impact per Dollar (Including Fixed + Variable Costs)",
-        markers=True
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    with profiler.phase("chart: impact per $ (total cost)"):
+        fig2 = px.line(
+            roi_projection_all,
+            x="Year",
+            y="Impact per $ (Total cost)",
+            color="Scenario",
+            title="Impact per Dollar (Including Fixed + Variable Costs)",
+            markers=True
+        )
+        st.plotly_chart(fig2, use_container_width=True)
 
     # --- Display Data Table ---
     st.markdown("##### Social ROI Data Table")
     st.dataframe(roi_projection_all, use_container_width=True)
 
+    # === Ranking of all scenarios (when additional scenarios exist) ===
+    if len(st.session_state.project_steps) > 2:
+        st.markdown('---')
+        st.markdown("### 🏆 Ranking of All Scenarios")
+        st.info(
+            f"""
+            Scenarios are ranked by **Impact per $** (including fixed costs) in year {PROJECTION_YEARS}. Each 
+            additional scenario uses the number of organizations and the fixed cost of the scenario it is based on.""")
+        ranking = compare_all_scenarios({"BAU": fixed_bau_user, "Proposed Tool": fixed_tool_user})["ranking"]
+        st.dataframe(ranking.sort_values("Rank"), use_container_width=True, hide_index=True)
+
+    # === Sensitivity Analysis (optional) ===
+    st.markdown('---')
+    st.markdown("### 🎛️ Sensitivity Analysis")
+    st.info(
+        """
+        Explore how **Impact per $** responds to the Social ROI Parameters. Each parameter is varied around its 
+        current value, and the projection is evaluated for every combination of values at the selected year.
+        - The **tornado chart** shows the change in Impact per $ when one parameter at a time is set to its lowest 
+        or highest value.
+        - The **heatmap** shows Impact per $ for every combination of two parameters, holding all others at their 
+        current values.""")
+
+    if st.checkbox("Run sensitivity analysis", key="roi_sweep_enabled"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sweep_scenario = st.radio("Scenario", options=["Proposed Tool", "BAU"], key="roi_sweep_scenario")
+            sweep_metric = st.selectbox("Metric", options=METRICS, index=1, key="roi_sweep_metric")
+        with col2:
+            sweep_year = st.number_input("Projection year", min_value=1, max_value=PROJECTION_YEARS,
+                                         value=PROJECTION_YEARS, step=1, key="roi_sweep_year")
+            sweep_spread = st.slider("Range around current values (±%)", min_value=10, max_value=90, value=50,
+                                     step=10, key="roi_sweep_spread")
+        with col3:
+            sweep_points = st.number_input("Values per parameter", min_value=2, max_value=9, value=5, step=1,
+                                           key="roi_sweep_points")
+
+        # Only the parameters that affect the selected scenario (e.g. not the BAU org count for the Proposed Tool)
+        sweep_ranges = build_sweep_ranges(roi_params, sweep_spread / 100, sweep_points, sweep_scenario)
+        sweep_fixed_cost = fixed_tool_user if sweep_scenario == "Proposed Tool" else fixed_bau_user
+
+        # --- Tornado chart ---
+        tornado = compute_tornado(roi_params, sweep_ranges, roi_df, sweep_fixed_cost, sweep_scenario, sweep_year,
+                                  sweep_metric)
+        tornado_long = pd.concat([
+            pd.DataFrame({"Parameter": tornado["Parameter"], "Value": "Lowest",
+                          "Change vs current ($)": tornado["At low value"] - tornado["Base"]}),
+            pd.DataFrame({"Parameter": tornado["Parameter"], "Value": "Highest",
+                          "Change vs current ($)": tornado["At high value"] - tornado["Base"]})
+        ])
+        with profiler.phase("chart: sensitivity tornado"):
+            fig3 = px.bar(
+                tornado_long,
+                x="Change vs current ($)",
+                y="Parameter",
+                color="Value",
+                orientation="h",
+                barmode="overlay",
+                title=f"Sensitivity of {sweep_metric} in Year {sweep_year} ({sweep_scenario})"
+            )
+            fig3.update_yaxes(categoryorder="array", categoryarray=tornado["Parameter"].tolist()[::-1])
+            st.plotly_chart(fig3, use_container_width=True)
+
+        # --- Heatmap ---
+        col1, col2 = st.columns(2)
+        with col1:
+            x_param = st.selectbox("Heatmap x-axis", options=list(sweep_ranges), index=0,
+                                   format_func=SWEEP_PARAMETERS.get, key="roi_sweep_x")
+        with col2:
+            y_param = st.selectbox("Heatmap y-axis", options=list(sweep_ranges), index=3,
+                                   format_func=SWEEP_PARAMETERS.get, key="roi_sweep_y")
+
+        if x_param == y_param:
+            st.warning("⚠️ Select two different parameters for the heatmap.")
+        else:
+            heatmap = compute_heatmap(roi_params, x_param, y_param, sweep_ranges, roi_df, sweep_fixed_cost,
+                                      sweep_scenario, sweep_year, sweep_metric)
+            with profiler.phase("chart: sensitivity heatmap"):
+                fig4 = px.imshow(
+                    heatmap,
+                    x=[f"{v:g}" for v in heatmap.columns],
+                    y=[f"{v:g}" for v in heatmap.index],
+                    labels={"x": SWEEP_PARAMETERS[x_param], "y": SWEEP_PARAMETERS[y_param], "color": sweep_metric},
+                    text_auto=".2f",
+                    aspect="auto",
+                    origin="lower",
+                    title=f"{sweep_metric} in Year {sweep_year} ({sweep_scenario})"
+                )
+                st.plotly_chart(fig4, use_container_width=True)
+
+        # --- Full grid ---
+        sweep_size = grid_size(sweep_ranges)
+        st.markdown(f"##### Full Parameter Grid ({sweep_size:,} combinations)")
+        if sweep_size > MAX_GRID_SIZE:
+            st.warning(f"⚠️ The full grid is only evaluated up to {MAX_GRID_SIZE:,} combinations. Reduce the "
+                       f"values per parameter to see its statistics and download it.")
+        else:
+            # Evaluated once per change of the ranges, ROI table, scenario or year
+            sweep_df = cached_output(
+                "sensitivity grid", run_sweep, {name: values.tolist() for name, values in sweep_ranges.items()},
+                roi_df, sweep_fixed_cost, sweep_scenario, sweep_year
+            )
+            st.dataframe(sweep_df[METRICS].describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T,
+                         use_container_width=True)
+            st.download_button(
+                label="📥 Download Parameter Grid as CSV",
+                data=lambda: sweep_df.rename(columns=SWEEP_PARAMETERS).to_csv(index=False).encode("utf-8"),
+                file_name="social_roi_sensitivity.csv",
+                mime="text/csv"
+            )
+
+    # === Uncertainty Analysis (optional) ===
+    st.markdown('---')
+    st.markdown("### 🎲 Uncertainty Analysis")
+    st.info(
+        """
+        Durations and % active time are estimates. This simulation draws many possible values for every step 
+        and role, and reports the range of outcomes as percentiles (e.g. **P5–P95**: 90% of simulated outcomes 
+        fall within this band).
+        - Use **Specify uncertainty range** under a step on the Project Activities pages to enter the lowest and 
+        highest duration and % active time per role for that step.
+        - Steps without a range are varied by the default uncertainty below.
+        - With the **Triangular** distribution, values close to your estimate are the most likely.""")
+
+    if st.checkbox("Run uncertainty analysis", key="mc_enabled"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mc_samples = st.number_input("Number of simulations", min_value=1_000, max_value=1_000_000,
+                                         value=100_000, step=10_000, key="mc_samples")
+            mc_distribution = st.selectbox("Distribution", options=DISTRIBUTIONS, key="mc_distribution")
+        with col2:
+            mc_spread = st.slider("Default uncertainty for steps without a range (±%)", min_value=0,
+                                  max_value=100, value=20, step=5, key="mc_spread")
+            mc_year = st.number_input("Projection year", min_value=1, max_value=PROJECTION_YEARS,
+                                      value=PROJECTION_YEARS, step=1, key="mc_year")
+        with col3:
+            mc_seed = st.number_input("Random seed", min_value=0, value=0, step=1, key="mc_seed")
+
+        mc_inputs = (
+            st.session_state.project_steps,
+            st.session_state.rate_index,
+            {"BAU": get_infrastructure_total(infra_costs, "Business as Usual ($)"),
+             "Proposed Tool": get_infrastructure_total(infra_costs, "Proposed Tool ($)")}
+        )
+        mc_options = {"num_samples": mc_samples, "distribution": mc_distribution, "default_spread": mc_spread / 100,
+                      "seed": mc_seed}
+        mc_key = simulation_key(*mc_inputs, **mc_options)  # Identifies the inputs of the stored result
+        if st.button("▶️ Run Simulation", key="mc_run"):
+            with st.spinner("Running simulation..."):
+                st.session_state.mc_samples_result = run_simulation(*mc_inputs, **mc_options)
+                st.session_state.mc_samples_key = mc_key
+
+        if "mc_samples_result" in st.session_state:
+            if st.session_state.get("mc_samples_key") != mc_key:
+                st.warning("⚠️ The activities, hourly rates, infrastructure costs or simulation settings have "
+                           "changed since this simulation was run. Run it again to update the results below.")
+            mc_samples_result = st.session_state.mc_samples_result
+            mc_fixed_costs = {"BAU": fixed_bau_user, "Proposed Tool": fixed_tool_user}
+
+            # Summaries of the stored result, computed once per result and Social ROI parameters
+            mc_summary = cached_output(
+                "uncertainty summary", lambda _, *args: summarize_simulation(mc_samples_result, *args),
+                st.session_state.get("mc_samples_key"), roi_params, mc_fixed_costs, mc_year
+            )
+            bands = cached_output(
+                "uncertainty bands", lambda _, *args: compute_impact_bands(mc_samples_result, *args),
+                st.session_state.get("mc_samples_key"), roi_params, mc_fixed_costs
+            )
+
+            st.markdown("##### Simulated Outcomes (Percentiles)")
+            st.dataframe(mc_summary, use_container_width=True)
+
+            with profiler.phase("chart: uncertainty bands"):
+                fig5 = px.line(
+                    bands,
+                    x="Year",
+                    y="P50",
+                    color="Scenario",
+                    title="Impact per Dollar (Including Fixed + Variable Costs), median with P5–P95 band",
+                    markers=True
+                )
+                for trace in list(fig5.data):
+                    band = bands[bands["Scenario"] == trace.name]
+                    fig5.add_scatter(x=band["Year"], y=band["P95"], mode="lines", line={"width": 0},
+                                     showlegend=False, hoverinfo="skip", legendgroup=trace.name)
+                    fig5.add_scatter(x=band["Year"], y=band["P5"], mode="lines", line={"width": 0},
+                                     fill="tonexty", fillcolor=trace.line.color, opacity=0.2, showlegend=False,
+                                     hoverinfo="skip", legendgroup=trace.name)
+                st.plotly_chart(fig5, use_container_width=True)
+
+profiler.stop("page body")
+
 # =========================================================
 #  FIXED NAVIGATION BUTTONS
 # =========================================================
+profiler.start("navigation buttons")
 current_idx = PAGES.index(page)
 placeholder = st.empty()
 
@@ -1681,3 +2006,107 @@ with placeholder.container():
                     del st.session_state[key]
                 go_first()
                 st.rerun()  # Reloads the app from the top
+profiler.stop("navigation buttons")
+
+# --- Sidebar: save / load the session (rendered last, so that the saved inputs include this rerun's edits) ---
+profiler.start("session sidebar")
+st.sidebar.markdown("### 💾 Session")
+session_binary = st.sidebar.toggle(
+    "Compact file (Parquet)",
+    key="session_binary",
+    help="Recommended for projects with many steps. The default JSON file can also be evaluated with batch.py."
+)
+session_snapshot = {
+    key: st.session_state[key]
+    for key in ["personnel_rows", "infrastructure_costs", "roi_parameters", "scenario_bases", "schedules",
+                "staff_capacity", "project_steps"]
+    if key in st.session_state
+}
+st.sidebar.download_button(
+    "Save session",
+    data=lambda: export_session(session_snapshot, binary=session_binary),  # Serialized on click
+    file_name="efficiency_calculator_session." + ("parquet" if session_binary else "json"),
+    mime="application/octet-stream" if session_binary else "application/json",
+    use_container_width=True,
+    help="Download all inputs, to continue later or after a reset."
+)
+st.sidebar.file_uploader(
+    "Load session", type=["json", "parquet"], key="session_upload", on_change=load_uploaded_session
+)
+if "session_message" in st.session_state:
+    kind, message = st.session_state.pop("session_message")
+    getattr(st.sidebar, kind)(message)
+profiler.stop("session sidebar")
+
+# =========================================================
+#  SESSION MEMORY BUDGET
+# =========================================================
+with profiler.phase("session memory"):
+    spill_session_tables()
+
+# =========================================================
+#  RERUN PROFILING (opt-in)
+# =========================================================
+st.sidebar.markdown("### ⏱️ Performance")
+st.sidebar.toggle(
+    "Profile reruns",
+    key="profile_reruns",
+    help="Time each phase of every rerun (sidebar, page body, each project stage, output computations, charts) "
+         "and show the breakdown at the bottom of the page."
+)
+if profiler.enabled:
+    profiler.finish()
+    if "profile_history" not in st.session_state:
+        st.session_state.profile_history = ProfileHistory()
+    st.session_state.profile_history.add(page, profiler)
+
+    st.markdown('---')
+    st.markdown(f"### ⏱️ Rerun Timing ({profiler.total_ms:,.0f} ms)")
+    st.info("""
+        - Time spent in each phase of this rerun. Nested phases are indented under the phase they ran in.
+        - **compute:** phases include looking up the output cache; they are fast when the inputs did not change.
+        - The remaining time of the rerun is spent outside the named phases (e.g. page headers).
+        """)
+    st.dataframe(
+        profiler.breakdown(),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Time (ms)": st.column_config.NumberColumn(format="%.1f"),
+            "% of rerun": st.column_config.ProgressColumn(format="%.0f", min_value=0, max_value=100)
+        }
+    )
+    with st.expander(f"History of the last {len(st.session_state.profile_history)} profiled reruns"):
+        st.dataframe(st.session_state.profile_history.summary(), use_container_width=True, hide_index=True)
+        st.button("Clear history", key="profile_clear", on_click=st.session_state.profile_history.clear)
+
+# =========================================================
+#  SESSION MEMORY (opt-in)
+# =========================================================
+st.sidebar.toggle(
+    "Show session memory",
+    key="show_session_memory",
+    help="Show how much server memory each entry of this session uses, and which tables were spilled to disk."
+)
+if st.session_state.show_session_memory:
+    usage = session_memory(st.session_state)
+    in_memory_mb, on_disk_mb = usage["Size (KB)"].sum() / 1024, usage["On disk (KB)"].sum() / 1024
+
+    st.markdown('---')
+    st.markdown(f"### 🧮 Session Memory ({in_memory_mb:,.2f} MB of {SESSION_MEMORY_BUDGET_MB} MB)")
+    st.info(f"""
+        - Estimated server memory used by each entry of this session. An object shared by several entries is
+          counted once.
+        - When the session uses more than {SESSION_MEMORY_BUDGET_MB} MB, its largest stored tables (activities,
+          personnel and infrastructure tables) are spilled to files on the server's disk and read back when an
+          output page needs them. Spilled tables: **{on_disk_mb:,.1f} MB** on disk.
+        """)
+    st.dataframe(
+        usage,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Size (KB)": st.column_config.NumberColumn(format="%.1f"),
+            "On disk (KB)": st.column_config.NumberColumn(format="%.1f")
+        }
+    )
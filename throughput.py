@@ -0,0 +1,197 @@
+"""
+Resource-constrained throughput of concurrent research studies.
+
+`calculator.compute_projection` assumes that an organization completes
+``floor(elapsed months × concurrent studies / study months)`` studies, i.e. that concurrent studies never compete
+for staff. This module instead simulates an organization whose studies share a fixed staff capacity per role
+(hours per week). Each step of a study needs its % active time of every role for its whole duration and only
+starts once that capacity is free. The simulation is a discrete-event simulation with a heap-based event queue:
+time jumps from one step completion to the next, so long horizons with many studies stay fast.
+
+Rules of the simulation:
+
+- Up to the number of concurrent studies run at a time; a new study starts as soon as one finishes.
+- Stages run one after the other, and the steps within a stage run in parallel, as on the Social ROI page.
+- Steps waiting for capacity start in the order of their study (oldest study first). A waiting step reserves
+  its roles: younger steps needing one of those roles wait behind it, so large steps are never starved.
+- A step that needs more of a role than its total capacity runs with the whole capacity and takes
+  proportionally longer (the same amount of work is done).
+
+All organizations have the same staff, so one organization is simulated and the result applies to each of
+them. Like `calculator`, this module does not depend on Streamlit.
+"""
+import heapq
+from bisect import insort
+
+import numpy as np
+import pandas as pd
+
+from calculator import HOURS_PER_WEEK, PROJECTION_YEARS, WEEKS_PER_MONTH, as_activity_table
+
+
+def simulate_throughput(table, capacity, concurrent_studies=1, horizon_years=PROJECTION_YEARS, periods_per_year=1):
+    """
+    Simulate the studies one organization completes with limited staff capacity.
+
+    Args:
+        table (ActivityTable or dict): Project steps of the scenario.
+        capacity (dict): Staff capacity of the organization in hours per week, keyed by role. Roles that are
+            not listed have no capacity.
+        concurrent_studies (int): Maximum number of studies running at a time.
+        horizon_years (int): Number of years to simulate.
+        periods_per_year (int): Resolution of the result (1 = yearly, 12 = monthly).
+
+    Returns:
+        dict:
+            - "studies_per_org": Number of studies completed by the end of each period (for
+              `calculator.compute_projection`).
+            - "study_weeks": Average duration of the completed studies in weeks (NaN if none completed).
+            - "utilization": One row per role with its "Capacity (hrs/week)", the "Busy (hrs/week)" average
+              and the resulting "Utilization (%)".
+            - "unstaffed_roles": Roles that the steps need but that have no capacity (no study can finish).
+    """
+    table = as_activity_table(table)
+    roles = table.roles
+    capacity = np.array([float(capacity.get(role, 0.0)) for role in roles])
+    horizon_weeks = horizon_years * 12 * WEEKS_PER_MONTH
+    period_ends = np.arange(1, horizon_years * periods_per_year + 1) * 12 / periods_per_year * WEEKS_PER_MONTH
+
+    # --- Load of every step on every role (hours per week), stretched to the capacity where needed ---
+    load = np.nan_to_num(table.active) / 100 * HOURS_PER_WEEK
+    needed = load > 0
+    unstaffed = [role for j, role in enumerate(roles) if needed[:, j].any() and capacity[j] <= 0]
+    with np.errstate(divide="ignore", invalid="ignore"):  # Unstaffed roles: infinite stretch, not simulated
+        stretch = np.where(needed, load / capacity, 0.0).max(axis=1, initial=1.0)
+        duration = np.nan_to_num(table.duration) * stretch
+        load = load / stretch[:, None]
+
+    busy = np.zeros(len(roles))  # Role hours worked within the horizon
+    completions = []
+    if not unstaffed and duration.sum() > 0 and concurrent_studies > 0:
+        completions = _run_events(table, load, duration, capacity, concurrent_studies, horizon_weeks, busy)
+
+    completions = np.array(completions)
+    study_weeks = np.array([finish - start for start, finish in completions]) if len(completions) else np.zeros(0)
+    finish_times = np.sort(completions[:, 1]) if len(completions) else np.zeros(0)
+    busy_per_week = busy / horizon_weeks if horizon_weeks > 0 else busy
+    return {
+        "studies_per_org": np.searchsorted(finish_times, period_ends, side="right"),
+        "study_weeks": float(study_weeks.mean()) if len(study_weeks) else np.nan,
+        "utilization": pd.DataFrame({
+            "Role": roles,
+            "Capacity (hrs/week)": capacity,
+            "Busy (hrs/week)": busy_per_week,
+            "Utilization (%)": np.divide(busy_per_week, capacity, out=np.zeros(len(roles)),
+                                         where=capacity > 0) * 100
+        }),
+        "unstaffed_roles": unstaffed
+    }
+
+
+def _run_events(table, load, duration, capacity, concurrent_studies, horizon_weeks, busy):
+    """
+    Event loop of `simulate_throughput`.
+
+    Returns the (start, finish) week of every study completed within the horizon, and accumulates the role hours
+    worked within the horizon into `busy`.
+    """
+    # Steps of every non-empty stage, in stage order (the table keeps steps grouped by stage)
+    stages = {}
+    for i, stage in enumerate(table.stages):
+        stages.setdefault(stage, []).append(i)
+    stages = list(stages.values())
+    needs = [[(j, load[i, j]) for j in np.flatnonzero(load[i] > 0)] for i in range(len(duration))]
+    masks = [sum(1 << j for j, _ in need) for need in needs]  # Roles needed by every step, as a bit mask
+    all_roles = (1 << len(capacity)) - 1
+
+    free = capacity.tolist()
+    events = []  # Heap of (finish week, sequence number, study, step)
+    waiting = []  # Steps waiting for capacity, as sorted (study, step) pairs: oldest study first
+    stage_of = {}  # Current stage of every running study
+    left = {}  # Unfinished steps of the current stage of every running study
+    started = {}  # Start week of every running study
+    completions = []
+    counter = 0  # Sequence number, so that simultaneous events are processed in the order they were created
+
+    def start_study(study, week):
+        started[study] = week
+        enter_stage(study, 0)
+
+    def enter_stage(study, k):
+        stage_of[study] = k
+        left[study] = len(stages[k])
+        for i in stages[k]:
+            insort(waiting, (study, i))
+
+    def dispatch(week):
+        """Start every waiting step whose roles have free capacity and are not reserved by an older step."""
+        nonlocal counter
+        reserved = 0  # Bit mask of the roles reserved by waiting steps
+        still_waiting = []
+        for k, (study, i) in enumerate(waiting):
+            if reserved == all_roles:
+                still_waiting += waiting[k:]  # Every role is reserved: nothing else can start
+                break
+            if masks[i] & reserved:
+                still_waiting.append((study, i))
+            elif all(free[j] >= amount - 1e-9 for j, amount in needs[i]):
+                finish = week + duration[i]
+                for j, amount in needs[i]:
+                    free[j] -= amount
+                    busy[j] += amount * max(min(finish, horizon_weeks) - week, 0.0)
+                counter += 1
+                heapq.heappush(events, (finish, counter, study, i))
+            else:
+                reserved |= masks[i]
+                still_waiting.append((study, i))
+        waiting[:] = still_waiting
+
+    for study in range(concurrent_studies):
+        start_study(study, 0.0)
+    next_study = concurrent_studies
+    dispatch(0.0)
+
+    while events:
+        week = events[0][0]
+        if week > horizon_weeks:
+            break
+        # Complete every step finishing at this time, then start the steps that became possible
+        while events and events[0][0] == week:
+            _, _, study, i = heapq.heappop(events)
+            for j, amount in needs[i]:
+                free[j] += amount
+            left[study] -= 1
+            if left[study]:
+                continue
+            if stage_of[study] + 1 < len(stages):
+                enter_stage(study, stage_of[study] + 1)
+            else:
+                completions.append((started.pop(study), week))
+                del stage_of[study], left[study]
+                start_study(next_study, week)
+                next_study += 1
+        dispatch(week)
+    return completions
+
+
+def simulate_scenarios(project_steps, capacity, concurrent_studies=1, horizon_years=PROJECTION_YEARS,
+                       periods_per_year=1, scenarios=("BAU", "Proposed Tool")):
+    """
+    Simulate the throughput of several scenarios with the same staff capacity.
+
+    Args:
+        project_steps (dict): Project steps keyed by scenario name, as stored in ``st.session_state.project_steps``.
+        capacity (dict): Staff capacity per organization in hours per week, keyed by role.
+        concurrent_studies (int): Maximum number of studies running at a time in an organization.
+        horizon_years (int): Number of years to simulate.
+        periods_per_year (int): Resolution of the result (1 = yearly, 12 = monthly).
+        scenarios (iterable of str): Scenarios to simulate.
+
+    Returns:
+        dict: Result of `simulate_throughput` keyed by scenario name.
+    """
+    return {
+        name: simulate_throughput(project_steps.get(name), capacity, concurrent_studies, horizon_years,
+                                  periods_per_year)
+        for name in scenarios
+    }